@@ -0,0 +1,407 @@
+"""Model artifact loading: the individual pickles in models/ or a consolidated bundle
+
+Bundle layout (BUNDLE_FORMAT_VERSION 1):
+
+    bundle/
+      manifest.json     format, version, per-file sha256 checksums, the size,
+                        mtime and sha256 of the source pickles, and metadata
+      artifacts/*.pkl   the original joblib pickles (estimators and small objects)
+      arrays/*.npy      native engine tree arrays and scaler statistics
+
+The .npy files are opened with mmap_mode="r", so every worker on a host maps
+the same read-only pages. Only those are shared: unpickled scikit-learn and
+XGBoost estimators copy their nodes to each process's heap. With
+INFERENCE_ENGINE=native-only the estimator pickles are never unpickled and
+loading is a handful of mmap calls.
+
+A bundle whose recorded sources no longer match the pickles in the models
+directory is stale (the pickles were replaced without a rebuild).
+"""
+import hashlib
+import importlib
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from api.preprocessing import PreprocessingPlan
+from api.tree_engine import (
+    TreeArrays, ForestPredictor, BoostingPredictor, LinearPredictor, StackingPredictor, compile_verified
+)
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = "insomnia-model-bundle"
+BUNDLE_FORMAT_VERSION = 1
+
+# Artifact name -> file name in the models directory
+ARTIFACT_FILES = {
+    "rf_model": "rf_model.pkl",
+    "xgb_model": "xgb_model.pkl",
+    "gb_model": "gb_model.pkl",
+    "hybrid_stack_model": "hybrid_stack_model.pkl",
+    "scaler": "scaler.pkl",
+    "encoders": "encoders.pkl",
+    "target_encoder": "target_encoder.pkl",
+    "cat_cols": "cat_cols.pkl",
+    "num_cols": "num_cols.pkl",
+    "feature_order": "feature_order.pkl",
+    "T_rf": "T_rf.pkl",
+    "T_ens": "T_ens.pkl"
+}
+
+# Artifacts loaded when present: the distilled student of utils/distill_student.py
+OPTIONAL_ARTIFACT_FILES = {
+    "student_model": "student_model.pkl"
+}
+
+# Ensemble members: (name, artifact, number of leading features it expects)
+ENSEMBLE_MEMBERS = [
+    ("rf", "rf_model", 13),  # Use first 13 features for RF
+    ("xgb", "xgb_model", 14),  # XGBoost also uses Stress_Sleep_Index
+    ("gb", "gb_model", 13),  # Use first 13 features for GB
+    ("hybrid", "hybrid_stack_model", 13)  # Use first 13 features for hybrid
+]
+
+ESTIMATOR_ARTIFACTS = {artifact for _, artifact, _ in ENSEMBLE_MEMBERS}
+
+# Modules the pickles reference, imported before loading concurrently:
+# unpickling on several threads can otherwise deadlock on the import locks
+PICKLE_MODULES = [
+    "sklearn.ensemble",
+    "sklearn.linear_model",
+    "sklearn.preprocessing",
+    "xgboost"
+]
+
+def artifact_paths(models_dir):
+    """Paths of every artifact pickle in models_dir"""
+    models_dir = Path(models_dir)
+    return {name: models_dir / file_name for name, file_name in ARTIFACT_FILES.items()}
+
+def optional_artifact_paths(models_dir):
+    """Paths of the optional artifact pickles present in models_dir"""
+    models_dir = Path(models_dir)
+    paths = {name: models_dir / file_name for name, file_name in OPTIONAL_ARTIFACT_FILES.items()}
+    return {name: path for name, path in paths.items() if path.exists()}
+
+def source_fingerprint(models_dir, bundle_dir=None):
+    """(path, size, mtime) of every artifact source file; changes whenever one is replaced, added or removed"""
+    paths = list(artifact_paths(models_dir).values())
+    paths.extend(Path(models_dir) / file_name for file_name in OPTIONAL_ARTIFACT_FILES.values())
+    if bundle_dir is not None:
+        paths.append(Path(bundle_dir) / "manifest.json")
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = path.stat()
+            fingerprint.append((str(path), stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            fingerprint.append((str(path), None, None))
+    return tuple(fingerprint)
+
+def load_concurrently(jobs, max_workers=4):
+    """Run {name: (path, loader)} jobs on a thread pool
+
+    Returns the loaded values and a per-artifact report of load time and
+    file size.
+    """
+    for module in PICKLE_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+    def timed(path, loader):
+        started = time.perf_counter()
+        value = loader(path)
+        return value, {"seconds": round(time.perf_counter() - started, 4), "bytes": path.stat().st_size}
+
+    results = {}
+    report = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="artifact-load") as executor:
+        futures = {name: executor.submit(timed, path, loader) for name, (path, loader) in jobs.items()}
+        for name, future in futures.items():
+            results[name], report[name] = future.result()
+    return results, report
+
+def load_pickles(models_dir, max_workers=4):
+    """Load every artifact from the individual pickles in models_dir
+
+    The returned dict also holds a "load_report" entry with per-artifact
+    load times and sizes.
+    """
+    paths = artifact_paths(models_dir)
+    for path in paths.values():
+        if not path.exists():
+            raise FileNotFoundError(f"Required file not found: {path}")
+    paths.update(optional_artifact_paths(models_dir))
+    artifacts, report = load_concurrently({name: (path, joblib.load) for name, path in paths.items()}, max_workers)
+    artifacts["load_report"] = report
+    return artifacts
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def predictor_to_spec(predictor, prefix, arrays):
+    """JSON spec of a native predictor; its arrays are added to arrays under prefix"""
+    if isinstance(predictor, (ForestPredictor, BoostingPredictor)):
+        trees = predictor.trees
+        for field, array in trees.arrays().items():
+            arrays[f"{prefix}.{field}"] = array
+        spec = {
+            "type": "forest" if isinstance(predictor, ForestPredictor) else "boosting",
+            "arrays": prefix,
+            "max_depth": trees.max_depth,
+            "n_outputs": trees.n_outputs,
+            "strict": trees.strict
+        }
+        if isinstance(predictor, BoostingPredictor):
+            spec["init_raw"] = predictor.init_raw.tolist()
+            spec["link"] = predictor.link
+        return spec
+    if isinstance(predictor, LinearPredictor):
+        arrays[f"{prefix}.coef"] = predictor.coef
+        arrays[f"{prefix}.intercept"] = predictor.intercept
+        return {"type": "linear", "arrays": prefix}
+    if isinstance(predictor, StackingPredictor):
+        base = [predictor_to_spec(p, f"{prefix}.base{i}", arrays) for i, p in enumerate(predictor.base_predictors)]
+        if any(spec is None for spec in base):
+            return None
+        final = predictor_to_spec(predictor.final_predictor, f"{prefix}.final", arrays)
+        if final is None:
+            return None
+        return {
+            "type": "stacking",
+            "base": base,
+            "final": final,
+            "drop_first_column": predictor.drop_first_column,
+            "passthrough": bool(predictor.passthrough)
+        }
+    # StockPredictor and anything else cannot be stored as arrays
+    return None
+
+def predictor_from_spec(spec, arrays):
+    """Rebuild a native predictor from its spec and (possibly memory-mapped) arrays"""
+    kind = spec["type"]
+    if kind in ("forest", "boosting"):
+        prefix = spec["arrays"]
+        tree_output = arrays.get(f"{prefix}.tree_output")
+        trees = TreeArrays(
+            feature=arrays[f"{prefix}.feature"],
+            threshold=arrays[f"{prefix}.threshold"],
+            children=arrays[f"{prefix}.children"],
+            default_left=arrays[f"{prefix}.default_left"],
+            value=arrays[f"{prefix}.value"],
+            roots=arrays[f"{prefix}.roots"],
+            max_depth=spec["max_depth"],
+            n_outputs=spec["n_outputs"],
+            tree_output=tree_output,
+            strict=spec["strict"]
+        )
+        if kind == "forest":
+            return ForestPredictor(trees)
+        return BoostingPredictor(trees, spec["init_raw"], spec["link"])
+    if kind == "linear":
+        prefix = spec["arrays"]
+        return LinearPredictor(arrays[f"{prefix}.coef"], arrays[f"{prefix}.intercept"])
+    if kind == "stacking":
+        return StackingPredictor(
+            [predictor_from_spec(base, arrays) for base in spec["base"]],
+            spec["drop_first_column"],
+            spec["passthrough"],
+            predictor_from_spec(spec["final"], arrays)
+        )
+    raise ValueError(f"Unknown predictor type in bundle: {kind}")
+
+def build_bundle(models_dir, output_dir):
+    """Build a bundle from the individual pickles in models_dir
+
+    The bundle is written to a sibling temporary directory and renamed into
+    place once its manifest is complete, so readers never see a half-written
+    bundle and a failed build leaves the previous one untouched.
+    """
+    models_dir = Path(models_dir)
+    output_dir = Path(output_dir)
+    output_dir.parent.mkdir(parents=True, exist_ok=True)
+    staging_dir = output_dir.with_name(f".{output_dir.name}.tmp-{os.getpid()}")
+    previous_dir = output_dir.with_name(f".{output_dir.name}.old-{os.getpid()}")
+    for leftover in (staging_dir, previous_dir):
+        if leftover.exists():
+            shutil.rmtree(leftover)
+    try:
+        manifest = _write_bundle(models_dir, staging_dir)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    # A directory cannot replace a non-empty one: move the old bundle aside
+    # first. Processes that memory-mapped its arrays keep reading them.
+    if output_dir.exists():
+        os.replace(output_dir, previous_dir)
+    os.replace(staging_dir, output_dir)
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    return manifest
+
+def _write_bundle(models_dir, output_dir):
+    """Write a complete bundle into the new directory output_dir; returns its manifest"""
+    artifacts = load_pickles(models_dir)
+
+    (output_dir / "artifacts").mkdir(parents=True)
+    (output_dir / "arrays").mkdir()
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "artifacts": {},
+        "arrays": {},
+        "native": {}
+    }
+
+    # Original pickles, byte for byte, and the source files they were copied from
+    manifest["sources"] = {}
+    for name, path in {**artifact_paths(models_dir), **optional_artifact_paths(models_dir)}.items():
+        target = output_dir / "artifacts" / path.name
+        stat = path.stat()
+        shutil.copyfile(path, target)
+        sha256 = file_sha256(target)
+        manifest["artifacts"][name] = {
+            "file": f"artifacts/{path.name}",
+            "sha256": sha256,
+            "bytes": target.stat().st_size
+        }
+        manifest["sources"][name] = {"file": path.name, "bytes": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+
+    # Preprocessing statistics
+    plan = PreprocessingPlan.from_artifacts(
+        artifacts["scaler"], artifacts["encoders"], artifacts["cat_cols"], artifacts["feature_order"]
+    )
+    arrays = {"scaler.mean": plan.mean, "scaler.scale": plan.scale}
+    manifest["preprocessing"] = {
+        "scaled_columns": plan.scaled_columns,
+        "category_codes": plan.category_codes
+    }
+
+    # Native engine arrays, verified against the stock predictors
+    for name, artifact, n_features in ENSEMBLE_MEMBERS:
+        predictor = compile_verified(artifacts[artifact], n_features, name)
+        spec = predictor_to_spec(predictor, name, arrays) if predictor is not None else None
+        manifest["native"][name] = spec
+        if spec is None:
+            logger.warning(f"{name} has no native form - the bundle needs its estimator to serve it")
+
+    for key, array in arrays.items():
+        target = output_dir / "arrays" / f"{key}.npy"
+        np.save(target, np.ascontiguousarray(array))
+        manifest["arrays"][key] = {
+            "file": f"arrays/{key}.npy",
+            "sha256": file_sha256(target),
+            "dtype": str(array.dtype),
+            "shape": list(array.shape)
+        }
+
+    with open(output_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def read_manifest(bundle_dir):
+    """Read and check the bundle manifest"""
+    with open(Path(bundle_dir) / "manifest.json") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Not a model bundle: {bundle_dir}")
+    if manifest.get("version") != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle version {manifest.get('version')} (expected {BUNDLE_FORMAT_VERSION})")
+    return manifest
+
+def stale_sources(manifest, models_dir):
+    """Artifacts whose pickle in models_dir differs from the one the bundle was built from
+
+    A pickle with the recorded size and mtime matches; one with a new mtime
+    matches when its sha256 is unchanged. Without any of the required
+    pickles the bundle is the only source and nothing is stale. Returns None
+    for bundles that did not record their sources.
+    """
+    sources = manifest.get("sources")
+    if sources is None:
+        return None
+    paths = {**artifact_paths(models_dir), **optional_artifact_paths(models_dir)}
+    if not any(paths[name].exists() for name in ARTIFACT_FILES):
+        return []
+    stale = []
+    for name in sorted(set(paths) | set(sources)):
+        path, source = paths.get(name), sources.get(name)
+        if path is None or source is None or not path.exists():
+            stale.append(name)
+            continue
+        stat = path.stat()
+        if stat.st_size != source["bytes"]:
+            stale.append(name)
+        elif stat.st_mtime_ns != source["mtime_ns"] and file_sha256(path) != source["sha256"]:
+            stale.append(name)
+    return stale
+
+def load_bundle(bundle_dir, load_estimators=True, verify=True, max_workers=4):
+    """Load a bundle; returns the artifacts plus "preprocessing_plan", "native" predictors and "load_report"
+
+    Arrays are memory-mapped read-only. With load_estimators=False the
+    ensemble member pickles are skipped (their artifacts are None).
+    """
+    bundle_dir = Path(bundle_dir)
+    manifest = read_manifest(bundle_dir)
+
+    def checked(loader):
+        def load(path):
+            if verify and file_sha256(path) != checksums[path]:
+                raise ValueError(f"Checksum mismatch for {path}")
+            return loader(path)
+        return load
+
+    load_artifact = checked(lambda path: joblib.load(path, mmap_mode="r"))
+    load_array = checked(lambda path: np.load(path, mmap_mode="r"))
+
+    checksums = {}
+    jobs = {}
+    skipped = []
+    for name, entry in manifest["artifacts"].items():
+        if name in ESTIMATOR_ARTIFACTS and not load_estimators:
+            skipped.append(name)
+            continue
+        path = bundle_dir / entry["file"]
+        checksums[path] = entry["sha256"]
+        jobs[name] = (path, load_artifact)
+    for key, entry in manifest["arrays"].items():
+        path = bundle_dir / entry["file"]
+        checksums[path] = entry["sha256"]
+        jobs[f"arrays/{key}"] = (path, load_array)
+
+    loaded, report = load_concurrently(jobs, max_workers)
+    artifacts = {name: loaded[name] for name in manifest["artifacts"] if name in loaded}
+    artifacts.update({name: None for name in skipped})
+    arrays = {key: loaded[f"arrays/{key}"] for key in manifest["arrays"]}
+
+    preprocessing = manifest["preprocessing"]
+    artifacts["preprocessing_plan"] = PreprocessingPlan(
+        preprocessing["scaled_columns"],
+        arrays["scaler.mean"],
+        arrays["scaler.scale"],
+        preprocessing["category_codes"]
+    )
+    artifacts["native"] = {
+        name: predictor_from_spec(spec, arrays)
+        for name, spec in manifest["native"].items()
+        if spec is not None
+    }
+    artifacts["load_report"] = report
+    return artifacts
@@ -0,0 +1,164 @@
+"""Offline batch scoring of CSV/Parquet files across a process pool
+
+Usage: python -m api.batch_scoring INPUT OUTPUT [--workers N] [--chunk-rows N]
+
+The parent reads the input in chunks and writes the output in input order.
+Each worker process loads the model bundle once, scores whole chunks with
+the same vectorized pipeline as /predict/upload and encodes the result, so
+the parent is left with little more than file I/O. Workers run the ensemble
+single-threaded (MODEL_THREADS=1, no fan-out) so throughput grows with the
+number of processes instead of threads competing for the same cores.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+WORKER_STAGES = ("validate", "preprocess", "predict", "format", "encode")
+
+# State of a worker process
+_bundle = None
+_load_error = None
+_load_seconds = None
+
+def _init_worker(models_dir, bundle_dir):
+    global _bundle, _load_error, _load_seconds
+    started = time.perf_counter()
+    # One thread per process: parallelism comes from the pool
+    os.environ.update(MODEL_THREADS="1", ENSEMBLE_FANOUT="0")
+    try:
+        from api import main
+        _bundle = main.build_model_bundle(1, Path(models_dir), Path(bundle_dir))
+    except Exception as e:
+        _load_error = f"{type(e).__name__}: {e}"
+    _load_seconds = time.perf_counter() - started
+
+def _score_shard(frame, column_map, output_format, input_format):
+    from api import main
+    from api.tabular import chunk_writer
+    if _bundle is None:
+        raise RuntimeError(_load_error or "Model bundle not loaded")
+    timings = {}
+    scored = main.score_frame(frame, column_map, _bundle, timings)
+    # Encode here as well: done in the parent it would serialize the pool
+    started = time.perf_counter()
+    encoded = chunk_writer(output_format, input_format, column_map).encode(scored)
+    timings["encode"] = (time.perf_counter() - started) * 1000.0
+    return encoded, len(scored), timings, os.getpid(), _load_seconds
+
+def score_file(
+    input_path, output_path, workers=None, chunk_rows=10000, output_format=None,
+    models_dir=None, bundle_dir=None, max_pending=None
+):
+    """Score input_path into output_path and return a throughput/timing report"""
+    from api import main
+    from api.tabular import chunk_writer, file_format, read_chunks, resolve_columns
+
+    workers = workers or os.cpu_count() or 1
+    if models_dir is None:
+        models_dir, bundle_dir = main.MODELS_DIR, bundle_dir or main.MODEL_BUNDLE
+    bundle_dir = bundle_dir or Path(models_dir) / "bundle"
+    # Enough queued chunks to keep every worker busy while the parent reads and writes
+    max_pending = max_pending or workers * 2
+
+    input_format = file_format(str(input_path))
+    output_format = output_format or file_format(str(output_path))
+    writer = chunk_writer(output_format, input_format)
+    aliases = {attr: field.validation_alias for attr, field in main.SleepInput.model_fields.items()}
+
+    stage_ms = {"read": 0.0, "write": 0.0, **{stage: 0.0 for stage in WORKER_STAGES}}
+    load_seconds = {}
+    rows = 0
+    chunks_scored = 0
+    pending = deque()
+
+    def write_next(output):
+        nonlocal rows, chunks_scored
+        encoded, n_rows, timings, pid, worker_load_seconds = pending.popleft().result()
+        load_seconds[pid] = worker_load_seconds
+        for stage, ms in timings.items():
+            stage_ms[stage] += ms
+        started = time.perf_counter()
+        output.write(writer.write_encoded(encoded))
+        stage_ms["write"] += (time.perf_counter() - started) * 1000.0
+        rows += n_rows
+        chunks_scored += 1
+
+    started_at = time.perf_counter()
+    # A fresh interpreter per worker: api.main starts threads at import
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(str(models_dir), str(bundle_dir))
+    ) as executor, open(input_path, "rb") as source, open(output_path, "wb") as output:
+        chunks = read_chunks(source, input_format, chunk_rows)
+        column_map = None
+        while True:
+            started = time.perf_counter()
+            frame = next(chunks, None)
+            stage_ms["read"] += (time.perf_counter() - started) * 1000.0
+            if frame is None:
+                break
+            if column_map is None:
+                column_map = resolve_columns(frame.columns, aliases)
+            pending.append(executor.submit(_score_shard, frame, column_map, output_format, input_format))
+            # Results are written strictly in input order
+            while len(pending) >= max_pending or (pending and pending[0].done()):
+                write_next(output)
+        while pending:
+            write_next(output)
+        output.write(writer.close())
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "input": str(input_path),
+        "output": str(output_path),
+        "rows": rows,
+        "chunks": chunks_scored,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else None,
+        # Parent stages are wall time, worker stages are summed over all workers
+        "stage_ms": {stage: round(ms, 1) for stage, ms in stage_ms.items()},
+        "worker_load_seconds": {str(pid): round(seconds, 3) for pid, seconds in load_seconds.items()}
+    }
+
+def main():
+    """Score a CSV or Parquet file offline across all cores"""
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file with the model bundle, without HTTP")
+    parser.add_argument("input", help="Input .csv or .parquet file (training column names)")
+    parser.add_argument("output", help="Output .csv or .parquet file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Scoring processes")
+    parser.add_argument("--chunk-rows", type=int, default=10000, help="Rows per shard")
+    parser.add_argument("--models-dir", default=None, help="Directory with the artifact pickles (default: MODELS_DIR)")
+    parser.add_argument("--bundle-dir", default=None, help="Model bundle directory (default: MODEL_BUNDLE)")
+    parser.add_argument("--report", default=None, help="Also write the timing report to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        report = score_file(
+            args.input, args.output, workers=args.workers, chunk_rows=args.chunk_rows,
+            models_dir=args.models_dir, bundle_dir=args.bundle_dir
+        )
+    except (ImportError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+
+    print(f"Scored {report['rows']} rows in {report['chunks']} chunks with {report['workers']} workers")
+    print(f"  {report['seconds']}s, {report['rows_per_second']} rows/s")
+    for stage, ms in report["stage_ms"].items():
+        print(f"  {stage}: {ms} ms")
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
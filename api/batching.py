@@ -0,0 +1,157 @@
+import asyncio
+import contextvars
+import time
+
+# Histogram bucket upper bounds
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+QUEUE_DELAY_BUCKETS_MS = [0.1, 0.5, 1, 2, 5, 10, 25, 50, 100]
+
+class Histogram:
+    """Bucketed counter with count/sum/max tracking"""
+
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def snapshot(self):
+        labels = [f"<={bound}" for bound in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+class MicroBatcher:
+    """Coalesces concurrent single-item requests into vectorized batches
+
+    Pending items are collected until max_batch_size is reached or max_wait_ms
+    has elapsed since the first item of the batch arrived. process_batch is an
+    async callable taking a list of items and returning one result per item
+    (an Exception instance fails only that item). Up to max_concurrent_batches
+    batches are processed at once; while every slot is busy, new items keep
+    accumulating into the next batch.
+    """
+
+    def __init__(self, process_batch, max_batch_size=32, max_wait_ms=2.0, max_concurrent_batches=1):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_concurrent_batches = max_concurrent_batches
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_delays_ms = Histogram(QUEUE_DELAY_BUCKETS_MS)
+        self._queue = None
+        self._worker = None
+        self._loop = None
+        self._slots = None
+        self._in_flight = set()
+
+    def _ensure_worker(self):
+        """Start the batching task on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            # A fresh context: the task outlives the request that happened to start it
+            self._worker = loop.create_task(self._run(), context=contextvars.Context())
+
+    async def submit(self, item):
+        """Queue one item and wait for its result"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        """Wait for the first item, then gather more until the batch is full or the wait expires"""
+        batch = [await self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            # Collect the next batch only once a slot is free
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            started = time.perf_counter()
+            self.batch_sizes.observe(len(batch))
+            for _, _, enqueued in batch:
+                self.queue_delays_ms.observe((started - enqueued) * 1000.0)
+            task = asyncio.get_running_loop().create_task(self._process(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _process(self, batch):
+        """Run process_batch on one batch and resolve its futures"""
+        try:
+            items = [item for item, _, _ in batch]
+            try:
+                results = await self.process_batch(items)
+            except Exception as e:
+                results = [e] * len(batch)
+
+            for (_, future, _), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        """Stop the batching task and the batches in flight"""
+        tasks = list(self._in_flight)
+        if self._worker is not None and not self._worker.done():
+            tasks.append(self._worker)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    def stats(self):
+        """Batch size distribution and queueing delay added by batching"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_concurrent_batches": self.max_concurrent_batches,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_delay_ms": self.queue_delays_ms.snapshot()
+        }
@@ -0,0 +1,338 @@
+"""Offline evaluation of the model bundle on a labeled CSV/Parquet file
+
+Usage: python -m api.evaluation INPUT [--label-column NAME] [--report PATH]
+
+The file is read in chunks and scored in-process with the same
+preprocessing and ensemble as /predict. Each chunk only updates fixed-size
+NumPy accumulators (confusion matrix, per-member hit counts, calibration
+bins), so files of millions of rows are evaluated in one pass with memory
+bounded by the chunk size.
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Label columns tried in order when none is given (utils/synthetic_cohort.py
+# writes expected_disorder; the training data used 'Sleep Disorder')
+LABEL_COLUMNS = ["expected_disorder", "Sleep Disorder", "label"]
+CALIBRATION_BINS = 15
+# Gate confidences at which the cascade (CASCADE_ENABLED) is evaluated, besides CASCADE_THRESHOLD
+CASCADE_THRESHOLDS = (0.8, 0.9, 0.95, 0.99)
+
+class CalibrationStats:
+    """Reliability bins of the top-class confidence, plus log loss and Brier score sums"""
+
+    def __init__(self, n_bins=CALIBRATION_BINS):
+        self.n_bins = n_bins
+        self.count = np.zeros(n_bins, dtype=np.int64)
+        self.confidence = np.zeros(n_bins)
+        self.correct = np.zeros(n_bins)
+        self.log_loss = 0.0
+        self.brier = 0.0
+
+    def update(self, proba, y):
+        confidence = proba.max(axis=1)
+        correct = proba.argmax(axis=1) == y
+        bins = np.minimum((confidence * self.n_bins).astype(np.int64), self.n_bins - 1)
+        self.count += np.bincount(bins, minlength=self.n_bins)
+        self.confidence += np.bincount(bins, weights=confidence, minlength=self.n_bins)
+        self.correct += np.bincount(bins, weights=correct, minlength=self.n_bins)
+        p_true = proba[np.arange(len(y)), y]
+        self.log_loss += float(-np.log(np.clip(p_true, 1e-15, None)).sum())
+        # sum_k (p_k - 1[k == y])^2 = sum_k p_k^2 - 2 p_y + 1
+        self.brier += float((np.square(proba).sum(axis=1) - 2.0 * p_true + 1.0).sum())
+
+    def report(self):
+        n = int(self.count.sum())
+        if n == 0:
+            return None
+        filled = self.count > 0
+        gaps = np.abs(self.confidence[filled] - self.correct[filled]) / self.count[filled]
+        edges = np.linspace(0.0, 1.0, self.n_bins + 1)
+        return {
+            # Expected calibration error: bin gaps weighted by bin size
+            "ece": round(float(np.abs(self.confidence - self.correct).sum() / n), 6),
+            "mce": round(float(gaps.max()), 6),
+            "log_loss": round(self.log_loss / n, 6),
+            "brier": round(self.brier / n, 6),
+            "mean_confidence": round(float(self.confidence.sum() / n), 6),
+            "accuracy": round(float(self.correct.sum() / n), 6),
+            "reliability": [
+                {
+                    "bin": f"{edges[i]:.3f}-{edges[i + 1]:.3f}",
+                    "count": int(self.count[i]),
+                    "confidence": round(float(self.confidence[i] / self.count[i]), 6),
+                    "accuracy": round(float(self.correct[i] / self.count[i]), 6)
+                }
+                for i in np.flatnonzero(filled)
+            ]
+        }
+
+class CascadeStats:
+    """What the confidence-gated cascade would have returned, at several thresholds
+
+    Rows below a threshold get exactly the full ensemble's prediction, so
+    only early exits can change the outcome.
+    """
+
+    def __init__(self, member, temperature, thresholds):
+        self.member = member
+        self.temperature = temperature
+        self.thresholds = np.asarray(sorted(set(thresholds)), dtype=np.float64)
+        n = len(self.thresholds)
+        self.rows = 0
+        self.early_exits = np.zeros(n, dtype=np.int64)
+        self.early_correct = np.zeros(n, dtype=np.int64)
+        self.early_agree = np.zeros(n, dtype=np.int64)
+        self.full_correct = np.zeros(n, dtype=np.int64)
+
+    def update(self, gate_proba, full_predicted, y):
+        from api.main import apply_temperature_scaling_probs
+        gate_proba_cal = apply_temperature_scaling_probs(gate_proba, self.temperature)
+        confidence = gate_proba_cal.max(axis=1)
+        gate_correct = gate_proba_cal.argmax(axis=1) == y
+        gate_agree = gate_proba_cal.argmax(axis=1) == full_predicted
+        full_correct = full_predicted == y
+        # Rows x thresholds
+        early = confidence[:, None] >= self.thresholds[None, :]
+        self.rows += len(y)
+        self.early_exits += early.sum(axis=0)
+        self.early_correct += (early & gate_correct[:, None]).sum(axis=0)
+        self.early_agree += (early & gate_agree[:, None]).sum(axis=0)
+        self.full_correct += (~early & full_correct[:, None]).sum(axis=0)
+
+    def report(self, full_accuracy):
+        n = self.rows
+        accuracy = (self.early_correct + self.full_correct) / n if n else None
+        return {
+            "member": self.member,
+            "temperature": float(self.temperature),
+            "thresholds": [
+                {
+                    "threshold": float(threshold),
+                    "early_exit_rate": round(int(self.early_exits[i]) / n, 6),
+                    "accuracy": round(float(accuracy[i]), 6),
+                    "accuracy_delta": round(float(accuracy[i]) - full_accuracy, 6),
+                    # Share of rows with the same class as the full ensemble
+                    "agreement": round(int(self.early_agree[i] + n - self.early_exits[i]) / n, 6),
+                    "early_exit_accuracy": round(int(self.early_correct[i]) / int(self.early_exits[i]), 6) if self.early_exits[i] else None
+                }
+                for i, threshold in enumerate(self.thresholds)
+            ]
+        } if n else None
+
+class Evaluation:
+    """Metrics accumulated over chunks of (member probabilities, true class index)"""
+
+    def __init__(self, classes, members, T_rf, T_ens, n_bins=CALIBRATION_BINS, cascade=None):
+        self.classes = list(classes)
+        self.members = list(members)
+        self.T_rf = T_rf
+        self.T_ens = T_ens
+        self.cascade = cascade
+        k = len(self.classes)
+        # Rows are true classes, columns predicted classes (calibrated ensemble)
+        self.confusion = np.zeros((k, k), dtype=np.int64)
+        self.member_correct = dict.fromkeys(self.members + ["ensemble"], 0)
+        self.calibration = {
+            "rf": {"raw": CalibrationStats(n_bins), "calibrated": CalibrationStats(n_bins)},
+            "ensemble": {"raw": CalibrationStats(n_bins), "calibrated": CalibrationStats(n_bins)}
+        }
+
+    def update(self, member_probas, y):
+        from api.main import apply_temperature_scaling_probs
+        probas = dict(zip(self.members, member_probas))
+        for name, proba in probas.items():
+            self.member_correct[name] += int((proba.argmax(axis=1) == y).sum())
+        ens_raw = sum(member_probas) / len(member_probas)
+        rf_cal = apply_temperature_scaling_probs(probas["rf"], self.T_rf)
+        ens_cal = apply_temperature_scaling_probs(ens_raw, self.T_ens)
+        predicted = ens_cal.argmax(axis=1)
+        self.member_correct["ensemble"] += int((predicted == y).sum())
+        k = len(self.classes)
+        self.confusion += np.bincount(y * k + predicted, minlength=k * k).reshape(k, k)
+        self.calibration["rf"]["raw"].update(probas["rf"], y)
+        self.calibration["rf"]["calibrated"].update(rf_cal, y)
+        self.calibration["ensemble"]["raw"].update(ens_raw, y)
+        self.calibration["ensemble"]["calibrated"].update(ens_cal, y)
+        if self.cascade is not None:
+            self.cascade.update(probas[self.cascade.member], predicted, y)
+
+    def report(self):
+        n = int(self.confusion.sum())
+        accuracy = float(np.trace(self.confusion) / n) if n else None
+        true_positives = np.diag(self.confusion)
+        support = self.confusion.sum(axis=1)
+        predicted = self.confusion.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = np.where(predicted > 0, true_positives / predicted, 0.0)
+            recall = np.where(support > 0, true_positives / support, 0.0)
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        return {
+            "evaluated": n,
+            "accuracy": round(accuracy, 6) if n else None,
+            "classes": self.classes,
+            "confusion_matrix": self.confusion.tolist(),
+            "per_class": {
+                name: {
+                    "precision": round(float(precision[i]), 6),
+                    "recall": round(float(recall[i]), 6),
+                    "f1": round(float(f1[i]), 6),
+                    "support": int(support[i]),
+                    "predicted": int(predicted[i])
+                }
+                for i, name in enumerate(self.classes)
+            },
+            "macro_f1": round(float(f1.mean()), 6),
+            "member_accuracy": {
+                name: round(correct / n, 6) if n else None for name, correct in self.member_correct.items()
+            },
+            "calibration": {
+                "rf": {"temperature": float(self.T_rf), **{
+                    stage: stats.report() for stage, stats in self.calibration["rf"].items()
+                }},
+                "ensemble": {"temperature": float(self.T_ens), **{
+                    stage: stats.report() for stage, stats in self.calibration["ensemble"].items()
+                }}
+            },
+            "cascade": self.cascade.report(accuracy) if self.cascade is not None else None
+        }
+
+def label_indices(labels, classes):
+    """Class index of each label, -1 for missing or unknown labels"""
+    return pd.Categorical(labels.astype("string"), categories=list(classes)).codes.astype(np.int64)
+
+def evaluate_file(
+    input_path, label_column=None, chunk_rows=50000, models_dir=None, bundle_dir=None, n_bins=CALIBRATION_BINS,
+    cascade_member=None, cascade_thresholds=CASCADE_THRESHOLDS
+):
+    """Evaluate the bundle on a labeled CSV or Parquet file and return the report
+
+    The cascade section compares the confidence-gated cascade (gate
+    cascade_member, default CASCADE_MEMBER) with the full ensemble at each of
+    cascade_thresholds and CASCADE_THRESHOLD.
+    """
+    from api import main
+    from api.artifacts import ENSEMBLE_MEMBERS
+    from api.tabular import file_format, read_chunks, resolve_columns, validate_frame
+
+    if models_dir is None:
+        models_dir, bundle_dir = main.MODELS_DIR, bundle_dir or main.MODEL_BUNDLE
+    bundle_dir = bundle_dir or Path(models_dir) / "bundle"
+    started_at = time.perf_counter()
+    bundle = main.build_model_bundle(1, Path(models_dir), Path(bundle_dir))
+    load_seconds = time.perf_counter() - started_at
+
+    input_format = file_format(str(input_path))
+    aliases = {attr: field.validation_alias for attr, field in main.SleepInput.model_fields.items()}
+    classes = bundle.target_encoder.classes_
+    cascade_member = cascade_member or main.CASCADE_MEMBER
+    cascade = CascadeStats(
+        cascade_member, main.cascade_temperature(bundle, cascade_member), [*cascade_thresholds, main.CASCADE_THRESHOLD]
+    )
+    evaluation = Evaluation(classes, [name for name, _, _ in ENSEMBLE_MEMBERS], bundle.T_rf, bundle.T_ens, n_bins, cascade)
+    stage_ms = {"read": 0.0, "preprocess": 0.0, "predict": 0.0, "metrics": 0.0}
+    rows = invalid = unlabeled = 0
+    column_map = None
+
+    started_at = time.perf_counter()
+    with open(input_path, "rb") as source:
+        chunks = read_chunks(source, input_format, chunk_rows)
+        while True:
+            started = time.perf_counter()
+            frame = next(chunks, None)
+            stage_ms["read"] += (time.perf_counter() - started) * 1000.0
+            if frame is None:
+                break
+            if column_map is None:
+                column_map = resolve_columns(frame.columns, aliases)
+                label_column = label_column or next((name for name in LABEL_COLUMNS if name in frame.columns), None)
+                if label_column not in frame.columns:
+                    raise ValueError(f"No label column (tried {[label_column] if label_column else LABEL_COLUMNS})")
+            rows += len(frame)
+
+            started = time.perf_counter()
+            columns, valid, _ = validate_frame(frame, column_map)
+            y = label_indices(frame[label_column], classes)
+            invalid += int((~valid).sum())
+            unlabeled += int((valid & (y < 0)).sum())
+            keep = y[valid] >= 0
+            X = bundle.preprocessing_plan.transform_columns(columns, n_rows=int(valid.sum()))[keep]
+            stage_ms["preprocess"] += (time.perf_counter() - started) * 1000.0
+            if not len(X):
+                continue
+
+            started = time.perf_counter()
+            member_probas = main.predict_member_probas(X, bundle)
+            stage_ms["predict"] += (time.perf_counter() - started) * 1000.0
+            started = time.perf_counter()
+            evaluation.update(member_probas, y[valid][keep])
+            stage_ms["metrics"] += (time.perf_counter() - started) * 1000.0
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "input": str(input_path),
+        "models": str(models_dir),
+        "label_column": label_column,
+        "rows": rows,
+        "invalid_rows": invalid,
+        "unlabeled_rows": unlabeled,
+        **evaluation.report(),
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else None,
+        "load_seconds": round(load_seconds, 3),
+        "stage_ms": {stage: round(ms, 1) for stage, ms in stage_ms.items()}
+    }
+
+def main():
+    """Evaluate the model bundle on a labeled file without HTTP"""
+    parser = argparse.ArgumentParser(description="Confusion matrix, per-class metrics, calibration and per-member accuracy on a labeled CSV/Parquet file")
+    parser.add_argument("input", help="Labeled .csv or .parquet file (for example from utils/synthetic_cohort.py)")
+    parser.add_argument("--label-column", default=None, help=f"Column with the true class (default: first of {LABEL_COLUMNS})")
+    parser.add_argument("--chunk-rows", type=int, default=50000, help="Rows scored at a time")
+    parser.add_argument("--bins", type=int, default=CALIBRATION_BINS, help="Calibration bins")
+    parser.add_argument("--cascade-member", default=None, help="Gate member of the cascade (default: CASCADE_MEMBER)")
+    parser.add_argument("--cascade-thresholds", type=float, nargs="+", default=list(CASCADE_THRESHOLDS),
+                        help="Gate confidences to evaluate the cascade at (CASCADE_THRESHOLD is always included)")
+    parser.add_argument("--models-dir", default=None, help="Directory with the artifact pickles (default: MODELS_DIR)")
+    parser.add_argument("--bundle-dir", default=None, help="Model bundle directory (default: MODEL_BUNDLE)")
+    parser.add_argument("--report", default=None, help="Write the JSON report to this file (default: stdout)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        report = evaluate_file(
+            args.input, args.label_column, chunk_rows=args.chunk_rows,
+            models_dir=args.models_dir, bundle_dir=args.bundle_dir, n_bins=args.bins,
+            cascade_member=args.cascade_member, cascade_thresholds=args.cascade_thresholds
+        )
+    except (ImportError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2))
+        calibration = report["calibration"]
+        print(f"Evaluated {report['evaluated']} of {report['rows']} rows in {report['seconds']}s ({report['rows_per_second']} rows/s)")
+        print(f"  accuracy {report['accuracy']}, macro F1 {report['macro_f1']}")
+        print(f"  member accuracy: {report['member_accuracy']}")
+        for name in ("rf", "ensemble"):
+            raw, calibrated = calibration[name]["raw"], calibration[name]["calibrated"]
+            if raw is not None:
+                print(f"  {name} ECE {raw['ece']} -> {calibrated['ece']} (T={calibration[name]['temperature']:.3f})")
+        if report["cascade"] is not None:
+            print(f"  cascade gated by {report['cascade']['member']}:")
+            for row in report["cascade"]["thresholds"]:
+                print(f"    >= {row['threshold']}: early exit {row['early_exit_rate']:.1%}, accuracy delta {row['accuracy_delta']:+.4f}")
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""Asynchronous batch scoring jobs backed by a local SQLite store
+
+A job is an input file (an upload, or inline records saved as CSV) scored
+into an output file with the /predict/upload pipeline. Job metadata lives in
+SQLite and inputs/outputs next to it, so queued and finished jobs survive a
+restart. Jobs run in child processes at a high nice value (like the shadow
+bundle) so they only get the CPU time interactive requests leave over.
+
+Each server process runs a dispatcher that claims queued jobs. A claim is a
+lease renewed on every dispatcher poll: jobs whose owner stopped renewing
+(crash, restart, redeploy) go back to the queue.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import active_children, get_context
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ("queued", "running", "succeeded", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    source TEXT NOT NULL,
+    input_format TEXT NOT NULL,
+    output_format TEXT NOT NULL,
+    rows_total INTEGER,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_expires REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT
+)
+"""
+
+class JobStore:
+    """Job metadata in SQLite, shared by every server and job process on the machine"""
+
+    def __init__(self, jobs_dir):
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.jobs_dir / "jobs.sqlite3"
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit; explicit BEGIN IMMEDIATE where a read-then-write must be atomic
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def input_path(self, job):
+        return self.jobs_dir / f"{job['id']}.input.{job['input_format']}"
+
+    def output_path(self, job):
+        return self.jobs_dir / f"{job['id']}.output.{job['output_format']}"
+
+    def new_id(self):
+        return uuid.uuid4().hex
+
+    def create(self, job_id, source, input_format, output_format, rows_total=None):
+        """Queue a job whose input file is already in place"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, source, input_format, output_format, rows_total, created_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, source, input_format, output_format, rows_total, time.time())
+            )
+        return self.get(job_id)
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def claim(self, owner, lease_seconds):
+        """Mark the oldest queued job as running under owner and return it (None when the queue is empty)"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, lease_expires = ?, started_at = ?, "
+                "rows_done = 0, attempts = attempts + 1, error = NULL WHERE id = ?",
+                (owner, now + lease_seconds, now, row["id"])
+            )
+            conn.execute("COMMIT")
+        return self.get(row["id"])
+
+    def renew(self, owner, lease_seconds):
+        """Extend the lease on every job owner is running"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE owner = ? AND status = 'running'",
+                (time.time() + lease_seconds, owner)
+            )
+
+    def requeue_expired(self, max_attempts):
+        """Put running jobs whose lease ran out back in the queue, or fail them after max_attempts; returns their ids"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, attempts FROM jobs WHERE status = 'running' AND lease_expires < ?", (now,)
+            ).fetchall()
+            for row in rows:
+                if row["attempts"] >= max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, owner = NULL, "
+                        "lease_expires = NULL WHERE id = ?",
+                        (f"Gave up after {row['attempts']} attempts", now, row["id"])
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'queued', owner = NULL, lease_expires = NULL, rows_done = 0 WHERE id = ?",
+                        (row["id"],)
+                    )
+            conn.execute("COMMIT")
+        return [row["id"] for row in rows]
+
+    def release(self, owner):
+        """Requeue every job owner is running (it is shutting down)"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, lease_expires = NULL, rows_done = 0, attempts = attempts - 1 "
+                "WHERE owner = ? AND status = 'running'",
+                (owner,)
+            )
+        return cursor.rowcount
+
+    def progress(self, job_id, owner, rows_done, rows_total=None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET rows_done = ?, rows_total = COALESCE(?, rows_total) "
+                "WHERE id = ? AND owner = ? AND status = 'running'",
+                (rows_done, rows_total, job_id, owner)
+            )
+
+    def finish(self, job_id, owner, status, rows_done=None, error=None):
+        """Record the outcome of a job; ignored when the job was requeued and claimed by someone else meanwhile"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, rows_done = COALESCE(?, rows_done), error = ?, finished_at = ?, "
+                "owner = NULL, lease_expires = NULL WHERE id = ? AND owner = ? AND status = 'running'",
+                (status, rows_done, error, time.time(), job_id, owner)
+            )
+        return cursor.rowcount == 1
+
+    def counts(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in STATUSES}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+def write_records(path, records, aliases):
+    """Save inline job records as the job's CSV input; raises ValueError when required columns are missing"""
+    from api.tabular import resolve_columns
+    frame = pd.DataFrame.from_records(records)
+    resolve_columns(frame.columns, aliases)
+    frame.to_csv(path, index=False)
+
+def count_rows(path, fmt):
+    """Number of data rows of a job input (CSV: line count, so quoted newlines make it an estimate)"""
+    if fmt == "parquet":
+        from api.tabular import import_pyarrow
+        _, parquet = import_pyarrow()
+        return parquet.ParquetFile(path).metadata.num_rows
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        while block := f.read(1 << 20):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    return max(0, lines + (last != b"\n") - 1)
+
+# State of a job process
+_bundle = None
+_fingerprint = None
+_server_pid = None
+
+def _init_worker(niceness, pids):
+    global _server_pid
+    _server_pid = os.getppid()
+    # Lets the server stop this process on shutdown
+    pids.put(os.getpid())
+    os.nice(niceness)
+
+def _current_bundle(models_dir, bundle_dir):
+    """The bundle the server loads from models_dir, reloaded when its files change"""
+    global _bundle, _fingerprint
+    from api import main
+    from api.artifacts import source_fingerprint
+    fingerprint = source_fingerprint(models_dir, bundle_dir)
+    if _bundle is None or fingerprint != _fingerprint:
+        _bundle = main.build_model_bundle(1, models_dir, bundle_dir)
+        _fingerprint = fingerprint
+    return _bundle
+
+def _run_job(jobs_dir, job_id, owner, models_dir, bundle_dir, chunk_rows):
+    """Score one claimed job into its output file (runs in a job process)"""
+    from api import main
+    from api.tabular import chunk_writer, read_chunks, resolve_columns
+
+    store = JobStore(jobs_dir)
+    job = store.get(job_id)
+    started = time.perf_counter()
+    try:
+        bundle = _current_bundle(Path(models_dir), Path(bundle_dir))
+        input_path = store.input_path(job)
+        output_path = store.output_path(job)
+        rows_total = count_rows(input_path, job["input_format"])
+        store.progress(job_id, owner, 0, rows_total)
+
+        aliases = {attr: field.validation_alias for attr, field in main.SleepInput.model_fields.items()}
+        # Written under a temporary name so a result file is always complete
+        partial_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.part")
+        rows_done = 0
+        column_map = None
+        with open(input_path, "rb") as source, open(partial_path, "wb") as output:
+            for frame in read_chunks(source, job["input_format"], chunk_rows):
+                if os.getppid() != _server_pid:
+                    # The server died: stop, its lease expires and the job is requeued.
+                    # The pool is gone with it, so leave the process as well.
+                    logger.warning(f"Job {job_id}: server process gone, stopping")
+                    partial_path.unlink(missing_ok=True)
+                    os._exit(1)
+                if column_map is None:
+                    column_map = resolve_columns(frame.columns, aliases)
+                    writer = chunk_writer(job["output_format"], job["input_format"], column_map)
+                output.write(writer.write(main.score_frame(frame, column_map, bundle)))
+                rows_done += len(frame)
+                store.progress(job_id, owner, rows_done)
+            if column_map is None:
+                writer = chunk_writer(job["output_format"], job["input_format"])
+            output.write(writer.close())
+        os.replace(partial_path, output_path)
+    except Exception as e:
+        store.finish(job_id, owner, "failed", error=f"{type(e).__name__}: {e}")
+        logger.error(f"Job {job_id} failed: {e}")
+        return
+    store.finish(job_id, owner, "succeeded", rows_done=rows_done)
+    logger.info(f"Job {job_id}: scored {rows_done} rows in {time.perf_counter() - started:.1f}s")
+
+class JobRunner:
+    """Claims queued jobs and runs them in a pool of low-priority child processes"""
+
+    def __init__(
+        self, store, models_dir, bundle_dir, workers=1, niceness=19,
+        chunk_rows=10000, poll_interval=1.0, lease_seconds=30.0, max_attempts=3
+    ):
+        self.store = store
+        self.models_dir = str(models_dir)
+        self.bundle_dir = str(bundle_dir)
+        self.workers = workers
+        self.niceness = niceness
+        self.chunk_rows = chunk_rows
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.running = set()
+        self._executor = None
+        self._pids = None
+        self._worker_pids = set()
+        self._wakeup = None
+        self._task = None
+
+    def _start_executor(self):
+        # A fresh interpreter: forking a process running threads is unsafe
+        context = get_context("spawn")
+        self._pids = context.SimpleQueue()
+        self._worker_pids = set()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.niceness, self._pids)
+        )
+
+    def start(self):
+        self._start_executor()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._dispatch())
+
+    def notify(self):
+        """Wake the dispatcher up after a job was queued"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _store_call(self, method, *args):
+        # SQLite calls can wait up to the connection timeout on a locked
+        # database: keep them off the event loop serving /predict
+        return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+
+    async def _dispatch(self):
+        while True:
+            try:
+                await self._store_call(self.store.renew, self.owner, self.lease_seconds)
+                for job_id in await self._store_call(self.store.requeue_expired, self.max_attempts):
+                    logger.warning(f"Job {job_id} lost its worker, requeued")
+                while len(self.running) < self.workers:
+                    job = await self._store_call(self.store.claim, self.owner, self.lease_seconds)
+                    if job is None:
+                        break
+                    task = asyncio.create_task(self._run(job["id"]))
+                    self.running.add(task)
+                    task.add_done_callback(self._job_done)
+            except Exception as e:
+                logger.error(f"Job dispatcher error: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _job_done(self, task):
+        self.running.discard(task)
+        self.notify()
+
+    async def _run(self, job_id):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(
+                self._executor, _run_job, str(self.store.jobs_dir), job_id, self.owner,
+                self.models_dir, self.bundle_dir, self.chunk_rows
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The job process itself died (killed, out of memory)
+            await self._store_call(
+                self.store.finish, job_id, self.owner, "failed", None, f"Job process failed: {type(e).__name__}: {e}"
+            )
+            logger.error(f"Job {job_id} failed: {e}")
+            if isinstance(e, BrokenProcessPool):
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._start_executor()
+
+    def close(self):
+        """Stop the job processes and hand their jobs back to the queue"""
+        if self._task is not None:
+            self._task.cancel()
+        if self._executor is not None:
+            # Jobs can run for minutes: stop them rather than wait (the
+            # executor would otherwise be joined at interpreter exit)
+            while not self._pids.empty():
+                self._worker_pids.add(self._pids.get())
+            # Only live children of this process, so a reused pid is never hit
+            for process in active_children():
+                if process.pid in self._worker_pids:
+                    process.terminate()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        released = self.store.release(self.owner)
+        if released:
+            logger.info(f"Requeued {released} running jobs")
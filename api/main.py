@@ -1,11 +1,40 @@
+import asyncio
+import functools
 import joblib
 import numpy as np
 import os
+import secrets
+import shutil
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime, timezone
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, File, Header, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, model_validator
 import logging
+from api.preprocessing import PreprocessingPlan
+from api.batching import Histogram, MicroBatcher
+from api.tree_engine import compile_for_serving, compile_verified
+from api.xgb_serving import XGBoostInplacePredictor
+from api.cache import PredictionCache, canonical_key
+from api.artifacts import ENSEMBLE_MEMBERS, load_bundle, load_pickles, read_manifest, source_fingerprint, stale_sources
+from api.jobs import JobRunner, JobStore, write_records
+from api.memory import process_memory
+from api.metrics import Counter as MetricCounter, HTTPMetricsMiddleware, MetricsRegistry
+from api.profiling import ServerTimingMiddleware, in_context, profile_call, record_timing
+from api.model_bundle import ModelBundle
+from api.registry import ROLES, ModelRegistry
+from api.shadow import ShadowScorer
+from api.streaming import RequestStreamingResponse, iter_ndjson
+from api.tabular import MEDIA_TYPES, chunk_writer, file_format, read_chunks, resolve_columns, validate_frame
+from starlette.requests import ClientDisconnect
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -14,6 +43,82 @@ logger = logging.getLogger(__name__)
 # Get the directory of this script
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Model artifact locations; a bundle built by utils/build_model_bundle.py is
+# used instead of the individual pickles when present and built from them.
+# BUNDLE_VERIFY=1 checks the sha256 of every bundle file on each load, which
+# reads every byte and so gives up the fast memory-mapped start.
+MODELS_DIR = Path(os.getenv("MODELS_DIR", BASE_DIR / "models"))
+MODEL_BUNDLE = Path(os.getenv("MODEL_BUNDLE", MODELS_DIR / "bundle"))
+BUNDLE_VERIFY = os.getenv("BUNDLE_VERIFY", "0") == "1"
+# Threads reading artifact files concurrently at startup
+ARTIFACT_LOAD_THREADS = int(os.getenv("ARTIFACT_LOAD_THREADS", 4))
+# Seconds between checks of the model files for changes; changed files are
+# hot-reloaded (0 disables the watcher)
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", 5))
+# Model registry: a canary bundle serving CANARY_TRAFFIC_PERCENT of /predict
+# requests and a shadow bundle scored off the request path for comparison
+CANARY_MODELS_DIR = os.getenv("CANARY_MODELS_DIR")
+CANARY_TRAFFIC_PERCENT = float(os.getenv("CANARY_TRAFFIC_PERCENT", 0))
+SHADOW_MODELS_DIR = os.getenv("SHADOW_MODELS_DIR")
+# Shadow predictions allowed to wait at once; further ones are dropped
+SHADOW_MAX_PENDING = int(os.getenv("SHADOW_MAX_PENDING", 100))
+# Nice value of the process scoring the shadow bundle
+SHADOW_NICENESS = int(os.getenv("SHADOW_NICENESS", 19))
+# Token expected in the X-Admin-Token header of /admin endpoints (disabled when unset)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Prometheus metrics at /metrics; METRICS_ENABLED=0 turns the instrumentation off
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Server-Timing response header with the stages of each request. /predict?profile=1
+# runs the prediction under cProfile and returns the top PROFILE_TOP_FUNCTIONS
+# functions; it needs the admin token unless PROFILE_REQUESTS=1.
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0") == "1"
+PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", 25))
+
+metrics_registry = MetricsRegistry()
+http_requests = metrics_registry.counter(
+    "http_requests_total", "HTTP requests by handler and status code", ("handler", "status")
+)
+http_errors = metrics_registry.counter(
+    "http_request_errors_total", "HTTP error responses by handler and type (4xx client, 5xx server)", ("handler", "type")
+)
+http_duration = metrics_registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by handler (streamed responses until the last byte)", ("handler",)
+)
+http_in_flight = metrics_registry.gauge("http_requests_in_flight", "HTTP requests being handled")
+stage_duration = metrics_registry.histogram(
+    "prediction_stage_duration_seconds", "Latency of each prediction stage per call, by rows per call", ("stage", "rows")
+)
+predictions_served = metrics_registry.counter(
+    "predictions_total", "Predictions returned by handler and predicted class", ("handler", "predicted_class")
+)
+inference_in_flight = metrics_registry.gauge("inference_in_flight", "Inference calls queued or running on the inference threads")
+# Sampled when /metrics is scraped
+models_ready = metrics_registry.gauge("models_ready", "1 once a primary bundle serves predictions")
+model_version = metrics_registry.gauge("model_bundle_version", "Version of the bundle loaded in each role", ("role",))
+shadow_pending = metrics_registry.gauge("shadow_predictions_pending", "Shadow predictions waiting for the shadow process")
+batch_jobs = metrics_registry.gauge("batch_jobs", "Batch jobs in the job store by status", ("status",))
+cascade_rows = metrics_registry.counter(
+    "cascade_rows_total", "Rows scored by the cascade: early_exit (gate member only) or full ensemble", ("outcome",)
+)
+# Same counts for /stats, kept when METRICS_ENABLED=0 (not exported)
+cascade_counts = MetricCounter("cascade_rows", "Rows scored by the cascade", ("outcome",))
+
+def rows_label(n_rows):
+    """Bounded label for the number of rows in one call"""
+    if n_rows == 1:
+        return "1"
+    return "<=32" if n_rows <= 32 else "<=1024" if n_rows <= 1024 else ">1024"
+
+def observe_stage(stage, started, n_rows=1):
+    """Record the time since started (a perf_counter value) for a prediction stage"""
+    elapsed = time.perf_counter() - started
+    if METRICS_ENABLED:
+        stage_duration.observe(elapsed, stage, rows_label(n_rows))
+    record_timing(stage, elapsed)
+
 # Define the input data model
 class SleepInput(BaseModel):
     Age: int
@@ -30,6 +135,15 @@ class SleepInput(BaseModel):
     Diastolic_BP: int = Field(validation_alias="Diastolic BP")
     
     model_config = {"populate_by_name": True}
+    
+    @model_validator(mode="wrap")
+    @classmethod
+    def time_validation(cls, data, handler):
+        started = time.perf_counter()
+        try:
+            return handler(data)
+        finally:
+            observe_stage("validation", started)
 
 # Define the response model
 class PredictionResponse(BaseModel):
@@ -38,6 +152,129 @@ class PredictionResponse(BaseModel):
     rf_confidence: float
     confidence_note: str
 
+# Define the batch request/response models
+class BatchPredictionRequest(BaseModel):
+    # Records are validated one by one so a bad row does not fail the whole batch
+    records: List[Dict[str, Any]]
+
+class BatchPredictionItem(BaseModel):
+    index: int
+    prediction: Optional[PredictionResponse] = None
+    error: Optional[str] = None
+
+class BatchPredictionResponse(BaseModel):
+    results: List[BatchPredictionItem]
+    succeeded: int
+    failed: int
+
+# Define the job status model
+class JobStatus(BaseModel):
+    job_id: str
+    status: str
+    source: str
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    rows_total: Optional[int] = None
+    rows_done: int
+    progress: Optional[float] = None
+    attempts: int
+    error: Optional[str] = None
+    result_url: Optional[str] = None
+
+# Upper bound on the number of records accepted by /predict/batch
+BATCH_MAX_RECORDS = int(os.getenv("BATCH_MAX_RECORDS", 50000))
+
+# /predict/stream scores this many records per vectorized chunk and rejects
+# NDJSON lines longer than STREAM_MAX_LINE_BYTES
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", 1024))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", 65536))
+
+# /predict/upload reads and scores files in chunks of this many rows
+UPLOAD_CHUNK_ROWS = int(os.getenv("UPLOAD_CHUNK_ROWS", 10000))
+
+# Asynchronous batch jobs (/jobs): metadata, inputs and results are kept in
+# JOBS_DIR. Each server process runs up to JOB_WORKERS jobs in child processes
+# at JOB_NICENESS; a job whose server stopped renewing its lease for
+# JOB_LEASE_SECONDS is requeued (at most JOB_MAX_ATTEMPTS runs)
+JOBS_DIR = Path(os.getenv("JOBS_DIR", BASE_DIR / "jobs"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 1))
+JOB_NICENESS = int(os.getenv("JOB_NICENESS", 19))
+JOB_CHUNK_ROWS = int(os.getenv("JOB_CHUNK_ROWS", 10000))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 1.0))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 30))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_MAX_RECORDS = int(os.getenv("JOB_MAX_RECORDS", 1000000))
+
+# Micro-batching of concurrent /predict calls
+PREDICT_BATCHING = os.getenv("PREDICT_BATCHING", "0") == "1"
+PREDICT_BATCH_MAX_SIZE = int(os.getenv("PREDICT_BATCH_MAX_SIZE", 32))
+PREDICT_BATCH_MAX_WAIT_MS = float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", 2.0))
+
+# Size of the thread pool running preprocessing and model evaluation
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", 2))
+
+# Evaluate the four ensemble members concurrently within one prediction.
+# By default the cores are split across the uvicorn workers (WEB_CONCURRENCY)
+# so fan-out threads do not oversubscribe the machine.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+ENSEMBLE_FANOUT = os.getenv("ENSEMBLE_FANOUT", "0") == "1"
+ENSEMBLE_THREADS = int(os.getenv("ENSEMBLE_THREADS", max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)))
+# Threads used internally by each member (RF n_jobs, XGBoost nthread). When
+# unset the members keep their pickled settings, unless ENSEMBLE_FANOUT is on:
+# then each member is pinned to 1 so concurrent members do not oversubscribe.
+MODEL_THREADS = int(os.environ["MODEL_THREADS"]) if os.getenv("MODEL_THREADS") else (1 if ENSEMBLE_FANOUT else None)
+
+# Tree inference engine: "stock" (sklearn/xgboost predict_proba), "native"
+# (flattened NumPy trees, used up to NATIVE_MAX_ROWS rows per batch; measured
+# at load time when unset) or "native-only" (native trees for every batch
+# size; estimators are not unpickled when loading a bundle). Only
+# native-only serves entirely from the bundle's memory-mapped arrays, shared
+# by every worker; unpickled estimators live in each process's own heap.
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "stock")
+NATIVE_MAX_ROWS = int(os.environ["NATIVE_MAX_ROWS"]) if os.getenv("NATIVE_MAX_ROWS") else None
+
+# Serve XGBoost through Booster.inplace_predict instead of the sklearn wrapper
+XGB_INPLACE_PREDICT = os.getenv("XGB_INPLACE_PREDICT", "1") == "1"
+
+# In-process cache of /predict responses (PREDICTION_CACHE_SIZE=0 disables it).
+# CACHE_SLEEP_DURATION_DECIMALS optionally rounds Sleep_Duration before
+# scoring so near-identical submissions share an entry.
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", 10000))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", 300))
+CACHE_SLEEP_DURATION_DECIMALS = int(os.environ["CACHE_SLEEP_DURATION_DECIMALS"]) if os.getenv("CACHE_SLEEP_DURATION_DECIMALS") else None
+
+# Confidence-gated cascade: CASCADE_MEMBER is scored first and temperature
+# scaled (T_rf for rf, otherwise CASCADE_TEMPERATURE); rows whose calibrated
+# confidence reaches CASCADE_THRESHOLD skip the other members. python -m
+# api.evaluation reports the early-exit rate and accuracy cost per threshold.
+# The gate only saves time if it is cheaper than the rest of the ensemble:
+# rf is the default because it is the one member with its own calibrated
+# temperature, but it is often the slowest. Set CASCADE_MEMBER from the
+# measured per-member timings (the predict_proba_<member>[n] cases of
+# utils/benchmark.py, or the predict_proba_<member> stages in /metrics) and
+# give a non-rf gate a CASCADE_TEMPERATURE.
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "0") == "1"
+CASCADE_MEMBER = os.getenv("CASCADE_MEMBER", "rf")
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", 0.95))
+CASCADE_TEMPERATURE = float(os.environ["CASCADE_TEMPERATURE"]) if os.getenv("CASCADE_TEMPERATURE") else None
+if CASCADE_MEMBER not in [name for name, _, _ in ENSEMBLE_MEMBERS]:
+    raise ValueError(f"Unknown CASCADE_MEMBER: {CASCADE_MEMBER}")
+
+# Distilled student model (models/student_model.pkl, see utils/distill_student.py):
+# /predict?mode=student and /predict/batch?mode=student score with it instead
+# of the ensemble; PREDICTION_MODE sets the default mode. With
+# PREDICTION_MODE=student a primary or canary bundle without a student fails
+# to load, so the server does not report ready while rejecting every request.
+PREDICTION_MODES = ("ensemble", "student")
+PREDICTION_MODE = os.getenv("PREDICTION_MODE", "ensemble")
+if PREDICTION_MODE not in PREDICTION_MODES:
+    raise ValueError(f"Unknown PREDICTION_MODE: {PREDICTION_MODE}")
+
+CONFIDENCE_NOTE = "Ensemble confidence is temperature-scaled and should be used as primary."
+CASCADE_NOTE = "Early exit: both confidences are the temperature-scaled {member} model's; the other ensemble members were not run."
+STUDENT_NOTE = "Student model: both confidences are the distilled student's approximation of the temperature-scaled ensemble."
+
 # Initialize FastAPI app
 app = FastAPI(title="Sleep Disorder Prediction API", version="1.0.0")
 
@@ -51,19 +288,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global variables for model artifacts
-rf_model = None
-xgb_model = None
-gb_model = None
-hybrid_stack_model = None
-scaler = None
-encoders = None
-target_encoder = None
-cat_cols = None
-num_cols = None
-feature_order = None
-T_rf = None
-T_ens = None
+if SERVER_TIMING:
+    app.add_middleware(ServerTimingMiddleware, timing_allow_origin=frontend_url)
+
+if METRICS_ENABLED:
+    app.add_middleware(
+        HTTPMetricsMiddleware,
+        requests=http_requests,
+        errors=http_errors,
+        duration=http_duration,
+        in_flight=http_in_flight
+    )
 
 def softmax_logits(z):
     """Numerically stable softmax along the last axis"""
@@ -86,215 +321,1208 @@ def apply_temperature_scaling_probs(probs, T):
     scaled_probs = softmax_logits(scaled_logits)
     return scaled_probs
 
-# Global variables for model artifacts
-rf_model = None
-xgb_model = None
-gb_model = None
-hybrid_stack_model = None
-scaler = None
-encoders = None
-target_encoder = None
-cat_cols = None
-num_cols = None
-feature_order = None
-T_rf = None
-T_ens = None
-
-app.state.models_loaded = False
+# Loaded bundles by role. Reloads rebind a role to a fully warmed bundle;
+# a bundle itself is never modified.
+registry = ModelRegistry(canary_percent=CANARY_TRAFFIC_PERCENT)
+# Version of the next bundle loaded; part of the cache key
+next_bundle_version = 1
+
+# Readiness: set once a bundle is loaded and its canary prediction passed.
+# loading holds the roles whose bundle is being built.
+app.state.loading = set()
+app.state.ready = False
+app.state.load_error = None
+
+def configure_model_threads(model, n_threads):
+    """Set the n_jobs parameter of a model (and its sub-estimators) if it has one"""
+    if not hasattr(model, "get_params"):
+        return
+    params = {name: n_threads for name in model.get_params() if name == "n_jobs" or name.endswith("__n_jobs")}
+    if params:
+        model.set_params(**params)
+
+def read_model_artifacts(models_dir, bundle_dir):
+    """Read every artifact from the bundle or the individual pickles (blocking)"""
+    # Prefer the consolidated bundle when one has been built from the current pickles
+    if (bundle_dir / "manifest.json").exists():
+        stale = stale_sources(read_manifest(bundle_dir), models_dir)
+        if stale:
+            logger.warning(
+                f"Model bundle {bundle_dir} does not match the pickles in {models_dir} ({', '.join(stale)}); "
+                "loading the pickles - rebuild it with utils/build_model_bundle.py"
+            )
+            return load_pickles(models_dir, max_workers=ARTIFACT_LOAD_THREADS)
+        if stale is None:
+            logger.warning(f"Model bundle {bundle_dir} does not record its sources; rebuild it to detect stale bundles")
+        logger.info(f"Loading model bundle from {bundle_dir}")
+        return load_bundle(
+            bundle_dir,
+            load_estimators=INFERENCE_ENGINE != "native-only",
+            verify=BUNDLE_VERIFY,
+            max_workers=ARTIFACT_LOAD_THREADS
+        )
+    logger.info(f"Loading model artifacts from {models_dir}")
+    return load_pickles(models_dir, max_workers=ARTIFACT_LOAD_THREADS)
+
+def build_student_predictor(student):
+    """Predictor for the distilled student: the native engine for small batches when it compiles"""
+    if student is None:
+        return None
+    n_features = max(n for _, _, n in ENSEMBLE_MEMBERS)
+    if getattr(student, "n_features_in_", n_features) != n_features:
+        # An unusable optional artifact should not keep the ensemble from serving
+        logger.warning(f"Ignoring student model: expects {student.n_features_in_} features, not {n_features}")
+        return None
+    # Latency is the point of the student, so it does not wait for INFERENCE_ENGINE=native
+    return compile_for_serving(student, n_features, "student", max_rows=NATIVE_MAX_ROWS) or student
+
+def build_model_bundle(version, models_dir=MODELS_DIR, bundle_dir=MODEL_BUNDLE):
+    """Read, compile and warm a complete bundle (blocking); raises if its canary prediction fails"""
+    started = time.perf_counter()
+    fingerprint = source_fingerprint(models_dir, bundle_dir)
+    artifacts = read_model_artifacts(models_dir, bundle_dir)
+    models = {artifact: artifacts[artifact] for _, artifact, _ in ENSEMBLE_MEMBERS}
+    
+    # Pin the internal thread count of each member (see MODEL_THREADS)
+    if MODEL_THREADS is not None:
+        for model in models.values():
+            configure_model_threads(model, MODEL_THREADS)
+    
+    # Compile the NumPy preprocessing plan from the loaded artifacts (bundles ship it precompiled)
+    preprocessing_plan = artifacts.get("preprocessing_plan") or PreprocessingPlan.from_artifacts(
+        artifacts["scaler"], artifacts["encoders"], artifacts["cat_cols"], artifacts["feature_order"]
+    )
+    
+    bundle = ModelBundle(
+        version=version,
+        student=build_student_predictor(artifacts.get("student_model")),
+        models=MappingProxyType(models),
+        # Select the predictor used for each member (native compilation can take a while)
+        member_predictors=MappingProxyType(build_member_predictors(models, artifacts.get("native", {}))),
+        preprocessing_plan=preprocessing_plan,
+        target_encoder=artifacts["target_encoder"],
+        T_rf=artifacts["T_rf"],
+        T_ens=artifacts["T_ens"],
+        source=str(models_dir),
+        fingerprint=fingerprint,
+        load_report={
+            "seconds": round(time.perf_counter() - started, 4),
+            "artifacts": artifacts.get("load_report", {})
+        }
+    )
+    
+    # Only serve a bundle once it actually produces a prediction
+    return replace(bundle, canary=run_canary_prediction(bundle))
 
 # Load models at startup
-async def load_model_artifacts():
-    """Load all model artifacts"""
-    global rf_model, xgb_model, scaler, encoders, target_encoder, cat_cols, num_cols, feature_order, T_rf, T_ens
+async def load_model_artifacts(reason="startup", role="primary", models_dir=None):
+    """Build a new bundle off the event loop and swap it into role once its canary prediction passed
+
+    The bundle in that role keeps serving while the new one loads, and stays
+    in place if loading fails. Only one bundle per role is built at a time.
+    Returns True when the new bundle was swapped in.
+    """
+    global next_bundle_version
     
+    if role in app.state.loading:
+        return False
+    if models_dir is None:
+        models_dir, bundle_dir = MODELS_DIR, MODEL_BUNDLE
+    else:
+        models_dir = Path(models_dir)
+        bundle_dir = models_dir / "bundle"
+    app.state.loading.add(role)
+    version = next_bundle_version
+    next_bundle_version += 1
     try:
-        # Define paths to all artifacts
-        artifacts_paths = {
-            "rf_model": BASE_DIR / "models" / "rf_model.pkl",
-            "xgb_model": BASE_DIR / "models" / "xgb_model.pkl",
-            "gb_model": BASE_DIR / "models" / "gb_model.pkl",
-            "hybrid_stack_model": BASE_DIR / "models" / "hybrid_stack_model.pkl",
-            "scaler": BASE_DIR / "models" / "scaler.pkl",
-            "encoders": BASE_DIR / "models" / "encoders.pkl",
-            "target_encoder": BASE_DIR / "models" / "target_encoder.pkl",
-            "cat_cols": BASE_DIR / "models" / "cat_cols.pkl",
-            "num_cols": BASE_DIR / "models" / "num_cols.pkl",
-            "feature_order": BASE_DIR / "models" / "feature_order.pkl",
-            "T_rf": BASE_DIR / "models" / "T_rf.pkl",
-            "T_ens": BASE_DIR / "models" / "T_ens.pkl"
-        }
-        
-        # Check if all files exist
-        for name, path in artifacts_paths.items():
-            if not path.exists():
-                raise FileNotFoundError(f"Required file not found: {path}")
-        
-        # Load all artifacts
-        global rf_model, xgb_model, gb_model, hybrid_stack_model, scaler, encoders, target_encoder, cat_cols, num_cols, feature_order, T_rf, T_ens
-        
-        rf_model = joblib.load(artifacts_paths["rf_model"])
-        xgb_model = joblib.load(artifacts_paths["xgb_model"])
-        gb_model = joblib.load(artifacts_paths["gb_model"])
-        hybrid_stack_model = joblib.load(artifacts_paths["hybrid_stack_model"])
-        scaler = joblib.load(artifacts_paths["scaler"])
-        encoders = joblib.load(artifacts_paths["encoders"])
-        target_encoder = joblib.load(artifacts_paths["target_encoder"])
-        cat_cols = joblib.load(artifacts_paths["cat_cols"])
-        num_cols = joblib.load(artifacts_paths["num_cols"])
-        feature_order = joblib.load(artifacts_paths["feature_order"])
-        T_rf = joblib.load(artifacts_paths["T_rf"])
-        T_ens = joblib.load(artifacts_paths["T_ens"])
-        
-        logger.info("All model artifacts loaded successfully!")
-        app.state.models_loaded = True
-        
+        logger.info(f"Loading model bundle v{version} as {role} ({reason})")
+        if role == "shadow":
+            # Scored in its own low-priority process (see api.shadow)
+            bundle = await ShadowScorer(version, models_dir, bundle_dir, SHADOW_NICENESS).start()
+        else:
+            bundle = await asyncio.get_running_loop().run_in_executor(None, build_model_bundle, version, models_dir, bundle_dir)
+            if PREDICTION_MODE == "student" and bundle.student is None:
+                raise ValueError(f"PREDICTION_MODE=student but {models_dir} has no usable student_model.pkl")
     except Exception as e:
         logger.error(f"Failed to load model artifacts: {str(e)}")
-        logger.warning("App starting without models - upload models to /app/models directory")
-        app.state.models_loaded = False
+        previous = registry.get(role)
+        if role == "primary" and previous is None:
+            logger.warning("App starting without models - upload models to /app/models directory")
+        elif previous is not None:
+            logger.warning(f"Still serving model bundle v{previous.version} as {role}")
+        app.state.load_error = str(e)
+        return False
+    finally:
+        app.state.loading.discard(role)
+    
+    # Requests that already picked up the previous bundle finish on it
+    previous = registry.get(role)
+    registry.set(role, bundle)
+    if isinstance(previous, ShadowScorer):
+        previous.close()
+    app.state.load_error = None
+    if role == "primary":
+        app.state.ready = True
+        # Cached predictions belong to the previous bundle
+        prediction_cache.clear()
+    
+    logger.info(f"Model bundle v{version} loaded as {role} in {bundle.load_report['seconds']}s, canary prediction passed: {bundle.canary}")
+    return True
 
-# Call the model loading function at startup
-import asyncio
-asyncio.create_task(load_model_artifacts())
+async def load_configured_bundles(include_shadow=True):
+    """Load the primary bundle, then the canary and shadow bundles when configured"""
+    await load_model_artifacts()
+    if CANARY_MODELS_DIR:
+        await load_model_artifacts(role="canary", models_dir=CANARY_MODELS_DIR)
+    if SHADOW_MODELS_DIR and include_shadow:
+        await load_model_artifacts(role="shadow", models_dir=SHADOW_MODELS_DIR)
 
-def preprocess_input(data: SleepInput):
-    """Preprocess input data for prediction"""
+# Fixed, valid input scored once after loading
+CANARY_INPUT = {
+    "Age": 35,
+    "Gender": "Male",
+    "Occupation": "Engineer",
+    "BMI Category": "Normal",
+    "Sleep Duration": 7.0,
+    "Quality of Sleep": 7,
+    "Stress Level": 4,
+    "Physical Activity Level": 60,
+    "Heart Rate": 70,
+    "Daily Steps": 8000,
+    "Systolic BP": 120,
+    "Diastolic BP": 80
+}
+
+def run_canary_prediction(bundle: ModelBundle):
+    """Score CANARY_INPUT end to end; raise ValueError if the probabilities are unusable"""
+    started = time.perf_counter()
+    X_preprocessed = preprocess_input(SleepInput.model_validate(CANARY_INPUT), bundle)
+    rf_proba_cal, ens_proba_cal = predict_calibrated_probs(X_preprocessed, bundle)
+    for name, probs in (("rf", rf_proba_cal), ("ensemble", ens_proba_cal)):
+        if probs.shape != (1, len(bundle.target_encoder.classes_)) or not np.all(np.isfinite(probs)) or not np.isclose(probs.sum(), 1.0):
+            raise ValueError(f"Canary prediction returned invalid {name} probabilities: {probs.tolist()}")
+    prediction = build_prediction_responses(rf_proba_cal, ens_proba_cal, bundle)[0]
+    return {
+        "predicted_class": prediction.predicted_class,
+        "ensemble_confidence": prediction.ensemble_confidence,
+        "seconds": round(time.perf_counter() - started, 4)
+    }
+
+async def watch_model_files():
+    """Reload when the model files changed and then stayed unchanged for one polling interval"""
+    primary = registry.primary
+    loaded = primary.fingerprint if primary is not None else source_fingerprint(MODELS_DIR, MODEL_BUNDLE)
+    previous = loaded
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL)
+        fingerprint = source_fingerprint(MODELS_DIR, MODEL_BUNDLE)
+        # A change between two polls means files may still be being copied
+        if fingerprint == previous and fingerprint != loaded and "primary" not in app.state.loading:
+            await load_model_artifacts(reason="model files changed")
+            # Fingerprint of what actually serves: after a failed load the
+            # files are tried again on the next poll
+            primary = registry.primary
+            loaded = primary.fingerprint if primary is not None else None
+        previous = fingerprint
+
+@app.on_event("startup")
+async def start_loading_models():
+    """Load the models in the background so /livez answers while they load"""
+    start_executors()
+    if not app.state.ready:
+        # Not already loaded in the parent before the workers were forked (api.serve)
+        app.state.load_task = asyncio.create_task(load_configured_bundles())
+    elif SHADOW_MODELS_DIR and registry.get("shadow") is None:
+        # Forked workers do not inherit the shadow process; each starts its own
+        app.state.load_task = asyncio.create_task(load_model_artifacts(role="shadow", models_dir=SHADOW_MODELS_DIR))
+    if MODEL_WATCH_INTERVAL > 0:
+        app.state.watch_task = asyncio.create_task(watch_model_files())
+    app.state.jobs = JobRunner(
+        JobStore(JOBS_DIR), MODELS_DIR, MODEL_BUNDLE, workers=JOB_WORKERS, niceness=JOB_NICENESS,
+        chunk_rows=JOB_CHUNK_ROWS, poll_interval=JOB_POLL_INTERVAL,
+        lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS
+    )
+    if JOB_WORKERS > 0:
+        app.state.jobs.start()
+
+def preprocess_records(records: List[SleepInput], bundle: ModelBundle):
+    """Preprocess a list of inputs into one feature matrix (one row per record)"""
+    started = time.perf_counter()
     try:
-        import pandas as pd
-        
-        # Create DataFrame with exact column names
-        input_dict = {
-            'Age': data.Age,
-            'Gender': data.Gender,
-            'Occupation': data.Occupation,
-            'BMI Category': data.BMI_Category,
-            'Sleep Duration': data.Sleep_Duration,
-            'Quality of Sleep': data.Quality_of_Sleep,
-            'Stress Level': data.Stress_Level,
-            'Physical Activity Level': data.Physical_Activity_Level,
-            'Heart Rate': data.Heart_Rate,
-            'Daily Steps': data.Daily_Steps,
-            'Systolic_BP': data.Systolic_BP,
-            'Diastolic_BP': data.Diastolic_BP
-        }
-        
-        df = pd.DataFrame([input_dict])
-        
-        # Feature Engineering
-        pulse_pressure = df['Systolic_BP'] - df['Diastolic_BP']
-        mean_arterial_pressure = df['Diastolic_BP'] + pulse_pressure / 3
-        df['Cardio_Load_Index'] = df['Heart Rate'] * mean_arterial_pressure
-        
-        # Compute Stress_Sleep_Index BEFORE encoding (using original values)
-        df['Stress_Sleep_Index'] = df['Stress Level'] * (6 - df['Quality of Sleep'])
-        
-        # Encode categorical columns
-        for col in cat_cols:
-            if col in df.columns:
-                encoder = encoders[col]
-                try:
-                    df[col] = encoder.transform(df[col].astype(str))
-                except ValueError as e:
-                    print(f"Warning: Unseen category in {col}: {df[col].values[0]}")
-                    df[col] = 0
-        
-        # For models that expect 14 features, we need to include Stress_Sleep_Index in the scaling
-        # Create the complete feature set including Stress_Sleep_Index
-        all_feature_cols = list(scaler.feature_names_in_) + ['Stress_Sleep_Index']
-        df_complete = df[all_feature_cols]
-        
-        # Scale only the original 13 features, leave Stress_Sleep_Index unscaled
-        original_features_scaled = scaler.transform(df_complete[list(scaler.feature_names_in_)])
-        
-        # Combine scaled original features with unscaled Stress_Sleep_Index
-        df_scaled = pd.DataFrame(original_features_scaled, columns=list(scaler.feature_names_in_))
-        df_scaled['Stress_Sleep_Index'] = df_complete['Stress_Sleep_Index'].values
-        
-        # Reorder to match the expected feature order (this should have 14 features for XGBoost compatibility)
-        df_final = df_scaled[all_feature_cols]
-        
-        return df_final.values
-        
+        X_preprocessed = bundle.preprocessing_plan.transform(records)
     except Exception as e:
         raise ValueError(f"Error in preprocessing: {str(e)}")
+    observe_stage("preprocess", started, len(records))
+    return X_preprocessed
+
+def preprocess_input(data: SleepInput, bundle: Optional[ModelBundle] = None):
+    """Preprocess input data for prediction"""
+    return preprocess_records([data], bundle or ensure_models_loaded())
+
+def ensure_models_loaded():
+    """Return the primary bundle; raise an HTTP 503 error while the first one loads and a 500 error without one"""
+    bundle = registry.primary
+    if bundle is not None:
+        return bundle
+    if "primary" in app.state.loading:
+        raise HTTPException(status_code=503, detail="Models are still loading", headers={"Retry-After": "5"})
+    raise HTTPException(status_code=500, detail="Models not loaded - please upload model files to /app/models directory")
+
+def build_stock_predictor(model):
+    """Library predictor for a member (XGBoost in-place prediction when enabled)"""
+    if XGB_INPLACE_PREDICT and type(model).__name__ == "XGBClassifier":
+        try:
+            return XGBoostInplacePredictor(model, MODEL_THREADS)
+        except ValueError as e:
+            logger.warning(f"XGBoost in-place prediction disabled: {e}")
+    return model
+
+def build_member_predictors(models, native_predictors):
+    """Native engine predictors for the members when INFERENCE_ENGINE=native (stock predictors otherwise)"""
+    predictors = {}
+    for name, artifact, n_features in ENSEMBLE_MEMBERS:
+        model = models[artifact]
+        native = native_predictors.get(name)
+        if INFERENCE_ENGINE == "native-only":
+            # Every batch size goes through the native engine
+            predictors[name] = native or (compile_verified(model, n_features, name) if model is not None else None)
+            if predictors[name] is None:
+                raise ValueError(f"No native predictor available for {name}")
+            continue
+        if model is None:
+            raise ValueError(f"Model not loaded: {artifact}")
+        stock = build_stock_predictor(model)
+        predictor = None
+        if INFERENCE_ENGINE == "native":
+            predictor = compile_for_serving(model, n_features, name, max_rows=NATIVE_MAX_ROWS, stock=stock, native=native)
+        predictors[name] = predictor or stock
+    return predictors
+
+def predict_member_proba(name, model, X):
+    """predict_proba of one ensemble member, timed as the predict_proba_<name> stage"""
+    started = time.perf_counter()
+    proba = model.predict_proba(X)
+    observe_stage(f"predict_proba_{name}", started, len(X))
+    return proba
+
+def predict_member_probas(X_preprocessed, bundle: ModelBundle, names=None):
+    """Evaluate every ensemble member (or those in names) once, concurrently when ENSEMBLE_FANOUT is enabled"""
+    members = [
+        (name, bundle.member_predictors[name], n)
+        for name, _, n in ENSEMBLE_MEMBERS
+        if names is None or name in names
+    ]
+    if ENSEMBLE_FANOUT and ENSEMBLE_THREADS > 1:
+        futures = [
+            member_executor.submit(in_context(predict_member_proba), name, model, X_preprocessed[:, :n])
+            for name, model, n in members
+        ]
+        return [future.result() for future in futures]
+    return [predict_member_proba(name, model, X_preprocessed[:, :n]) for name, model, n in members]
+
+def calibrate_member_probas(member_probas, bundle: ModelBundle):
+    """Temperature-scaled RF and ensemble probabilities from the members' outputs (in ENSEMBLE_MEMBERS order)"""
+    rf_proba, xgb_proba, gb_proba, hybrid_proba = member_probas
+    started = time.perf_counter()
+    
+    # Compute raw ensemble probabilities
+    ens_proba_raw = (rf_proba + xgb_proba + gb_proba + hybrid_proba) / 4.0
+    
+    # Apply temperature scaling
+    rf_proba_cal = apply_temperature_scaling_probs(rf_proba, bundle.T_rf)
+    ens_proba_cal = apply_temperature_scaling_probs(ens_proba_raw, bundle.T_ens)
+    observe_stage("temperature_scaling", started, len(rf_proba))
+    return rf_proba_cal, ens_proba_cal
+
+def predict_calibrated_probs(X_preprocessed, bundle: ModelBundle):
+    """Run every ensemble member once over the whole matrix and apply temperature scaling"""
+    return calibrate_member_probas(predict_member_probas(X_preprocessed, bundle), bundle)
+
+def cascade_temperature(bundle: ModelBundle, member=None):
+    """Temperature applied to the cascade's gate member"""
+    member = member or CASCADE_MEMBER
+    if CASCADE_TEMPERATURE is not None:
+        return CASCADE_TEMPERATURE
+    return bundle.T_rf if member == "rf" else 1.0
+
+def predict_cascade_probs(X_preprocessed, bundle: ModelBundle):
+    """Score the gate member first and the other members only for rows it is unsure about
+
+    Returns (rf_proba_cal, ens_proba_cal, early_exit). Rows whose calibrated
+    gate confidence reaches CASCADE_THRESHOLD get the gate's probabilities as
+    both outputs; the others get exactly the full ensemble's (the gate's
+    predict_proba is reused, not recomputed).
+    """
+    n_features = {name: n for name, _, n in ENSEMBLE_MEMBERS}
+    gate_proba = predict_member_proba(
+        CASCADE_MEMBER, bundle.member_predictors[CASCADE_MEMBER], X_preprocessed[:, :n_features[CASCADE_MEMBER]]
+    )
+    started = time.perf_counter()
+    gate_proba_cal = apply_temperature_scaling_probs(gate_proba, cascade_temperature(bundle))
+    early_exit = np.max(gate_proba_cal, axis=1) >= CASCADE_THRESHOLD
+    observe_stage("cascade_gate", started, len(X_preprocessed))
+    
+    rf_proba_cal = gate_proba_cal.copy()
+    ens_proba_cal = gate_proba_cal.copy()
+    uncertain = ~early_exit
+    n_uncertain = int(uncertain.sum())
+    if n_uncertain:
+        others = [name for name in n_features if name != CASCADE_MEMBER]
+        probas = dict(zip(others, predict_member_probas(X_preprocessed[uncertain], bundle, names=others)))
+        probas[CASCADE_MEMBER] = gate_proba[uncertain]
+        rf_proba_cal[uncertain], ens_proba_cal[uncertain] = calibrate_member_probas(
+            [probas[name] for name in n_features], bundle
+        )
+    for counter in (cascade_rows, cascade_counts) if METRICS_ENABLED else (cascade_counts,):
+        counter.inc("early_exit", amount=len(early_exit) - n_uncertain)
+        counter.inc("full", amount=n_uncertain)
+    return rf_proba_cal, ens_proba_cal, early_exit
+
+def predict_student_probs(X_preprocessed, bundle: ModelBundle):
+    """Distilled student probabilities, standing in for both the RF and the ensemble outputs"""
+    if bundle.student is None:
+        raise ValueError("Student model not loaded (create models/student_model.pkl with utils/distill_student.py)")
+    proba = predict_member_proba("student", bundle.student, X_preprocessed)
+    return proba, proba
+
+def predict_probs(X_preprocessed, bundle: ModelBundle):
+    """(rf_proba_cal, ens_proba_cal, early_exit) from the cascade when enabled, else the full ensemble (early_exit None)"""
+    if CASCADE_ENABLED:
+        return predict_cascade_probs(X_preprocessed, bundle)
+    return (*predict_calibrated_probs(X_preprocessed, bundle), None)
+
+def count_predictions(handler, predicted_classes):
+    """Add returned predictions to the predicted-class counters"""
+    if METRICS_ENABLED:
+        for predicted_class, n in Counter(predicted_classes).items():
+            predictions_served.inc(handler, predicted_class, amount=n)
+
+def build_prediction_responses(rf_proba_cal, ens_proba_cal, bundle: ModelBundle, early_exit=None, note=CONFIDENCE_NOTE):
+    """Turn calibrated probabilities into one PredictionResponse per row"""
+    # Final predicted class from temperature-scaled ensemble
+    pred_idx = np.argmax(ens_proba_cal, axis=1)
+    predicted_classes = bundle.target_encoder.inverse_transform(pred_idx)
+    ensemble_confidences = np.max(ens_proba_cal, axis=1)
+    
+    # Compute RF-only confidence
+    rf_confidences = np.max(rf_proba_cal, axis=1)
+    
+    if early_exit is None:
+        early_exit = np.zeros(len(predicted_classes), dtype=bool)
+    cascade_note = CASCADE_NOTE.format(member=CASCADE_MEMBER)
+    return [
+        PredictionResponse(
+            predicted_class=predicted_class,
+            ensemble_confidence=round(float(ensemble_confidence) * 100, 2),
+            rf_confidence=round(float(rf_confidence) * 100, 2),
+            confidence_note=cascade_note if exited else note
+        )
+        for predicted_class, ensemble_confidence, rf_confidence, exited
+        in zip(predicted_classes, ensemble_confidences, rf_confidences, early_exit)
+    ]
+
+def predict_records(records: List[SleepInput], bundle: Optional[ModelBundle] = None, mode="ensemble"):
+    """Preprocess and score records in one vectorized pass (CPU-bound, runs off the event loop)"""
+    bundle = bundle or ensure_models_loaded()
+    X_preprocessed = preprocess_records(records, bundle)
+    if mode == "student":
+        rf_proba_cal, ens_proba_cal = predict_student_probs(X_preprocessed, bundle)
+        return build_prediction_responses(rf_proba_cal, ens_proba_cal, bundle, note=STUDENT_NOTE)
+    rf_proba_cal, ens_proba_cal, early_exit = predict_probs(X_preprocessed, bundle)
+    return build_prediction_responses(rf_proba_cal, ens_proba_cal, bundle, early_exit)
+
+inference_executor = None
+member_executor = None
+
+def start_executors():
+    """Create the thread pools (threads are only started on first use), shutting down the previous ones"""
+    global inference_executor, member_executor
+    for executor in (inference_executor, member_executor):
+        if executor is not None:
+            executor.shutdown(wait=False)
+    # Bounded pool so inference never blocks the event loop serving /health and /
+    inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix="inference")
+    # Shared pool for evaluating ensemble members concurrently (separate from the
+    # inference pool so a fan-out never waits on its own thread)
+    member_executor = ThreadPoolExecutor(max_workers=ENSEMBLE_THREADS, thread_name_prefix="ensemble")
+
+start_executors()
+
+async def run_inference(records: List[SleepInput], bundle: Optional[ModelBundle] = None, mode="ensemble", timings=None):
+    """Run predict_records on the inference thread pool
+
+    When a timings dict is given, the wall milliseconds of predict_records
+    itself (without the wait for a thread) are stored under "model_ms".
+    """
+    bundle = bundle or ensure_models_loaded()
+    loop = asyncio.get_running_loop()
+    submitted = time.perf_counter()
+    
+    def predict():
+        # Time spent waiting for a free inference thread
+        observe_stage("queue", submitted, len(records))
+        started = time.perf_counter()
+        predictions = predict_records(records, bundle, mode)
+        if timings is not None:
+            timings["model_ms"] = (time.perf_counter() - started) * 1000.0
+        return predictions
+    
+    inference_in_flight.inc()
+    try:
+        return await loop.run_in_executor(inference_executor, in_context(predict))
+    finally:
+        inference_in_flight.dec()
+
+prediction_cache = PredictionCache(
+    max_entries=PREDICTION_CACHE_SIZE,
+    ttl_seconds=PREDICTION_CACHE_TTL_SECONDS
+)
+
+def prediction_cache_key(data: SleepInput, bundle: ModelBundle, mode="ensemble"):
+    """Cache key of a validated input for the given bundle and prediction mode"""
+    namespace = str(bundle.version) if mode == "ensemble" else f"{bundle.version}:{mode}"
+    return canonical_key(data.model_dump(), namespace=namespace)
+
+async def run_batched_inference(items):
+    """Score micro-batched (record, bundle) items: one run_inference call per bundle
+
+    Each request is scored by the bundle it was routed to, so its cached
+    answer matches the version in its cache key even across a reload.
+    """
+    groups = {}
+    for position, (_, bundle) in enumerate(items):
+        groups.setdefault(id(bundle), (bundle, []))[1].append(position)
+    results = [None] * len(items)
+    for bundle, positions in groups.values():
+        try:
+            predictions = await run_inference([items[position][0] for position in positions], bundle)
+        except Exception as e:
+            predictions = [e] * len(positions)
+        for position, prediction in zip(positions, predictions):
+            results[position] = prediction
+    return results
+
+predict_batcher = MicroBatcher(
+    run_batched_inference,
+    max_batch_size=PREDICT_BATCH_MAX_SIZE,
+    max_wait_ms=PREDICT_BATCH_MAX_WAIT_MS,
+    # One batch per inference thread
+    max_concurrent_batches=INFERENCE_THREADS
+)
+
+@app.on_event("shutdown")
+async def stop_inference():
+    """Stop the background tasks, the micro-batching task and the inference thread pools"""
+    watch_task = getattr(app.state, "watch_task", None)
+    if watch_task is not None:
+        watch_task.cancel()
+    await predict_batcher.close()
+    jobs = getattr(app.state, "jobs", None)
+    if jobs is not None:
+        jobs.close()
+    inference_executor.shutdown(wait=False)
+    member_executor.shutdown(wait=False)
+    shadow = registry.get("shadow")
+    if shadow is not None:
+        shadow.close()
+
+async def run_shadow_prediction(data: SleepInput, primary: ModelBundle, primary_prediction, primary_ms):
+    """Score data with the shadow bundle and record how it compares with the primary
+
+    primary_ms is the primary's predict_records wall time for data (None
+    when it was scored in a micro-batch), comparable with the shadow's.
+    """
+    shadow = registry.get("shadow")
+    try:
+        if shadow is None:
+            return
+        shadow_predictions, shadow_ms = await shadow.predict([data])
+        registry.record_comparison(primary, shadow, primary_prediction, shadow_predictions[0], primary_ms, shadow_ms)
+    except Exception as e:
+        registry.shadow_failed += 1
+        logger.warning(f"Shadow prediction failed: {e}")
+    finally:
+        registry.shadow_pending -= 1
+
+def schedule_shadow_prediction(data: SleepInput, primary: ModelBundle, primary_prediction, primary_ms):
+    """Queue a shadow prediction without waiting for it; dropped when too many are pending"""
+    if registry.get("shadow") is None:
+        return
+    if registry.shadow_pending >= SHADOW_MAX_PENDING:
+        registry.shadow_dropped += 1
+        return
+    registry.shadow_pending += 1
+    asyncio.get_running_loop().create_task(run_shadow_prediction(data, primary, primary_prediction, primary_ms))
+
+def serialize_prediction(prediction: PredictionResponse):
+    """JSON response of /predict, serialized here so the stage can be timed"""
+    started = time.perf_counter()
+    response = Response(content=prediction.model_dump_json(), media_type="application/json")
+    observe_stage("serialization", started)
+    if METRICS_ENABLED:
+        predictions_served.inc("predict_sleep_disorder", prediction.predicted_class)
+    return response
+
+async def profile_prediction(data: SleepInput, bundle: ModelBundle, mode="ensemble"):
+    """Score data under cProfile on an inference thread; the response adds the top functions by cumulative time"""
+    loop = asyncio.get_running_loop()
+    profiled = functools.partial(profile_call, limit=PROFILE_TOP_FUNCTIONS, base_dir=BASE_DIR)
+    predictions, profile = await loop.run_in_executor(inference_executor, in_context(profiled), predict_records, [data], bundle, mode)
+    logger.info(f"Profiled prediction: {profile['total_ms']} ms, top: {[f['function'] for f in profile['functions'][:5]]}")
+    return JSONResponse(content={**predictions[0].model_dump(), "profile": profile})
 
 @app.post("/predict", response_model=PredictionResponse)
-async def predict_sleep_disorder(data: SleepInput):
+async def predict_sleep_disorder(
+    data: SleepInput,
+    profile: bool = Query(default=False, description="Profile the prediction and return the top functions by cumulative time"),
+    mode: str = Query(default=PREDICTION_MODE, pattern="^(ensemble|student)$", description="student: the distilled model, for latency-critical clients"),
+    x_admin_token: Optional[str] = Header(default=None)
+):
     """Predict sleep disorder based on input data using ensemble of RF and XGB models"""
     try:
         # Check if models are loaded
-        if not getattr(app.state, "models_loaded", True):
-            raise HTTPException(status_code=500, detail="Models not loaded - please upload model files to /app/models directory")
-        if rf_model is None or xgb_model is None or gb_model is None or hybrid_stack_model is None:
-            raise HTTPException(status_code=500, detail="Models not loaded")
+        ensure_models_loaded()
+        # Pick the primary or the canary; this request is served by that bundle even if a reload swaps it
+        role, bundle = registry.route()
         
-        # Preprocess input data
-        X_preprocessed = preprocess_input(data)
+        if mode == "student" and bundle.student is None:
+            raise HTTPException(status_code=400, detail="Student model not loaded")
         
-        # Compute RF probabilities (expects 13 features)
-        X_rf = X_preprocessed[:, :13]  # Use first 13 features for RF
-        rf_proba = rf_model.predict_proba(X_rf)
+        # Profiled requests skip the cache and micro-batching so the models actually run
+        if profile:
+            if not PROFILE_REQUESTS:
+                check_admin_token(x_admin_token)
+            return await profile_prediction(data, bundle, mode)
         
-        # Compute XGB probabilities (expects 14 features)
-        xgb_proba = xgb_model.predict_proba(X_preprocessed)
+        # Round to the configured precision so the cache sees more repeats
+        if CACHE_SLEEP_DURATION_DECIMALS is not None:
+            data = data.model_copy(update={"Sleep_Duration": round(data.Sleep_Duration, CACHE_SLEEP_DURATION_DECIMALS)})
         
-        # Compute GB probabilities (expects 13 features)
-        X_gb = X_preprocessed[:, :13]  # Use first 13 features for GB
-        gb_proba = gb_model.predict_proba(X_gb)
+        # Serve repeated submissions from the cache
+        cache_key = prediction_cache_key(data, bundle, mode)
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            return serialize_prediction(cached)
         
-        # Compute hybrid stack model probabilities (expects 13 features)
-        X_hybrid = X_preprocessed[:, :13]  # Use first 13 features for hybrid
-        hybrid_proba = hybrid_stack_model.predict_proba(X_hybrid)
+        # The student is one small model: no micro-batching, and no shadow comparison
+        if mode == "student":
+            started = time.perf_counter()
+            prediction = (await run_inference([data], bundle, mode))[0]
+            registry.record_latency(bundle, (time.perf_counter() - started) * 1000.0, mode)
+            prediction_cache.put(cache_key, prediction)
+            return serialize_prediction(prediction)
         
-        # Compute raw ensemble probabilities
-        ens_proba_raw = (rf_proba + xgb_proba + gb_proba + hybrid_proba) / 4.0
+        # Coalesce with other concurrent requests when micro-batching is enabled
+        started = time.perf_counter()
+        timings = {}
+        if PREDICT_BATCHING and role == "primary":
+            prediction = await predict_batcher.submit((data, bundle))
+            record_timing("micro_batch", time.perf_counter() - started)
+        else:
+            # Preprocess and score on the inference thread pool
+            prediction = (await run_inference([data], bundle, timings=timings))[0]
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        registry.record_latency(bundle, elapsed_ms)
         
-        # Apply temperature scaling
-        rf_proba_cal = apply_temperature_scaling_probs(rf_proba, T_rf)
-        ens_proba_cal = apply_temperature_scaling_probs(ens_proba_raw, T_ens)
+        prediction_cache.put(cache_key, prediction)
         
-        # Final predicted class from temperature-scaled ensemble
-        pred_idx = np.argmax(ens_proba_cal[0])
-        predicted_class = target_encoder.inverse_transform([pred_idx])[0]
-        ensemble_confidence = float(np.max(ens_proba_cal[0]))
+        # Compare with the shadow bundle after the response is ready, off the
+        # request path; the latency delta uses model time on both sides
+        if role == "primary":
+            schedule_shadow_prediction(data, bundle, prediction, timings.get("model_ms"))
+        return serialize_prediction(prediction)
         
-        # Compute RF-only confidence
-        rf_pred_idx = np.argmax(rf_proba_cal[0])
-        rf_confidence = float(np.max(rf_proba_cal[0]))
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=f"Invalid input data: {str(ve)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_sleep_disorder_batch(
+    batch: BatchPredictionRequest,
+    mode: str = Query(default=PREDICTION_MODE, pattern="^(ensemble|student)$", description="student: the distilled model")
+):
+    """Predict sleep disorders for a list of records in one vectorized pass"""
+    if len(batch.records) > BATCH_MAX_RECORDS:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {len(batch.records)} records (max {BATCH_MAX_RECORDS})")
+    
+    try:
+        bundle = ensure_models_loaded()
+        if mode == "student" and bundle.student is None:
+            raise HTTPException(status_code=400, detail="Student model not loaded")
         
-        # Return response
-        return PredictionResponse(
-            predicted_class=predicted_class,
-            ensemble_confidence=round(ensemble_confidence * 100, 2),
-            rf_confidence=round(rf_confidence * 100, 2),
-            confidence_note="Ensemble confidence is temperature-scaled and should be used as primary."
+        # Validate every record, keeping per-row errors instead of failing the batch
+        results = [BatchPredictionItem(index=i) for i in range(len(batch.records))]
+        valid_indices = []
+        valid_records = []
+        for i, record in enumerate(batch.records):
+            try:
+                valid_records.append(SleepInput.model_validate(record))
+                valid_indices.append(i)
+            except ValidationError as ve:
+                results[i].error = f"Invalid input data: {ve.errors(include_url=False)}"
+        
+        # Preprocess all valid rows as one matrix and run each model once
+        predictions = await score_records(results, valid_records, valid_indices, bundle, mode)
+        count_predictions("predict_sleep_disorder_batch", (prediction.predicted_class for prediction in predictions))
+        
+        return BatchPredictionResponse(
+            results=results,
+            succeeded=len(predictions),
+            failed=len(results) - len(predictions)
         )
         
+    except HTTPException:
+        raise
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=f"Invalid input data: {str(ve)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+async def score_records(items: List[BatchPredictionItem], records: List[SleepInput], positions: List[int], bundle: ModelBundle, mode="ensemble"):
+    """Score records in one pass and fill in their items; returns the predictions made
+
+    When the vectorized pass fails the records are retried one by one, so a
+    row that cannot be preprocessed or scored only fails itself.
+    """
+    if not records:
+        return []
+    try:
+        predictions = await run_inference(records, bundle, mode)
+    except Exception as e:
+        if len(records) == 1:
+            items[positions[0]].error = f"Prediction failed: {str(e)}"
+            return []
+        logger.warning(f"Scoring {len(records)} records failed ({e}); retrying them one by one")
+        predictions = []
+        for position, record in zip(positions, records):
+            predictions.extend(await score_records(items, [record], [position], bundle, mode))
+        return predictions
+    for position, prediction in zip(positions, predictions):
+        items[position].prediction = prediction
+    return predictions
+
+async def score_chunk(items: List[BatchPredictionItem], records: List[SleepInput], positions: List[int], bundle: ModelBundle):
+    """Score the valid records of a chunk and fill in their items"""
+    predictions = await score_records(items, records, positions, bundle)
+    count_predictions("predict_sleep_disorder_stream", (prediction.predicted_class for prediction in predictions))
+
+@app.post("/predict/stream")
+async def predict_sleep_disorder_stream(request: Request):
+    """Score an NDJSON body in fixed-size chunks, streaming one NDJSON result line per input line
+
+    The body is read incrementally and each chunk of STREAM_CHUNK_ROWS records
+    is scored in one vectorized pass, so memory use does not grow with the
+    input. Stops as soon as the client disconnects. Results are sent while
+    the body is still arriving, so clients must read the response as they
+    upload (curl -T file does; clients that send the whole body first stall
+    once the output fills the socket buffers).
+    """
+    # The whole stream is scored by the bundle loaded when it started
+    bundle = ensure_models_loaded()
+    
+    async def results():
+        items = []
+        records = []
+        positions = []
+        index = 0
+        try:
+            async for record, error in iter_ndjson(request.stream(), STREAM_MAX_LINE_BYTES):
+                if error is None:
+                    try:
+                        records.append(SleepInput.model_validate(record))
+                        positions.append(len(items))
+                    except ValidationError as ve:
+                        error = f"Invalid input data: {ve.errors(include_url=False)}"
+                items.append(BatchPredictionItem(index=index, error=error))
+                index += 1
+                
+                if len(items) == STREAM_CHUNK_ROWS:
+                    await score_chunk(items, records, positions, bundle)
+                    yield "".join(item.model_dump_json() + "\n" for item in items)
+                    items, records, positions = [], [], []
+            
+            # The body has been read, so a disconnect now shows up on receive()
+            if items and not await request.is_disconnected():
+                await score_chunk(items, records, positions, bundle)
+                yield "".join(item.model_dump_json() + "\n" for item in items)
+        except ClientDisconnect:
+            logger.info(f"Client disconnected from /predict/stream after {index} records")
+    
+    return RequestStreamingResponse(results(), media_type="application/x-ndjson")
+
+def score_rows_one_by_one(columns, valid, errors, bundle: ModelBundle):
+    """Score the valid rows of a chunk one at a time after its vectorized pass failed
+
+    Rows that still fail get a "Prediction failed" error and are cleared from
+    valid (both updated in place). Returns the calibrated RF and ensemble
+    probabilities of the rows left valid.
+    """
+    positions = np.flatnonzero(valid)
+    scored = np.zeros(len(positions), dtype=bool)
+    rf_rows, ens_rows = [], []
+    for i, position in enumerate(positions):
+        try:
+            X_row = bundle.preprocessing_plan.transform_columns({column: array[i:i + 1] for column, array in columns.items()}, n_rows=1)
+            rf_row, ens_row, _ = predict_probs(X_row, bundle)
+        except Exception as e:
+            errors[position] = f"Prediction failed: {str(e)}"
+            continue
+        scored[i] = True
+        rf_rows.append(rf_row)
+        ens_rows.append(ens_row)
+    valid[positions[~scored]] = False
+    if not rf_rows:
+        return None, None
+    return np.vstack(rf_rows), np.vstack(ens_rows)
+
+def score_frame(frame, column_map, bundle: ModelBundle, timings=None):
+    """Append the prediction columns to a chunk of an uploaded file (CPU-bound, runs off the event loop)
+
+    When a timings dict is given, the milliseconds spent in each stage
+    (validate, preprocess, predict, format) are added to it.
+    """
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+    
+    def lap(stage):
+        nonlocal started
+        now = time.perf_counter()
+        timings[stage] = timings.get(stage, 0.0) + (now - started) * 1000.0
+        started = now
+    
+    columns, valid, errors = validate_frame(frame, column_map)
+    n_valid = int(valid.sum())
+    predicted_classes = np.full(len(frame), None, dtype=object)
+    ensemble_confidences = np.full(len(frame), np.nan)
+    rf_confidences = np.full(len(frame), np.nan)
+    lap("validate")
+    if n_valid:
+        # Same preprocessing and ensemble as /predict, over the whole chunk at once
+        try:
+            X_preprocessed = bundle.preprocessing_plan.transform_columns(columns, n_rows=n_valid)
+            lap("preprocess")
+            rf_proba_cal, ens_proba_cal, _ = predict_probs(X_preprocessed, bundle)
+        except Exception as e:
+            logger.warning(f"Scoring {n_valid} rows failed ({e}); retrying them one by one")
+            rf_proba_cal, ens_proba_cal = score_rows_one_by_one(columns, valid, errors, bundle)
+            n_valid = int(valid.sum())
+        lap("predict")
+    if n_valid:
+        predicted_classes[valid] = bundle.target_encoder.inverse_transform(np.argmax(ens_proba_cal, axis=1))
+        ensemble_confidences[valid] = [round(float(p) * 100, 2) for p in np.max(ens_proba_cal, axis=1)]
+        rf_confidences[valid] = [round(float(p) * 100, 2) for p in np.max(rf_proba_cal, axis=1)]
+    scored = frame.assign(
+        predicted_class=predicted_classes,
+        ensemble_confidence=ensemble_confidences,
+        rf_confidence=rf_confidences,
+        error=errors
+    )
+    lap("format")
+    return scored
+
+# Per-chunk timings of /predict/upload
+UPLOAD_CHUNK_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+upload_chunk_ms = {stage: Histogram(UPLOAD_CHUNK_BUCKETS_MS) for stage in ("read", "score", "write")}
+last_upload = {}
+
+@app.post("/predict/upload")
+async def predict_sleep_disorder_upload(
+    file: UploadFile = File(...),
+    output_format: Optional[str] = Query(default=None, pattern="^(csv|parquet)$")
+):
+    """Score a CSV or Parquet file chunk by chunk, streaming back the file with prediction columns appended
+
+    Columns use the training names ('BMI Category', 'Sleep Duration',
+    'Systolic_BP', ...). Every UPLOAD_CHUNK_ROWS rows are validated and scored
+    in one vectorized pass; invalid rows get an error instead of a
+    prediction. Per-chunk read/score/write timings are logged and reported
+    under "uploads" in /stats.
+    """
+    global last_upload
+    
+    bundle = ensure_models_loaded()
+    loop = asyncio.get_running_loop()
+    try:
+        input_format = file_format(file.filename, file.content_type)
+    except ValueError as ve:
+        raise HTTPException(status_code=415, detail=str(ve))
+    output_format = output_format or input_format
+    
+    # The form's file is closed once this handler returns, before the response is streamed
+    source = tempfile.TemporaryFile()
+    # A generator: nothing is read before the first next()
+    chunks = read_chunks(source, input_format, UPLOAD_CHUNK_ROWS)
+    try:
+        await loop.run_in_executor(inference_executor, shutil.copyfileobj, file.file, source)
+        source.seek(0)
+        
+        # Read the first chunk up front so a bad file fails with a 400 instead of a truncated stream
+        started = time.perf_counter()
+        first = await loop.run_in_executor(inference_executor, next, chunks, None)
+        first_read_ms = (time.perf_counter() - started) * 1000.0
+        if first is None:
+            raise ValueError("File has no rows")
+        aliases = {attr: field.validation_alias for attr, field in SleepInput.model_fields.items()}
+        column_map = resolve_columns(first.columns, aliases)
+        writer = chunk_writer(output_format, input_format, column_map)
+    except ImportError as e:
+        chunks.close()
+        source.close()
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as ve:
+        chunks.close()
+        source.close()
+        raise HTTPException(status_code=400, detail=f"Invalid file: {str(ve)}")
+    
+    async def results():
+        global last_upload
+        timings = []
+        frame, read_ms = first, first_read_ms
+        try:
+            while frame is not None:
+                started = time.perf_counter()
+                scored = await loop.run_in_executor(inference_executor, score_frame, frame, column_map, bundle)
+                count_predictions("predict_sleep_disorder_upload", scored["predicted_class"].dropna())
+                scored_at = time.perf_counter()
+                data = await loop.run_in_executor(inference_executor, writer.write, scored)
+                written_at = time.perf_counter()
+                timing = {
+                    "rows": len(frame),
+                    "read_ms": round(read_ms, 3),
+                    "score_ms": round((scored_at - started) * 1000.0, 3),
+                    "write_ms": round((written_at - scored_at) * 1000.0, 3)
+                }
+                for stage in ("read", "score", "write"):
+                    upload_chunk_ms[stage].observe(timing[f"{stage}_ms"])
+                timings.append(timing)
+                yield data
+                
+                started = time.perf_counter()
+                frame = await loop.run_in_executor(inference_executor, next, chunks, None)
+                read_ms = (time.perf_counter() - started) * 1000.0
+            yield writer.close()
+        except Exception as e:
+            # Headers are already sent: abort the response so the client sees a
+            # failed transfer rather than a complete-looking, truncated file
+            logger.error(f"Upload scoring of {file.filename} stopped after {len(timings)} chunks: {str(e)}")
+            raise
+        finally:
+            chunks.close()
+            source.close()
+            last_upload = {"file": file.filename, "rows": sum(t["rows"] for t in timings), "chunks": timings}
+            totals = {stage: round(sum(t[f"{stage}_ms"] for t in timings), 1) for stage in ("read", "score", "write")}
+            logger.info(f"Scored {last_upload['rows']} rows of {file.filename} in {len(timings)} chunks (ms: {totals})")
+    
+    stem = Path(file.filename or "upload").stem
+    return StreamingResponse(
+        results(),
+        media_type=MEDIA_TYPES[output_format],
+        headers={"Content-Disposition": f'attachment; filename="{stem}_scored.{output_format}"'}
+    )
+
+def job_store():
+    """The job store, or an HTTP 503 error before startup"""
+    jobs = getattr(app.state, "jobs", None)
+    if jobs is None:
+        raise HTTPException(status_code=503, detail="Job store not available")
+    return jobs.store
+
+def job_status(job):
+    """JobStatus for a job row"""
+    def timestamp(value):
+        return datetime.fromtimestamp(value, timezone.utc).isoformat() if value is not None else None
+    
+    return JobStatus(
+        job_id=job["id"],
+        status=job["status"],
+        source=job["source"],
+        created_at=timestamp(job["created_at"]),
+        started_at=timestamp(job["started_at"]),
+        finished_at=timestamp(job["finished_at"]),
+        rows_total=job["rows_total"],
+        rows_done=job["rows_done"],
+        progress=round(job["rows_done"] / job["rows_total"], 4) if job["rows_total"] else None,
+        attempts=job["attempts"],
+        error=job["error"],
+        result_url=f"/jobs/{job['id']}/result" if job["status"] == "succeeded" else None
+    )
+
+async def run_store_call(method, *args):
+    """Call a JobStore method off the event loop (SQLite may wait on a locked database)"""
+    return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+
+async def queue_job(store: JobStore, job_id, source, input_format, output_format, rows_total=None):
+    """Register a job whose input file is in place and wake the dispatcher up"""
+    job = await run_store_call(store.create, job_id, source, input_format, output_format, rows_total)
+    app.state.jobs.notify()
+    logger.info(f"Job {job_id} queued ({source})")
+    return JSONResponse(status_code=202, content=job_status(job).model_dump())
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(batch: BatchPredictionRequest, output_format: str = Query(default="csv", pattern="^(csv|parquet)$")):
+    """Queue inline records for background scoring and return the job id immediately
+    
+    Poll GET /jobs/{job_id} for progress and download GET /jobs/{job_id}/result
+    once it succeeded. Results have the /predict/upload layout.
+    """
+    if not batch.records:
+        raise HTTPException(status_code=400, detail="No records")
+    if len(batch.records) > JOB_MAX_RECORDS:
+        raise HTTPException(status_code=413, detail=f"Job too large: {len(batch.records)} records (max {JOB_MAX_RECORDS})")
+    
+    store = job_store()
+    job_id = store.new_id()
+    input_path = store.input_path({"id": job_id, "input_format": "csv"})
+    aliases = {attr: field.validation_alias for attr, field in SleepInput.model_fields.items()}
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, write_records, input_path, batch.records, aliases)
+    except ValueError as ve:
+        input_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=f"Invalid records: {str(ve)}")
+    return await queue_job(store, job_id, "inline", "csv", output_format, rows_total=len(batch.records))
+
+@app.post("/jobs/upload", response_model=JobStatus, status_code=202)
+async def submit_job_upload(
+    file: UploadFile = File(...),
+    output_format: Optional[str] = Query(default=None, pattern="^(csv|parquet)$")
+):
+    """Queue a CSV or Parquet file (as accepted by /predict/upload) for background scoring"""
+    try:
+        input_format = file_format(file.filename, file.content_type)
+    except ValueError as ve:
+        raise HTTPException(status_code=415, detail=str(ve))
+    
+    store = job_store()
+    job_id = store.new_id()
+    input_path = store.input_path({"id": job_id, "input_format": input_format})
+    partial_path = input_path.with_name(f"{input_path.name}.part")
+    
+    def save():
+        with open(partial_path, "wb") as f:
+            shutil.copyfileobj(file.file, f)
+        os.replace(partial_path, input_path)
+    
+    await asyncio.get_running_loop().run_in_executor(None, save)
+    return await queue_job(store, job_id, file.filename or "upload", input_format, output_format or input_format)
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Status and progress of a job"""
+    job = await run_store_call(job_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job_status(job)
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Download the scored file of a succeeded job"""
+    store = job_store()
+    job = await run_store_call(store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}" + (f": {job['error']}" if job["error"] else ""))
+    stem = Path(job["source"]).stem if job["source"] != "inline" else job_id
+    return FileResponse(
+        store.output_path(job),
+        media_type=MEDIA_TYPES[job["output_format"]],
+        filename=f"{stem}_scored.{job['output_format']}"
+    )
 
 @app.get("/")
 async def root():
     """Root endpoint"""
     return {"message": "Sleep Disorder Prediction API", "status": "OK"}
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics of this process (text exposition format)"""
+    models_ready.set(value=1 if app.state.ready else 0)
+    for role in ROLES:
+        bundle = registry.get(role)
+        model_version.set(role, value=bundle.version if bundle is not None else 0)
+    shadow_pending.set(value=registry.shadow_pending)
+    jobs = getattr(app.state, "jobs", None)
+    if jobs is not None:
+        for status, count in (await run_store_call(jobs.store.counts)).items():
+            batch_jobs.set(status, value=count)
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def cascade_stats(bundle: Optional[ModelBundle]):
+    """Cascade configuration and the share of rows that exited early"""
+    early, full = cascade_counts.value("early_exit"), cascade_counts.value("full")
+    return {
+        "enabled": CASCADE_ENABLED,
+        "member": CASCADE_MEMBER,
+        "threshold": CASCADE_THRESHOLD,
+        "temperature": float(cascade_temperature(bundle)) if bundle is not None else CASCADE_TEMPERATURE,
+        "early_exit_rows": early,
+        "full_rows": full,
+        "early_exit_rate": round(early / (early + full), 4) if early + full else None
+    }
+
+@app.get("/stats")
+async def stats():
+    """Runtime statistics for the serving subsystems"""
+    bundle = registry.primary
+    member_predictors = bundle.member_predictors if bundle is not None else {}
+    jobs = getattr(app.state, "jobs", None)
+    job_counts = await run_store_call(jobs.store.counts) if jobs is not None else {}
+    return {
+        "batching": {"enabled": PREDICT_BATCHING, **predict_batcher.stats()},
+        "cache": prediction_cache.stats(),
+        "models": {
+            "version": bundle.version if bundle is not None else None,
+            "student": type(getattr(bundle, "student", None)).__name__ if getattr(bundle, "student", None) is not None else None,
+            "prediction_mode": PREDICTION_MODE,
+            "reloading": sorted(app.state.loading),
+            "load": bundle.load_report if bundle is not None else {}
+        },
+        "registry": registry.stats(),
+        "uploads": {
+            "chunk_ms": {stage: histogram.snapshot() for stage, histogram in upload_chunk_ms.items()},
+            "last": last_upload
+        },
+        "jobs": {
+            "workers": JOB_WORKERS,
+            "running_here": len(jobs.running) if jobs is not None else 0,
+            **job_counts
+        },
+        "memory": {"pid": os.getpid(), **(process_memory() or {})},
+        "cascade": cascade_stats(bundle),
+        "inference": {
+            "threads": INFERENCE_THREADS,
+            "ensemble_fanout": ENSEMBLE_FANOUT,
+            "ensemble_threads": ENSEMBLE_THREADS,
+            "model_threads": MODEL_THREADS,
+            "engine": INFERENCE_ENGINE,
+            "xgb_inplace_predict": XGB_INPLACE_PREDICT,
+            "native_max_rows": {
+                name: predictor.max_rows
+                for name, predictor in member_predictors.items()
+                if hasattr(predictor, "max_rows")
+            }
+        }
+    }
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    rf_status = "loaded" if rf_model is not None else "not loaded"
-    xgb_status = "loaded" if xgb_model is not None else "not loaded"
-    gb_status = "loaded" if gb_model is not None else "not loaded"
-    hybrid_status = "loaded" if hybrid_stack_model is not None else "not loaded"
+    bundle = registry.primary
+    member_predictors = bundle.member_predictors if bundle is not None else {}
+    rf_status = "loaded" if member_predictors.get("rf") is not None else "not loaded"
+    xgb_status = "loaded" if member_predictors.get("xgb") is not None else "not loaded"
+    gb_status = "loaded" if member_predictors.get("gb") is not None else "not loaded"
+    hybrid_status = "loaded" if member_predictors.get("hybrid") is not None else "not loaded"
+    if app.state.ready:
+        status = "healthy"
+    else:
+        status = "loading" if "primary" in app.state.loading else "degraded"
     return {
-        "status": "healthy",
+        "status": status,
+        "ready": app.state.ready,
         "rf_model_status": rf_status,
         "xgb_model_status": xgb_status,
         "gb_model_status": gb_status,
         "hybrid_stack_model_status": hybrid_status
     }
 
+@app.get("/livez")
+async def liveness():
+    """Liveness probe: the process is up and the event loop is responsive"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness probe: 200 only after every artifact loaded and the canary prediction passed"""
+    bundle = registry.primary
+    body = {
+        "ready": app.state.ready,
+        "loading": "primary" in app.state.loading,
+        "version": bundle.version if bundle is not None else None,
+        "load": bundle.load_report if bundle is not None else {},
+        "canary": bundle.canary if bundle is not None else None,
+        # Last failed load (a failed reload leaves the previous bundle serving)
+        "error": app.state.load_error
+    }
+    if app.state.ready:
+        return {"status": "ready", **body}
+    return JSONResponse(status_code=503, content={"status": "loading" if "primary" in app.state.loading else "not ready", **body})
+
+def check_admin_token(token: Optional[str]):
+    """Reject admin requests without the configured ADMIN_TOKEN"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled - set ADMIN_TOKEN to enable them")
+    if token is None or not secrets.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.post("/admin/reload", status_code=202)
+async def reload_models(x_admin_token: Optional[str] = Header(default=None)):
+    """Build and warm a new bundle in the background; it replaces the current one once its canary passes"""
+    check_admin_token(x_admin_token)
+    bundle = registry.primary
+    if "primary" in app.state.loading:
+        return {"status": "already loading", "version": bundle.version if bundle is not None else None}
+    app.state.load_task = asyncio.create_task(load_model_artifacts(reason="admin request"))
+    return {"status": "reloading", "version": bundle.version if bundle is not None else None}
+
+class RegistryUpdate(BaseModel):
+    # Directory holding the artifacts of the new bundle (a prebuilt bundle/ inside it is used when present)
+    models_dir: Optional[str] = None
+    # Share of /predict traffic routed to the canary
+    traffic_percent: Optional[float] = Field(default=None, ge=0, le=100)
+
+def check_registry_role(role: str):
+    if role not in ("canary", "shadow"):
+        raise HTTPException(status_code=404, detail=f"Unknown role: {role} (expected canary or shadow)")
+
+@app.get("/admin/registry")
+async def registry_status(x_admin_token: Optional[str] = Header(default=None)):
+    """Loaded bundles, canary share and version comparison statistics"""
+    check_admin_token(x_admin_token)
+    return registry.stats()
+
+@app.put("/admin/registry/{role}")
+async def update_registry(role: str, update: RegistryUpdate, x_admin_token: Optional[str] = Header(default=None)):
+    """Load a canary or shadow bundle and/or change the canary traffic share"""
+    check_admin_token(x_admin_token)
+    check_registry_role(role)
+    if update.traffic_percent is not None:
+        if role != "canary":
+            raise HTTPException(status_code=400, detail="traffic_percent only applies to the canary")
+        registry.canary_percent = update.traffic_percent
+    if update.models_dir is not None:
+        if role in app.state.loading:
+            raise HTTPException(status_code=409, detail=f"Another {role} bundle is loading")
+        if not await load_model_artifacts(reason="admin request", role=role, models_dir=update.models_dir):
+            raise HTTPException(status_code=500, detail=f"Failed to load {role} bundle: {app.state.load_error}")
+    return registry.stats()
+
+@app.delete("/admin/registry/{role}")
+async def remove_from_registry(role: str, x_admin_token: Optional[str] = Header(default=None)):
+    """Unload the canary or shadow bundle"""
+    check_admin_token(x_admin_token)
+    check_registry_role(role)
+    bundle = registry.get(role)
+    registry.remove(role)
+    if isinstance(bundle, ShadowScorer):
+        bundle.close()
+    return registry.stats()
+
+@app.post("/admin/registry/promote")
+async def promote_canary(x_admin_token: Optional[str] = Header(default=None)):
+    """Make the canary bundle the primary"""
+    check_admin_token(x_admin_token)
+    try:
+        registry.promote()
+    except ValueError as ve:
+        raise HTTPException(status_code=409, detail=str(ve))
+    prediction_cache.clear()
+    return registry.stats()
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8080))
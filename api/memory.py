@@ -0,0 +1,31 @@
+"""Per-process memory breakdown read from /proc (Linux only)"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+def process_memory(pid="self"):
+    """Resident memory of a process in bytes, split into unique and shared pages
+
+    "unique" pages (Private_Clean + Private_Dirty) are what each extra worker
+    costs; "shared" pages are mapped by other processes too (for pre-forked
+    workers, mostly the model artifacts). "pss" divides shared pages evenly
+    between the processes mapping them. Returns None when /proc is not
+    available.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    fields = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) == 3 and parts[2] == "kB":
+            fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "unique": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    }
@@ -0,0 +1,31 @@
+"""The artifacts served together as one unit, swapped atomically on reload"""
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Optional
+
+from api.preprocessing import PreprocessingPlan
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """Every artifact needed to serve a prediction, loaded and warmed together
+
+    A bundle is not modified once built. Reloading builds a new one and
+    rebinds a single reference, so a request that picked up the old bundle
+    finishes on a consistent set of artifacts.
+    """
+    version: int
+    # Ensemble member estimators by artifact name (None when not unpickled)
+    models: Mapping[str, Any]
+    # Predictor used for each ensemble member ("rf", "xgb", ...)
+    member_predictors: Mapping[str, Any]
+    preprocessing_plan: PreprocessingPlan
+    target_encoder: Any
+    T_rf: float
+    T_ens: float
+    # Predictor of the distilled student model (None when models_dir has none)
+    student: Any = None
+    # Models directory the bundle was loaded from
+    source: str = ""
+    # Source files as they were when loading started (see source_fingerprint)
+    fingerprint: tuple = ()
+    load_report: Mapping[str, Any] = field(default_factory=dict)
+    canary: Optional[Mapping[str, Any]] = None
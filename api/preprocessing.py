@@ -0,0 +1,117 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Map SleepInput attribute names to the column names used during training
+INPUT_COLUMNS = {
+    'Age': 'Age',
+    'Gender': 'Gender',
+    'Occupation': 'Occupation',
+    'BMI_Category': 'BMI Category',
+    'Sleep_Duration': 'Sleep Duration',
+    'Quality_of_Sleep': 'Quality of Sleep',
+    'Stress_Level': 'Stress Level',
+    'Physical_Activity_Level': 'Physical Activity Level',
+    'Heart_Rate': 'Heart Rate',
+    'Daily_Steps': 'Daily Steps',
+    'Systolic_BP': 'Systolic_BP',
+    'Diastolic_BP': 'Diastolic_BP'
+}
+
+class PreprocessingPlan:
+    """Preprocessing steps compiled once from the loaded artifacts
+
+    Produces the same matrix as the original pandas pipeline: the scaler's
+    features (encoded and standardized) followed by the unscaled
+    Stress_Sleep_Index column.
+    """
+
+    def __init__(self, scaled_columns, mean, scale, category_codes):
+        # Scaler features define the column order of the output matrix
+        self.scaled_columns = list(scaled_columns)
+        self.output_columns = self.scaled_columns + ['Stress_Sleep_Index']
+        self.n_features = len(self.output_columns)
+        self.column_index = {name: i for i, name in enumerate(self.output_columns)}
+
+        # Scaler statistics as plain arrays
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+
+        # Category -> code lookup tables
+        self.category_codes = {col: dict(codes) for col, codes in category_codes.items() if col in self.column_index}
+
+        # Raw columns copied as-is before scaling
+        self.numeric_columns = [
+            col for col in INPUT_COLUMNS.values()
+            if col in self.column_index and col not in self.category_codes
+        ]
+
+    @classmethod
+    def from_artifacts(cls, scaler, encoders, cat_cols, feature_order=None):
+        """Compile the plan from the fitted scaler and label encoders"""
+        scaled_columns = list(scaler.feature_names_in_)
+        if feature_order is not None and list(feature_order) != scaled_columns:
+            logger.warning("feature_order differs from scaler features - using scaler order")
+
+        n_scaled = len(scaled_columns)
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(n_scaled)
+        scale = scaler.scale_ if scaler.with_std else np.ones(n_scaled)
+
+        # LabelEncoder codes are positions in classes_
+        category_codes = {
+            col: {str(category): code for code, category in enumerate(encoders[col].classes_)}
+            for col in cat_cols
+        }
+        return cls(scaled_columns, mean, scale, category_codes)
+
+    def transform(self, records, out=None):
+        """Preprocess a sequence of SleepInput-like records"""
+        columns = {
+            column: [getattr(record, attr) for record in records]
+            for attr, column in INPUT_COLUMNS.items()
+        }
+        return self.transform_columns(columns, n_rows=len(records), out=out)
+
+    def transform_columns(self, columns, n_rows=None, out=None):
+        """Preprocess raw columns keyed by their training names ('BMI Category', 'Systolic_BP', ...)"""
+        if n_rows is None:
+            n_rows = len(columns['Age'])
+        if out is None:
+            out = np.empty((n_rows, self.n_features), dtype=np.float64)
+        elif out.shape != (n_rows, self.n_features):
+            raise ValueError(f"Output array has shape {out.shape}, expected {(n_rows, self.n_features)}")
+
+        index = self.column_index
+
+        # Copy numeric columns
+        for col in self.numeric_columns:
+            out[:, index[col]] = columns[col]
+
+        # Encode categorical columns (unseen categories map to 0 for that row only)
+        for col, codes in self.category_codes.items():
+            values = columns[col]
+            encoded = np.fromiter((codes.get(str(v), -1) for v in values), dtype=np.int64, count=n_rows)
+            unseen = encoded < 0
+            if unseen.any():
+                logger.warning(f"Unseen category in {col}: {sorted({str(v) for v, u in zip(values, unseen) if u})}")
+                encoded[unseen] = 0
+            out[:, index[col]] = encoded
+
+        # Feature engineering on the raw (unscaled) values
+        heart_rate = np.asarray(columns['Heart Rate'])
+        systolic = np.asarray(columns['Systolic_BP'])
+        diastolic = np.asarray(columns['Diastolic_BP'])
+        pulse_pressure = systolic - diastolic
+        mean_arterial_pressure = diastolic + pulse_pressure / 3
+        if 'Cardio_Load_Index' in index:
+            out[:, index['Cardio_Load_Index']] = heart_rate * mean_arterial_pressure
+        out[:, index['Stress_Sleep_Index']] = np.asarray(columns['Stress Level']) * (6 - np.asarray(columns['Quality of Sleep']))
+
+        # Standardize the scaler features in place, leave Stress_Sleep_Index unscaled
+        n_scaled = len(self.scaled_columns)
+        scaled = out[:, :n_scaled]
+        scaled -= self.mean
+        scaled /= self.scale
+
+        return out
@@ -0,0 +1,103 @@
+"""Per-request stage timings (Server-Timing header) and on-demand profiling
+
+Stage timings are collected in a context variable set for each HTTP
+request. Work submitted to thread pools must run in a copy of the request
+context (see in_context) for its stages to be attributed to the request.
+"""
+import contextvars
+import cProfile
+import logging
+import pstats
+import time
+from pathlib import Path
+
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+# Stage name -> seconds, for the request being handled (None outside requests)
+request_timings = contextvars.ContextVar("request_timings", default=None)
+
+def record_timing(stage, seconds):
+    """Add seconds to a stage of the current request, if any"""
+    timings = request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+def in_context(fn):
+    """Wrap fn to run in a copy of the current context (for executor.submit / run_in_executor)"""
+    context = contextvars.copy_context()
+    return lambda *args: context.run(fn, *args)
+
+def server_timing_header(timings, total_seconds):
+    """Server-Timing value: one metric per stage plus the total, durations in milliseconds"""
+    metrics = [f"{stage};dur={seconds * 1000.0:.3f}" for stage, seconds in timings.items()]
+    metrics.append(f"total;dur={total_seconds * 1000.0:.3f}")
+    return ", ".join(metrics)
+
+class ServerTimingMiddleware:
+    """ASGI middleware adding a Server-Timing header with the stages recorded for the request
+
+    total is the time until the response headers were sent, so the
+    difference with the latency a client measures is network and queuing
+    in front of the app.
+    """
+
+    def __init__(self, app, timing_allow_origin=None):
+        self.app = app
+        self.timing_allow_origin = timing_allow_origin
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings = {}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing_header(timings, time.perf_counter() - started))
+                if self.timing_allow_origin:
+                    # Lets cross-origin pages read the header (Resource Timing API)
+                    headers.append("Timing-Allow-Origin", self.timing_allow_origin)
+            await send(message)
+
+        token = request_timings.set(timings)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timings.reset(token)
+
+def _function_name(key, base_dir):
+    filename, line, name = key
+    if filename == "~":
+        # Built-in functions
+        return name
+    path = Path(filename)
+    if "site-packages" in path.parts:
+        path = Path(*path.parts[path.parts.index("site-packages") + 1:])
+    elif base_dir is not None and path.is_relative_to(base_dir):
+        path = path.relative_to(base_dir)
+    return f"{path}:{line}({name})"
+
+def profile_call(fn, *args, limit=25, base_dir=None):
+    """Run fn(*args) under cProfile; returns its result and the top functions by cumulative time
+
+    cProfile only sees the calling thread: call this in the thread doing the work.
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args)
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    functions = [
+        {
+            "function": _function_name(key, base_dir),
+            "calls": calls,
+            "total_ms": round(total * 1000.0, 3),
+            "cumulative_ms": round(cumulative * 1000.0, 3)
+        }
+        for key, (_, calls, total, cumulative, _) in rows
+    ]
+    return result, {"sort": "cumulative", "total_ms": round(stats.total_tt * 1000.0, 3), "functions": functions}
@@ -0,0 +1,142 @@
+"""Several model bundles loaded side by side: the primary, a canary and a shadow
+
+The primary serves /predict. A canary serves a configurable share of /predict
+traffic; a shadow scores the same inputs as the primary off the request path
+so it can be compared without affecting responses or latency.
+"""
+import random
+
+from api.batching import Histogram
+
+ROLES = ("primary", "canary", "shadow")
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000]
+LATENCY_DELTA_BUCKETS_MS = [-100, -25, -10, -5, -1, 0, 1, 5, 10, 25, 100]
+
+# What the shadow comparisons cover, reported with them
+SHADOW_SCOPE = (
+    "Primary /predict requests that missed the response cache, sent to the shadow process one record per call. "
+    "latency_delta_ms is shadow minus primary wall time of predict_records for that record, without queueing; "
+    "micro-batched primary requests are compared but not timed, and the niced shadow's time includes waiting for the CPU."
+)
+
+def version_label(bundle):
+    return f"v{bundle.version}"
+
+class VersionComparison:
+    """Agreement and latency deltas of a candidate bundle against the primary on the same inputs"""
+
+    def __init__(self):
+        self.compared = 0
+        self.agreed = 0
+        self.confidence_delta_total = 0.0
+        self.latency_delta_ms = Histogram(LATENCY_DELTA_BUCKETS_MS)
+
+    def record(self, primary_prediction, candidate_prediction, primary_ms, candidate_ms):
+        self.compared += 1
+        self.agreed += primary_prediction.predicted_class == candidate_prediction.predicted_class
+        self.confidence_delta_total += candidate_prediction.ensemble_confidence - primary_prediction.ensemble_confidence
+        # No primary time when the record was scored as part of a micro-batch
+        if primary_ms is not None:
+            self.latency_delta_ms.observe(candidate_ms - primary_ms)
+
+    def snapshot(self):
+        return {
+            "compared": self.compared,
+            "agreement": self.agreed / self.compared if self.compared else None,
+            "mean_confidence_delta": self.confidence_delta_total / self.compared if self.compared else None,
+            "latency_delta_ms": self.latency_delta_ms.snapshot()
+        }
+
+class ModelRegistry:
+    """Bundles by role, canary routing and per-version statistics
+
+    The role -> bundle mapping is replaced as a whole on every change, so a
+    reader always sees a consistent set of bundles. Statistics are only
+    updated from the event loop.
+    """
+
+    def __init__(self, canary_percent=0.0, rng=None):
+        self._bundles = {}
+        self.canary_percent = canary_percent
+        self._random = rng or random.Random()
+        self.requests = {}
+        self.latency_ms = {}
+        self.comparisons = {}
+        self.shadow_pending = 0
+        self.shadow_dropped = 0
+        self.shadow_failed = 0
+
+    @property
+    def primary(self):
+        return self._bundles.get("primary")
+
+    def get(self, role):
+        return self._bundles.get(role)
+
+    def set(self, role, bundle):
+        if role not in ROLES:
+            raise ValueError(f"Unknown role: {role}")
+        self._bundles = {**self._bundles, role: bundle}
+
+    def remove(self, role):
+        self._bundles = {r: b for r, b in self._bundles.items() if r != role}
+
+    def promote(self):
+        """Make the canary the primary"""
+        canary = self._bundles.get("canary")
+        if canary is None:
+            raise ValueError("No canary bundle loaded")
+        self._bundles = {**{r: b for r, b in self._bundles.items() if r != "canary"}, "primary": canary}
+        return canary
+
+    def route(self):
+        """Role and bundle serving the next /predict request"""
+        bundles = self._bundles
+        canary = bundles.get("canary")
+        if canary is not None and self.canary_percent > 0 and self._random.random() * 100 < self.canary_percent:
+            return "canary", canary
+        return "primary", bundles.get("primary")
+
+    def record_latency(self, bundle, ms, mode="ensemble"):
+        # Other prediction modes get their own label so version means stay comparable
+        label = version_label(bundle) if mode == "ensemble" else f"{version_label(bundle)}:{mode}"
+        self.requests[label] = self.requests.get(label, 0) + 1
+        if label not in self.latency_ms:
+            self.latency_ms[label] = Histogram(LATENCY_BUCKETS_MS)
+        self.latency_ms[label].observe(ms)
+
+    def record_comparison(self, primary, candidate, primary_prediction, candidate_prediction, primary_ms, candidate_ms):
+        key = f"{version_label(candidate)} vs {version_label(primary)}"
+        if key not in self.comparisons:
+            self.comparisons[key] = VersionComparison()
+        self.comparisons[key].record(primary_prediction, candidate_prediction, primary_ms, candidate_ms)
+
+    def mean_latency_ms(self, bundle):
+        histogram = self.latency_ms.get(version_label(bundle)) if bundle is not None else None
+        return histogram.snapshot()["mean"] if histogram is not None and histogram.count else None
+
+    def stats(self):
+        bundles = self._bundles
+        primary_mean = self.mean_latency_ms(bundles.get("primary"))
+        canary_mean = self.mean_latency_ms(bundles.get("canary"))
+        return {
+            "bundles": {
+                role: {"version": version_label(bundle), "source": bundle.source}
+                for role, bundle in bundles.items()
+            },
+            "canary_percent": self.canary_percent,
+            "requests": dict(self.requests),
+            "latency_ms": {label: histogram.snapshot() for label, histogram in self.latency_ms.items()},
+            # Canary traffic is disjoint from primary traffic: compare mean latencies
+            "canary_mean_latency_delta_ms": canary_mean - primary_mean if canary_mean is not None and primary_mean is not None else None,
+            # Shadow predictions are compared with the primary on the same inputs
+            "comparisons": {key: comparison.snapshot() for key, comparison in self.comparisons.items()},
+            "shadow": {
+                "pending": self.shadow_pending,
+                "dropped": self.shadow_dropped,
+                "failed": self.shadow_failed,
+                "scope": SHADOW_SCOPE
+            }
+        }
@@ -0,0 +1,117 @@
+"""Pre-fork server: load the model artifacts once, then fork the uvicorn workers
+
+    python -m api.serve --host 0.0.0.0 --port 8080 --workers 2
+
+The parent loads every artifact and runs the canary prediction, freezes the
+garbage collector and forks the workers, which then share the model pages
+copy-on-write instead of each unpickling its own copy. The parent restarts
+workers that exit unexpectedly and periodically logs the unique and shared
+memory of every worker; each worker also reports its own under /stats.
+"""
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import signal
+import time
+
+import uvicorn
+
+from api import main
+from api.memory import process_memory
+
+logger = logging.getLogger(__name__)
+
+def preload_models():
+    """Load the artifacts in this (parent) process and freeze them for sharing"""
+    # The shadow process is started by each worker: child processes do not survive a fork
+    asyncio.run(main.load_configured_bundles(include_shadow=False))
+    if not main.app.state.ready:
+        logger.warning(f"Models not loaded before forking ({main.app.state.load_error}) - each worker will retry")
+    # Move everything allocated so far out of the collector's reach: collections
+    # in the workers would otherwise write to the GC headers of the shared
+    # objects and copy their pages
+    gc.collect()
+    gc.freeze()
+
+def spawn_worker(config, sock):
+    """Fork one uvicorn worker serving on the shared listening socket"""
+    pid = os.fork()
+    if pid:
+        return pid
+    exit_code = 0
+    try:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException:
+        logger.exception("Worker failed")
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+def format_memory(memory):
+    return ", ".join(f"{key} {value / 2**20:.1f} MiB" for key, value in memory.items())
+
+def log_memory(workers):
+    """Log the unique and shared memory of the parent and every worker"""
+    for label, pid in [("parent", os.getpid())] + [("worker", pid) for pid in sorted(workers)]:
+        memory = process_memory(pid)
+        if memory is not None:
+            logger.info(f"{label} {pid}: {format_memory(memory)}")
+
+def supervise(config, sock, n_workers, memory_report_interval):
+    """Fork the workers, restart crashed ones and stop them all on SIGTERM/SIGINT"""
+    workers = {spawn_worker(config, sock) for _ in range(n_workers)}
+    logger.info(f"Started {n_workers} workers: {sorted(workers)}")
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    next_report = time.monotonic() + memory_report_interval
+    while workers:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            workers.discard(pid)
+            if not stopping:
+                logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)} - restarting")
+                workers.add(spawn_worker(config, sock))
+            continue
+        if memory_report_interval > 0 and time.monotonic() >= next_report:
+            log_memory(workers)
+            next_report = time.monotonic() + memory_report_interval
+        time.sleep(0.2)
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Serve the API from pre-forked workers sharing one copy of the models")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8080)))
+    parser.add_argument("--workers", type=int, default=main.WEB_CONCURRENCY)
+    parser.add_argument(
+        "--memory-report-interval", type=float, default=float(os.getenv("MEMORY_REPORT_INTERVAL", 60)),
+        help="Seconds between worker memory reports (0 disables them)"
+    )
+    args = parser.parse_args()
+
+    config = uvicorn.Config(main.app, host=args.host, port=args.port)
+    sock = config.bind_socket()
+
+    started = time.perf_counter()
+    preload_models()
+    logger.info(f"Models loaded in the parent in {time.perf_counter() - started:.2f}s - forking {args.workers} workers")
+
+    supervise(config, sock, args.workers, args.memory_report_interval)
+
+if __name__ == "__main__":
+    main_cli()
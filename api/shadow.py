@@ -0,0 +1,82 @@
+"""Shadow bundle scored in a separate low-priority process
+
+Shadow predictions must not slow down the primary responses. Run in the
+serving process they would compete for the GIL and, on a single-CPU VM, for
+the only core; a child process at a high nice value only gets CPU time the
+primary does not need. The child loads its own copy of the bundle.
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# State of the child process
+_bundle = None
+_load_error = None
+
+def _init_worker(version, models_dir, bundle_dir, niceness):
+    global _bundle, _load_error
+    try:
+        os.nice(niceness)
+        from api import main
+        _bundle = main.build_model_bundle(version, Path(models_dir), Path(bundle_dir))
+    except Exception as e:
+        _load_error = f"{type(e).__name__}: {e}"
+
+def _describe():
+    if _bundle is None:
+        raise RuntimeError(_load_error or "Shadow bundle not loaded")
+    return {"load_report": dict(_bundle.load_report), "canary": dict(_bundle.canary)}
+
+def _predict(records):
+    from api import main
+    # Wall time of predict_records, measured like the primary's model time.
+    # At a high nice value it includes waiting for a CPU the primary is using.
+    started = time.perf_counter()
+    predictions = main.predict_records(records, _bundle)
+    return predictions, (time.perf_counter() - started) * 1000.0
+
+class ShadowScorer:
+    """Handle on the shadow bundle loaded in a child process
+
+    Exposes the same version/source/load_report/canary attributes as a
+    ModelBundle so the registry can list it.
+    """
+
+    def __init__(self, version, models_dir, bundle_dir, niceness=19):
+        self.version = version
+        self.source = str(models_dir)
+        self.load_report = {}
+        self.canary = None
+        # A fresh interpreter: forking a process running threads is unsafe
+        self._executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(version, str(models_dir), str(bundle_dir), niceness)
+        )
+
+    async def start(self):
+        """Wait for the child to load the bundle and pass its canary prediction"""
+        loop = asyncio.get_running_loop()
+        try:
+            info = await loop.run_in_executor(self._executor, _describe)
+        except Exception:
+            self.close()
+            raise
+        self.load_report = info["load_report"]
+        self.canary = info["canary"]
+        return self
+
+    async def predict(self, records):
+        """Predictions for records and the wall milliseconds predict_records took in the child"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _predict, records)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
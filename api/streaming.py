@@ -0,0 +1,58 @@
+"""Helpers for endpoints that stream their request and response bodies"""
+import json
+
+from starlette.responses import StreamingResponse
+
+async def iter_ndjson(byte_chunks, max_line_bytes=65536):
+    """Decode an NDJSON byte stream line by line without buffering the whole body
+
+    Yields (obj, None) for each non-blank line, or (None, message) for a line
+    that is not valid JSON or longer than max_line_bytes (the rest of that
+    line is skipped).
+    """
+    buffer = bytearray()
+    skipping = False
+    async for chunk in byte_chunks:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            if newline < 0:
+                if not skipping:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        buffer.clear()
+                        skipping = True
+                        yield None, f"Line longer than {max_line_bytes} bytes"
+                break
+            if skipping:
+                skipping = False
+            else:
+                buffer += chunk[start:newline]
+                if len(buffer) > max_line_bytes:
+                    yield None, f"Line longer than {max_line_bytes} bytes"
+                elif buffer.strip():
+                    yield decode_line(buffer)
+            buffer.clear()
+            start = newline + 1
+    if buffer.strip() and not skipping:
+        yield decode_line(buffer)
+
+def decode_line(line):
+    try:
+        return json.loads(line), None
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+
+class RequestStreamingResponse(StreamingResponse):
+    """StreamingResponse for generators that are still reading the request body
+
+    Starlette's StreamingResponse reads receive() concurrently to notice
+    disconnects, which would swallow the request body. Here the generator owns
+    receive(): request.stream() raises ClientDisconnect while the body is being
+    read, and request.is_disconnected() can be polled once it has been read.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
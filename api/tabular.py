@@ -0,0 +1,219 @@
+"""Chunked reading, validation and writing of CSV/Parquet files for /predict/upload"""
+import io
+from pathlib import PurePath
+
+import numpy as np
+import pandas as pd
+
+from api.preprocessing import INPUT_COLUMNS
+
+FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet"
+}
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+CATEGORICAL_COLUMNS = {'Gender', 'Occupation', 'BMI Category'}
+FLOAT_COLUMNS = {'Sleep Duration'}
+
+# Columns appended to every row of the output file
+OUTPUT_COLUMNS = ['predicted_class', 'ensemble_confidence', 'rf_confidence', 'error']
+OUTPUT_COLUMN_TYPES = {'predicted_class': 'string', 'ensemble_confidence': 'double', 'rf_confidence': 'double', 'error': 'string'}
+
+def file_format(filename, content_type=None):
+    """"csv" or "parquet" from the file name (or content type)"""
+    suffix = PurePath(filename or "").suffix.lower()
+    if suffix in FORMATS:
+        return FORMATS[suffix]
+    for fmt, media_type in MEDIA_TYPES.items():
+        if content_type == media_type:
+            return fmt
+    raise ValueError(f"Unsupported file type: {filename!r} (expected .csv or .parquet)")
+
+def import_pyarrow():
+    """pyarrow modules needed for Parquet; raises ImportError when it is not installed"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet support requires pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+def resolve_columns(columns, aliases):
+    """Map each training column name to the file column holding it
+
+    A column may be named as in training ('Systolic_BP'), by its /predict
+    alias ('Systolic BP') or by its SleepInput attribute ('Sleep_Duration').
+    """
+    available = set(columns)
+    column_map = {}
+    missing = []
+    for attr, column in INPUT_COLUMNS.items():
+        candidates = [column, aliases.get(attr), attr]
+        found = next((name for name in candidates if name in available), None)
+        if found is None:
+            missing.append(column)
+        else:
+            column_map[column] = found
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    return column_map
+
+def read_chunks(file, fmt, chunk_rows):
+    """Iterate over a CSV or Parquet file in DataFrames of at most chunk_rows rows"""
+    if fmt == "csv":
+        yield from pd.read_csv(file, chunksize=chunk_rows)
+    else:
+        _, parquet = import_pyarrow()
+        for batch in parquet.ParquetFile(file).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+
+def validate_frame(frame, column_map):
+    """Coerce a chunk to model inputs
+
+    Returns the columns of the valid rows keyed by training name, the mask of
+    valid rows and an error message (or None) per row.
+    """
+    n_rows = len(frame)
+    errors = np.full(n_rows, None, dtype=object)
+    values = {}
+    for column, source in column_map.items():
+        raw = frame[source]
+        if column in CATEGORICAL_COLUMNS:
+            invalid = raw.isna().to_numpy()
+            message = f"{column} is missing"
+            values[column] = raw.astype(str).to_numpy()
+        else:
+            numeric = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=np.float64)
+            # inf passes the integer check (floor(inf) == inf) but no model accepts it
+            invalid = ~np.isfinite(numeric)
+            message = f"{column} must be a number"
+            if column not in FLOAT_COLUMNS:
+                invalid |= np.floor(numeric) != numeric
+                message = f"{column} must be an integer"
+            values[column] = numeric
+        errors[invalid & (errors == None)] = message  # noqa: E711 (elementwise)
+    valid = errors == None  # noqa: E711 (elementwise)
+    return {column: array[valid] for column, array in values.items()}, valid, errors
+
+class CSVChunkWriter:
+    """Encode DataFrame chunks as one CSV stream
+
+    encode() is the expensive, stateless part and may run in another process;
+    write_encoded() only puts the pieces in order.
+    """
+
+    def __init__(self):
+        self._header = True
+
+    def encode(self, frame):
+        return frame.iloc[:0].to_csv(index=False).encode(), frame.to_csv(index=False, header=False).encode()
+
+    def write_encoded(self, encoded):
+        header, rows = encoded
+        data = header + rows if self._header else rows
+        self._header = False
+        return data
+
+    def write(self, frame):
+        return self.write_encoded(self.encode(frame))
+
+    def close(self):
+        return b""
+
+class _StreamSink(io.RawIOBase):
+    """Write-only file that hands out what was written so far
+
+    tell() keeps counting across drains: the Parquet footer records offsets.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+class ParquetChunkWriter:
+    """Encode DataFrame chunks as the row groups of one Parquet file
+
+    pandas infers the types of each chunk separately, but the schema of a
+    Parquet file is fixed, so every chunk is converted to the same types:
+    the prediction columns and the columns in column_types ("string" or
+    "double", unparseable numbers become null) always, and with text_input
+    (CSV, where a column may read as numbers in one chunk and as text in the
+    next) every other column as strings. Other columns keep the types of
+    the first chunk; there, all-null columns are stored as strings.
+    """
+
+    def __init__(self, column_types=None, text_input=False):
+        self._pyarrow, self._parquet = import_pyarrow()
+        self._column_types = {**(column_types or {}), **OUTPUT_COLUMN_TYPES}
+        self._text_input = text_input
+        self._sink = _StreamSink()
+        self._writer = None
+
+    def _schema(self, table):
+        fields = []
+        for field in table.schema:
+            if self._pyarrow.types.is_null(field.type):
+                field = field.with_type(self._pyarrow.string())
+            fields.append(field)
+        return self._pyarrow.schema(fields, metadata=table.schema.metadata)
+
+    def encode(self, frame):
+        converted = {}
+        for column in frame.columns:
+            kind = self._column_types.get(column, "string" if self._text_input else None)
+            if kind == "double":
+                converted[column] = pd.to_numeric(frame[column], errors="coerce").astype(np.float64)
+            elif kind == "string":
+                converted[column] = frame[column].astype("string")
+        if converted:
+            frame = frame.assign(**converted)
+        return self._pyarrow.Table.from_pandas(frame, preserve_index=False)
+
+    def write_encoded(self, table):
+        if self._writer is None:
+            self._writer = self._parquet.ParquetWriter(self._sink, self._schema(table))
+        self._writer.write_table(table.cast(self._writer.schema))
+        return self._sink.drain()
+
+    def write(self, frame):
+        return self.write_encoded(self.encode(frame))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        return self._sink.drain()
+
+def chunk_writer(output_format, input_format, column_map=None):
+    """Writer producing output_format for a file read as input_format
+
+    column_map (from resolve_columns) gives the model input columns, which
+    Parquet output stores as strings and doubles whatever the input held.
+    """
+    if output_format == "parquet":
+        column_types = {
+            source: "string" if column in CATEGORICAL_COLUMNS else "double"
+            for column, source in (column_map or {}).items()
+        }
+        return ParquetChunkWriter(column_types, text_input=input_format == "csv")
+    return CSVChunkWriter()
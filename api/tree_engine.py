@@ -0,0 +1,409 @@
+import json
+import logging
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows evaluated per traversal chunk (keeps the (rows x trees) node matrix cache-sized)
+CHUNK_ROWS = 256
+
+class TreeArrays:
+    """A set of decision trees flattened into contiguous NumPy arrays
+
+    Every tree lives in the same node arrays and roots holds the index of each
+    tree's root node. children stores [left, right] pairs so one gather moves a
+    row to its next node; leaves point to themselves, so a fixed number of
+    level-by-level steps (max_depth) lands every row on its leaf.
+
+    value holds the per-output contribution of each leaf. When tree_output is
+    set, value has a single column and each tree adds to output tree_output[t]
+    (one tree per class and boosting round).
+    """
+
+    def __init__(self, feature, threshold, children, default_left, value, roots, max_depth,
+                 n_outputs, tree_output=None, strict=False):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_outputs = int(n_outputs)
+        self.tree_output = tree_output
+        # XGBoost goes left on x < threshold, scikit-learn on x <= threshold
+        self.strict = bool(strict)
+        self.output_matrix = None
+        if tree_output is not None:
+            self.output_matrix = np.zeros((len(roots), self.n_outputs))
+            self.output_matrix[np.arange(len(roots)), tree_output] = 1.0
+
+    @classmethod
+    def from_node_lists(cls, trees, n_outputs, tree_output=None, strict=False):
+        """Concatenate per-tree node arrays (feature, threshold, left, right, default_left, value)"""
+        offsets = np.cumsum([0] + [len(t["feature"]) for t in trees[:-1]])
+        feature, threshold, children, default_left, value = [], [], [], [], []
+        max_depth = 0
+        for offset, tree in zip(offsets, trees):
+            left = np.asarray(tree["left"])
+            node_ids = np.arange(len(left))
+            is_leaf = left < 0
+            feature.append(np.where(is_leaf, 0, tree["feature"]))
+            threshold.append(tree["threshold"])
+            children.append(np.column_stack([
+                np.where(is_leaf, node_ids, left),
+                np.where(is_leaf, node_ids, tree["right"])
+            ]).ravel() + offset)
+            default_left.append(tree["default_left"])
+            value.append(np.asarray(tree["value"], dtype=np.float64).reshape(len(left), -1))
+            max_depth = max(max_depth, _tree_depth(left, tree["right"]))
+        threshold_dtype = np.float32 if strict else np.float64
+        return cls(
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=np.concatenate(threshold).astype(threshold_dtype),
+            children=np.concatenate(children).astype(np.int32),
+            default_left=np.concatenate(default_left).astype(bool),
+            value=np.concatenate(value),
+            roots=offsets.astype(np.int32),
+            max_depth=max_depth,
+            n_outputs=n_outputs,
+            tree_output=None if tree_output is None else np.asarray(tree_output, dtype=np.int32),
+            strict=strict
+        )
+
+    def arrays(self):
+        """Named arrays, e.g. for saving the compiled trees"""
+        arrays = {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "children": self.children,
+            "default_left": self.default_left,
+            "value": self.value,
+            "roots": self.roots
+        }
+        if self.tree_output is not None:
+            arrays["tree_output"] = self.tree_output
+        return arrays
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def leaf_sum(self, X):
+        """Sum of the leaf values reached by each row over all trees"""
+        # Trees in both libraries evaluate float32 features
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        out = np.empty((X.shape[0], self.n_outputs), dtype=np.float64)
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            chunk = X[start:start + CHUNK_ROWS]
+            leaves = self._leaves(chunk)
+            if self.output_matrix is not None:
+                out[start:start + len(chunk)] = self.value[:, 0][leaves] @ self.output_matrix
+            else:
+                out[start:start + len(chunk)] = self.value[leaves].sum(axis=1)
+        return out
+
+    def _leaves(self, X):
+        """Leaf node index for every (row, tree) pair"""
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offset = (np.arange(n_rows, dtype=np.int32) * n_features)[:, None]
+        has_missing = bool(np.isnan(flat_X).any())
+        node = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = flat_X[row_offset + self.feature[node]]
+            threshold = self.threshold[node]
+            go_right = x >= threshold if self.strict else x > threshold
+            if has_missing:
+                missing = np.isnan(x)
+                go_right = np.where(missing, ~self.default_left[node], go_right)
+            node = self.children[(node << 1) + go_right]
+        return node
+
+def _tree_depth(left, right):
+    """Depth of a tree given its child index arrays (leaves have left < 0)"""
+    depth = 0
+    level = [0]
+    while level:
+        level = [child for node in level if left[node] >= 0 for child in (left[node], right[node])]
+        if level:
+            depth += 1
+    return depth
+
+def _softmax(raw):
+    raw = raw - np.max(raw, axis=1, keepdims=True)
+    exp_raw = np.exp(raw)
+    return exp_raw / np.sum(exp_raw, axis=1, keepdims=True)
+
+def _sigmoid_two_columns(raw):
+    p = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+    return np.column_stack([1.0 - p, p])
+
+class ForestPredictor:
+    """Averaged per-tree class probabilities (RandomForest / ExtraTrees)"""
+
+    def __init__(self, trees):
+        self.trees = trees
+
+    def predict_proba(self, X):
+        return self.trees.leaf_sum(X) / self.trees.n_trees
+
+class BoostingPredictor:
+    """Summed leaf margins plus a constant initial margin, then a link function"""
+
+    def __init__(self, trees, init_raw, link):
+        self.trees = trees
+        self.init_raw = np.asarray(init_raw, dtype=np.float64)
+        self.link = link
+
+    def predict_proba(self, X):
+        raw = self.trees.leaf_sum(X) + self.init_raw
+        if self.link == "softmax":
+            return _softmax(raw)
+        return _sigmoid_two_columns(raw)
+
+class LinearPredictor:
+    """Multinomial logistic regression"""
+
+    def __init__(self, coef, intercept):
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+
+    def predict_proba(self, X):
+        return _softmax(np.asarray(X, dtype=np.float64) @ self.coef.T + self.intercept)
+
+class StockPredictor:
+    """Fallback that calls the model's own predict_proba"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(X)
+
+class StackingPredictor:
+    """StackingClassifier with natively evaluated base and final estimators where possible"""
+
+    def __init__(self, base_predictors, drop_first_column, passthrough, final_predictor):
+        self.base_predictors = base_predictors
+        self.drop_first_column = drop_first_column
+        self.passthrough = passthrough
+        self.final_predictor = final_predictor
+
+    def predict_proba(self, X):
+        meta = []
+        for predictor in self.base_predictors:
+            proba = predictor.predict_proba(X)
+            meta.append(proba[:, 1:] if self.drop_first_column else proba)
+        if self.passthrough:
+            meta.append(np.asarray(X, dtype=np.float64))
+        return self.final_predictor.predict_proba(np.hstack(meta))
+
+def _sklearn_tree_nodes(tree, n_outputs, normalize):
+    """Node arrays of a fitted sklearn tree (tree_ attribute)"""
+    value = tree.value[:, 0, :n_outputs].astype(np.float64)
+    if normalize:
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        value = value / normalizer
+    missing_go_to_left = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=bool))
+    return {
+        "feature": tree.feature,
+        "threshold": tree.threshold,
+        "left": tree.children_left,
+        "right": tree.children_right,
+        "default_left": missing_go_to_left,
+        "value": value
+    }
+
+def compile_forest(model):
+    """RandomForestClassifier / ExtraTreesClassifier"""
+    n_classes = len(model.classes_)
+    trees = [_sklearn_tree_nodes(est.tree_, n_classes, normalize=True) for est in model.estimators_]
+    return ForestPredictor(TreeArrays.from_node_lists(trees, n_classes))
+
+def compile_gradient_boosting(model):
+    """GradientBoostingClassifier with a constant (prior or zero) initial estimator"""
+    if getattr(model, "loss", "log_loss") != "log_loss":
+        return None
+    init = model.init_
+    if not (init == "zero" or type(init).__name__ == "DummyClassifier"):
+        return None
+    n_classes = len(model.classes_)
+    n_outputs = model.estimators_.shape[1]
+    init_raw = model._raw_predict_init(np.zeros((1, model.n_features_in_), dtype=np.float32))[0]
+    trees = []
+    tree_output = []
+    for stage in model.estimators_:
+        for k, est in enumerate(stage):
+            nodes = _sklearn_tree_nodes(est.tree_, 1, normalize=False)
+            nodes["value"] = model.learning_rate * nodes["value"]
+            trees.append(nodes)
+            tree_output.append(k)
+    link = "softmax" if n_classes > 2 else "sigmoid"
+    return BoostingPredictor(TreeArrays.from_node_lists(trees, n_outputs, tree_output), init_raw, link)
+
+def compile_xgboost(model):
+    """XGBClassifier (gbtree booster, numerical splits, softprob/softmax/logistic objectives)"""
+    booster = model.get_booster()
+    learner = json.loads(booster.save_raw(raw_format="json"))["learner"]
+    objective = learner["objective"]["name"]
+    if learner["gradient_booster"]["name"] != "gbtree":
+        return None
+    if objective in ("multi:softprob", "multi:softmax"):
+        link = "softmax"
+        n_outputs = int(learner["learner_model_param"]["num_class"])
+    elif objective == "binary:logistic":
+        link = "sigmoid"
+        n_outputs = 1
+    else:
+        return None
+
+    gbtree = learner["gradient_booster"]["model"]
+    json_trees = gbtree["trees"]
+    tree_info = gbtree["tree_info"]
+
+    # Honour early stopping the same way XGBClassifier.predict_proba does
+    best_iteration = booster.attr("best_iteration")
+    if best_iteration is not None:
+        n_keep = int(gbtree["iteration_indptr"][int(best_iteration) + 1])
+        json_trees, tree_info = json_trees[:n_keep], tree_info[:n_keep]
+
+    trees = []
+    for tree in json_trees:
+        if tree["categories_nodes"]:
+            return None
+        # Leaf values are stored in split_conditions
+        left = np.asarray(tree["left_children"])
+        split_conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+        trees.append({
+            "feature": tree["split_indices"],
+            "threshold": split_conditions,
+            "left": left,
+            "right": tree["right_children"],
+            "default_left": tree["default_left"],
+            "value": np.where(left < 0, split_conditions.astype(np.float64), 0.0)
+        })
+
+    base_score = float(learner["learner_model_param"]["base_score"])
+    if link == "sigmoid":
+        # Binary base_score is a probability, the margin starts at its logit
+        base_score = float(np.log(base_score / (1.0 - base_score)))
+    init_raw = np.full(n_outputs, base_score)
+    trees = TreeArrays.from_node_lists(trees, n_outputs, tree_output=tree_info, strict=True)
+    return BoostingPredictor(trees, init_raw, link)
+
+def compile_logistic_regression(model):
+    """Multinomial LogisticRegression"""
+    n_classes = len(model.classes_)
+    if n_classes <= 2 or model.coef_.shape[0] != n_classes:
+        return None
+    if getattr(model, "multi_class", "auto") == "ovr" or model.solver == "liblinear":
+        return None
+    return LinearPredictor(model.coef_, model.intercept_)
+
+def compile_stacking(model):
+    """StackingClassifier; members without a native form fall back to their own predict_proba"""
+    base_predictors = []
+    for est, method in zip(model.estimators_, model.stack_method_):
+        if est == "drop":
+            continue
+        if method != "predict_proba":
+            return None
+        base_predictors.append(compile_model(est) or StockPredictor(est))
+    final_predictor = compile_model(model.final_estimator_) or StockPredictor(model.final_estimator_)
+    drop_first_column = len(model.classes_) == 2
+    return StackingPredictor(base_predictors, drop_first_column, model.passthrough, final_predictor)
+
+COMPILERS = {
+    "RandomForestClassifier": compile_forest,
+    "ExtraTreesClassifier": compile_forest,
+    "GradientBoostingClassifier": compile_gradient_boosting,
+    "XGBClassifier": compile_xgboost,
+    "LogisticRegression": compile_logistic_regression,
+    "StackingClassifier": compile_stacking
+}
+
+def compile_model(model):
+    """Native predictor for a fitted model, or None when its type is not supported"""
+    compiler = COMPILERS.get(type(model).__name__)
+    if compiler is None:
+        return None
+    return compiler(model)
+
+def compile_verified(model, n_features, name="model", n_samples=256, atol=1e-5, seed=0):
+    """Compile a model and check it against the stock predict_proba on random inputs
+
+    Returns None (use the stock predictor) when the model is unsupported or
+    the native probabilities differ by more than atol.
+    """
+    try:
+        predictor = compile_model(model)
+    except Exception as e:
+        logger.warning(f"Native engine could not compile {name}: {e}")
+        return None
+    if predictor is None:
+        logger.info(f"Native engine does not support {name} ({type(model).__name__}) - using stock predictor")
+        return None
+
+    X = np.random.default_rng(seed).normal(size=(n_samples, n_features)) * 2.0
+    max_diff = float(np.max(np.abs(predictor.predict_proba(X) - model.predict_proba(X))))
+    if max_diff > atol:
+        logger.warning(f"Native {name} differs from stock predictor by {max_diff:.3g} - using stock predictor")
+        return None
+    logger.info(f"Native engine compiled {name} (max abs diff {max_diff:.3g})")
+    return predictor
+
+class SizeRoutedPredictor:
+    """Native engine for batches up to max_rows rows, the stock predictor above
+
+    Level-by-level traversal wins at small batch sizes where the stock
+    predictors are dominated by validation and dispatch overhead, but the
+    compiled C loops of scikit-learn/XGBoost win on large batches.
+    """
+
+    def __init__(self, native, stock, max_rows):
+        self.native = native
+        self.stock = stock
+        self.max_rows = max_rows
+
+    def predict_proba(self, X):
+        if X.shape[0] <= self.max_rows:
+            return self.native.predict_proba(X)
+        return self.stock.predict_proba(X)
+
+def _best_time(func, X, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func(X)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def calibrate_max_rows(native, stock, n_features, sizes=(1, 4, 16, 64, 256, 1024), seed=0):
+    """Largest batch size (from sizes) up to which the native engine is faster than the stock predictor"""
+    X = np.random.default_rng(seed).normal(size=(max(sizes), n_features))
+    max_rows = 0
+    for size in sizes:
+        if _best_time(native.predict_proba, X[:size]) >= _best_time(stock.predict_proba, X[:size]):
+            break
+        max_rows = size
+    return max_rows
+
+def compile_for_serving(model, n_features, name="model", max_rows=None, stock=None, native=None):
+    """Verified native predictor routed by batch size, or None to use the stock predictor
+
+    stock is the predictor used above max_rows (the model itself by default).
+    max_rows=None measures the crossover batch size on this machine. native
+    is an already compiled and verified predictor (e.g. from a bundle).
+    """
+    if native is None:
+        native = compile_verified(model, n_features, name)
+    if native is None:
+        return None
+    stock = stock or model
+    if max_rows is None:
+        max_rows = calibrate_max_rows(native, stock, n_features)
+    logger.info(f"Native engine serves {name} for batches up to {max_rows} rows")
+    return SizeRoutedPredictor(native, stock, max_rows)
@@ -0,0 +1,43 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class XGBoostInplacePredictor:
+    """Serves an XGBClassifier through Booster.inplace_predict
+
+    Skips the sklearn wrapper (DMatrix construction and input re-validation on
+    every call). The booster is extracted once and pinned to n_threads
+    (None keeps the model's own setting).
+    """
+
+    def __init__(self, model, n_threads=1):
+        self.booster = model.get_booster()
+        if n_threads is not None:
+            self.booster.set_param({"nthread": n_threads})
+        self.objective = model.get_xgb_params().get("objective") or "binary:logistic"
+        if self.objective not in ("multi:softprob", "multi:softmax", "binary:logistic"):
+            raise ValueError(f"Unsupported XGBoost objective for in-place prediction: {self.objective}")
+
+        # Same tree range as XGBClassifier.predict_proba (honours early stopping)
+        best_iteration = self.booster.attr("best_iteration")
+        self.iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+
+    def predict_proba(self, X):
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        if self.objective == "multi:softprob":
+            # Already class probabilities, identical to predict_proba
+            return self.booster.inplace_predict(
+                X32, iteration_range=self.iteration_range, validate_features=False
+            ).reshape(X32.shape[0], -1)
+
+        margin = self.booster.inplace_predict(
+            X32, iteration_range=self.iteration_range, predict_type="margin", validate_features=False
+        )
+        if self.objective == "multi:softmax":
+            # "value" would return labels here, convert margins to probabilities
+            margin = margin.reshape(X32.shape[0], -1)
+            exp_margin = np.exp(margin - np.max(margin, axis=1, keepdims=True))
+            return exp_margin / np.sum(exp_margin, axis=1, keepdims=True)
+        p = 1.0 / (1.0 + np.exp(-margin.reshape(-1)))
+        return np.column_stack([1.0 - p, p])
@@ -1,4 +1,4 @@
-# Server entry point for Fly.io
+# Single-process entry point for local runs; deployments use python -m api.serve
 from api.main import app
 
 if __name__ == "__main__":
@@ -1,5 +1,9 @@
 #!/bin/bash
 set -e
 PORT=${PORT:-8080}
-echo "Starting server on port $PORT"
-exec uvicorn api.main:app --host 0.0.0.0 --port $PORT --workers 1
\ No newline at end of file
+# api.serve forks WEB_CONCURRENCY workers after loading the models once; the
+# app also uses it to size its ensemble fan-out pool (see ENSEMBLE_THREADS in
+# api/main.py)
+export WEB_CONCURRENCY=${WEB_CONCURRENCY:-1}
+echo "Starting server on port $PORT with $WEB_CONCURRENCY worker(s)"
+exec python -m api.serve --host 0.0.0.0 --port $PORT
\ No newline at end of file
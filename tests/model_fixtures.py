@@ -0,0 +1,59 @@
+"""Small stand-in ensemble for tests that load a full models directory
+
+The preprocessing artifacts are copied from models/; the four ensemble
+members are tiny models trained on random features.
+"""
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from xgboost import XGBClassifier
+import joblib
+
+MODELS_DIR = Path(__file__).resolve().parent.parent / "models"
+
+PREPROCESSING_FILES = [
+    "scaler.pkl", "encoders.pkl", "target_encoder.pkl", "cat_cols.pkl",
+    "num_cols.pkl", "feature_order.pkl", "T_rf.pkl", "T_ens.pkl"
+]
+
+def write_fake_models(models_dir, seed=0):
+    """Write a complete set of artifacts to models_dir"""
+    models_dir = Path(models_dir)
+    models_dir.mkdir(parents=True, exist_ok=True)
+    for file_name in PREPROCESSING_FILES:
+        shutil.copyfile(MODELS_DIR / file_name, models_dir / file_name)
+
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(300, 14))
+    y = np.digitize(X[:, 6] + 0.3 * X[:, 3], [-0.5, 0.5])
+    models = {
+        "rf_model": RandomForestClassifier(n_estimators=5, max_depth=4, random_state=seed).fit(X[:, :13], y),
+        "xgb_model": XGBClassifier(n_estimators=5, max_depth=3, random_state=seed).fit(X, y),
+        "gb_model": GradientBoostingClassifier(n_estimators=5, max_depth=2, random_state=seed).fit(X[:, :13], y),
+        "hybrid_stack_model": LogisticRegression().fit(X[:, :13], y)
+    }
+    for name, model in models.items():
+        joblib.dump(model, models_dir / f"{name}.pkl")
+    return models_dir
+
+def use_models_dir(monkeypatch, main, models_dir):
+    """Point a fresh app lifecycle of api.main at models_dir"""
+    from api.registry import ModelRegistry
+    monkeypatch.setattr(main, "MODELS_DIR", Path(models_dir))
+    monkeypatch.setattr(main, "MODEL_BUNDLE", Path(models_dir) / "bundle")
+    monkeypatch.setattr(main, "MODEL_WATCH_INTERVAL", 0)
+    monkeypatch.setattr(main, "JOBS_DIR", Path(models_dir) / "jobs")
+    monkeypatch.setattr(main, "registry", ModelRegistry())
+    monkeypatch.setattr(main.app.state, "ready", False)
+
+def wait_until_ready(client, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.get("/readyz").status_code == 200:
+            return
+        time.sleep(0.05)
+    raise AssertionError("Models did not load")
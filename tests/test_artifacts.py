@@ -0,0 +1,123 @@
+import sys
+import os
+
+import joblib
+import pytest
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, StackingClassifier
+from sklearn.linear_model import LogisticRegression
+from xgboost import XGBClassifier
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.artifacts import ARTIFACT_FILES, artifact_paths, load_pickles, predictor_to_spec, predictor_from_spec
+from api.tree_engine import compile_model
+
+rng = np.random.default_rng(0)
+X_train = rng.normal(size=(300, 6))
+y_train = (X_train[:, 0] > 0).astype(int) + (X_train[:, 1] > 1).astype(int)
+X_test = rng.normal(size=(200, 6))
+
+def test_native_predictors_round_trip_through_memory_mapped_arrays(tmp_path):
+    models = {
+        "rf": RandomForestClassifier(n_estimators=10, random_state=0).fit(X_train, y_train),
+        "gb": GradientBoostingClassifier(n_estimators=10, random_state=0).fit(X_train, y_train),
+        "xgb": XGBClassifier(n_estimators=10, max_depth=3).fit(X_train, y_train),
+        "hybrid": StackingClassifier(
+            [("rf", RandomForestClassifier(n_estimators=5, random_state=0))],
+            final_estimator=LogisticRegression()
+        ).fit(X_train, y_train)
+    }
+    for name, model in models.items():
+        predictor = compile_model(model)
+        arrays = {}
+        spec = predictor_to_spec(predictor, name, arrays)
+        assert spec is not None
+
+        mapped = {}
+        for key, array in arrays.items():
+            np.save(tmp_path / f"{key}.npy", array)
+            mapped[key] = np.load(tmp_path / f"{key}.npy", mmap_mode="r")
+
+        restored = predictor_from_spec(spec, mapped)
+        assert np.array_equal(restored.predict_proba(X_test), predictor.predict_proba(X_test))
+
+def test_load_pickles_reports_time_and_size_per_artifact(tmp_path):
+    for name, path in artifact_paths(tmp_path).items():
+        joblib.dump({"name": name}, path)
+    artifacts = load_pickles(tmp_path, max_workers=3)
+    report = artifacts.pop("load_report")
+    assert set(report) == set(ARTIFACT_FILES)
+    for name, path in artifact_paths(tmp_path).items():
+        assert artifacts[name] == {"name": name}
+        assert report[name]["bytes"] == path.stat().st_size
+        assert report[name]["seconds"] >= 0
+
+def test_bundle_round_trip_and_checksum_mismatch(tmp_path):
+    from api.artifacts import build_bundle, load_bundle
+    from tests.model_fixtures import write_fake_models
+    models_dir = write_fake_models(tmp_path / "models")
+    manifest = build_bundle(models_dir, tmp_path / "bundle")
+    artifacts = load_bundle(tmp_path / "bundle", verify=True)
+    pickles = load_pickles(models_dir)
+    assert set(manifest["sources"]) == set(ARTIFACT_FILES)
+
+    X = rng.normal(size=(50, 14))
+    for name, artifact, n_features in [("rf", "rf_model", 13), ("xgb", "xgb_model", 14), ("hybrid", "hybrid_stack_model", 13)]:
+        expected = pickles[artifact].predict_proba(X[:, :n_features])
+        np.testing.assert_allclose(artifacts[artifact].predict_proba(X[:, :n_features]), expected)
+        np.testing.assert_allclose(artifacts["native"][name].predict_proba(X[:, :n_features]), expected, rtol=1e-5, atol=1e-6)
+    assert artifacts["T_ens"] == pickles["T_ens"]
+
+    # Same size, different bytes
+    array_path = tmp_path / "bundle" / manifest["arrays"]["rf.threshold"]["file"]
+    data = bytearray(array_path.read_bytes())
+    data[-1] ^= 0xFF
+    array_path.write_bytes(bytes(data))
+    load_bundle(tmp_path / "bundle", verify=False)
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        load_bundle(tmp_path / "bundle", verify=True)
+
+def test_stale_bundle_falls_back_to_the_pickles(tmp_path):
+    from api import main
+    from api.artifacts import build_bundle, read_manifest, stale_sources
+    from tests.model_fixtures import write_fake_models
+    models_dir = write_fake_models(tmp_path / "models")
+    build_bundle(models_dir, models_dir / "bundle")
+    manifest = read_manifest(models_dir / "bundle")
+    assert stale_sources(manifest, models_dir) == []
+    assert "native" in main.read_model_artifacts(models_dir, models_dir / "bundle")
+
+    # Touching a pickle is not a change
+    os.utime(models_dir / "rf_model.pkl")
+    assert stale_sources(manifest, models_dir) == []
+
+    # Replacing one without rebuilding the bundle is
+    replacement = RandomForestClassifier(n_estimators=3, random_state=1).fit(rng.normal(size=(50, 13)), rng.integers(0, 3, 50))
+    joblib.dump(replacement, models_dir / "rf_model.pkl")
+    assert stale_sources(manifest, models_dir) == ["rf_model"]
+    artifacts = main.read_model_artifacts(models_dir, models_dir / "bundle")
+    assert "native" not in artifacts
+    assert artifacts["rf_model"].n_estimators == 3
+
+def test_rebuild_replaces_the_bundle_only_when_complete(tmp_path, monkeypatch):
+    from api import artifacts as artifacts_module
+    from api.artifacts import build_bundle, read_manifest
+    from tests.model_fixtures import write_fake_models
+    models_dir = write_fake_models(tmp_path / "models")
+    first = build_bundle(models_dir, tmp_path / "bundle")
+
+    def broken_compile(*args, **kwargs):
+        raise RuntimeError("build interrupted")
+
+    monkeypatch.setattr(artifacts_module, "compile_verified", broken_compile)
+    with pytest.raises(RuntimeError, match="build interrupted"):
+        build_bundle(models_dir, tmp_path / "bundle")
+    assert read_manifest(tmp_path / "bundle")["created_at"] == first["created_at"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["bundle", "models"]
+
+    monkeypatch.undo()
+    second = build_bundle(models_dir, tmp_path / "bundle")
+    assert read_manifest(tmp_path / "bundle")["created_at"] == second["created_at"] != first["created_at"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["bundle", "models"]
@@ -0,0 +1,58 @@
+import sys
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from tests.model_fixtures import use_models_dir, wait_until_ready, write_fake_models
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        yield client
+
+def test_batch_keeps_order_and_reports_invalid_rows(client):
+    records = [{**main.CANARY_INPUT, "Age": 20 + i} for i in range(6)]
+    records[1] = {**main.CANARY_INPUT, "Age": "old"}
+    records[4] = {key: value for key, value in main.CANARY_INPUT.items() if key != "Gender"}
+    body = client.post("/predict/batch", json={"records": records}).json()
+    assert [result["index"] for result in body["results"]] == list(range(6))
+    assert (body["succeeded"], body["failed"]) == (4, 2)
+    for i, result in enumerate(body["results"]):
+        if i in (1, 4):
+            assert result["prediction"] is None and result["error"].startswith("Invalid input data")
+        else:
+            assert result["error"] is None
+            single = client.post("/predict", json=records[i]).json()
+            assert result["prediction"]["predicted_class"] == single["predicted_class"]
+            assert result["prediction"]["ensemble_confidence"] == pytest.approx(single["ensemble_confidence"])
+
+def test_batch_isolates_rows_that_fail_to_score(client, monkeypatch):
+    predict_records = main.predict_records
+
+    def failing_predict_records(records, *args, **kwargs):
+        if any(record.Age == 99 for record in records):
+            raise ValueError("cannot score age 99")
+        return predict_records(records, *args, **kwargs)
+
+    monkeypatch.setattr(main, "predict_records", failing_predict_records)
+    records = [{**main.CANARY_INPUT, "Age": age} for age in (30, 99, 40)]
+    response = client.post("/predict/batch", json={"records": records})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+    assert body["results"][1]["error"] == "Prediction failed: cannot score age 99"
+    assert body["results"][0]["prediction"] is not None and body["results"][2]["prediction"] is not None
+
+def test_batch_over_the_limit_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(main, "BATCH_MAX_RECORDS", 3)
+    response = client.post("/predict/batch", json={"records": [main.CANARY_INPUT] * 4})
+    assert response.status_code == 413
+    assert client.post("/predict/batch", json={"records": [main.CANARY_INPUT] * 3}).status_code == 200
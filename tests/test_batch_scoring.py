@@ -0,0 +1,42 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from api.batch_scoring import score_file
+from api.preprocessing import INPUT_COLUMNS
+from api.tabular import resolve_columns
+from tests.model_fixtures import write_fake_models
+
+def test_output_matches_in_process_scoring_in_input_order(tmp_path):
+    models_dir = tmp_path / "models"
+    models_dir.mkdir()
+    write_fake_models(models_dir)
+    
+    rng = np.random.default_rng(0)
+    record = main.SleepInput.model_validate(main.CANARY_INPUT)
+    frame = pd.DataFrame([{column: getattr(record, attr) for attr, column in INPUT_COLUMNS.items()}] * 250)
+    frame["Age"] = rng.integers(18, 80, len(frame))
+    frame["Stress Level"] = rng.integers(1, 11, len(frame))
+    frame["row_id"] = np.arange(len(frame))
+    frame.to_csv(tmp_path / "input.csv", index=False)
+    
+    report = score_file(tmp_path / "input.csv", tmp_path / "output.csv", workers=2, chunk_rows=30, models_dir=models_dir)
+    assert report["rows"] == 250
+    assert report["chunks"] == 9
+    assert report["rows_per_second"] > 0
+    assert set(report["stage_ms"]) == {"read", "write", "validate", "preprocess", "predict", "format", "encode"}
+    
+    scored = pd.read_csv(tmp_path / "output.csv")
+    assert list(scored["row_id"]) == list(range(250))
+    
+    bundle = main.build_model_bundle(1, models_dir, models_dir / "bundle")
+    aliases = {attr: field.validation_alias for attr, field in main.SleepInput.model_fields.items()}
+    expected = main.score_frame(frame, resolve_columns(frame.columns, aliases), bundle)
+    assert list(scored["predicted_class"]) == list(expected["predicted_class"])
+    assert np.allclose(scored["ensemble_confidence"], expected["ensemble_confidence"])
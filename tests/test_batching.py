@@ -0,0 +1,64 @@
+import sys
+import os
+import asyncio
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.batching import MicroBatcher
+
+def test_concurrent_items_are_coalesced_in_order():
+    seen_batches = []
+
+    async def process_batch(items):
+        seen_batches.append(list(items))
+        return [ValueError("bad item") if item < 0 else item * 10 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(process_batch, max_batch_size=4, max_wait_ms=50)
+        results = await asyncio.gather(
+            *[batcher.submit(i) for i in [1, 2, -1, 3, 4, 5]],
+            return_exceptions=True
+        )
+        await batcher.close()
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+
+    assert results[:2] == [10, 20]
+    assert isinstance(results[2], ValueError)
+    assert results[3:] == [30, 40, 50]
+    assert [len(batch) for batch in seen_batches] == [4, 2]
+    stats = batcher.stats()
+    assert stats["batch_size"]["count"] == 2
+    assert stats["queue_delay_ms"]["count"] == 6
+
+def test_batches_overlap_up_to_the_concurrency_limit():
+    running = 0
+    peak = 0
+
+    async def process_batch(items):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return items
+
+    async def run(max_concurrent_batches):
+        batcher = MicroBatcher(process_batch, max_batch_size=2, max_wait_ms=1, max_concurrent_batches=max_concurrent_batches)
+        started = asyncio.get_running_loop().time()
+        results = await asyncio.gather(*[batcher.submit(i) for i in range(8)])
+        elapsed = asyncio.get_running_loop().time() - started
+        await batcher.close()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(run(2))
+    assert results == list(range(8))
+    assert peak == 2
+    # Four batches of two, two at a time
+    assert elapsed < 0.18
+
+    peak = 0
+    asyncio.run(run(1))
+    assert peak == 1
@@ -0,0 +1,60 @@
+import sys
+import os
+import asyncio
+
+import pytest
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from tests.model_fixtures import use_models_dir, write_fake_models
+from utils.benchmark import compare, run_suite
+
+def test_compare_flags_regressions_over_threshold():
+    baseline = {
+        "preprocess_input": {"median_ms": 0.05},
+        "POST /predict": {"median_ms": 10.0},
+        "predict_proba_rf[1]": {"median_ms": 2.0}
+    }
+    results = {
+        "preprocess_input": {"median_ms": 0.055},
+        "POST /predict": {"median_ms": 14.0},
+        "predict_proba_rf[1]": {"median_ms": 1.0},
+        "predict_proba_rf[32]": {"median_ms": 3.0}
+    }
+    rows, regressions = compare(results, baseline, threshold=0.25)
+    assert regressions == ["POST /predict"]
+    assert {case: status for case, _, _, _, status in rows} == {
+        "preprocess_input": "ok",
+        "POST /predict": "REGRESSION",
+        "predict_proba_rf[1]": "faster",
+        "predict_proba_rf[32]": "new"
+    }
+
+def test_suite_runs_every_case(tmp_path, monkeypatch):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    monkeypatch.setattr(main, "PREDICTION_CACHE_SIZE", 0)
+    monkeypatch.setattr(main, "JOB_WORKERS", 0)
+    results = asyncio.run(run_suite(min_time=0.01, rounds=1))
+    assert "preprocess_input" in results and "POST /predict" in results
+    for name in ("rf", "xgb", "gb", "hybrid"):
+        for batch_size in (1, 32, 1024):
+            assert results[f"predict_proba_{name}[{batch_size}]"]["iterations"] >= 5
+    assert all(timings["median_ms"] > 0 for timings in results.values())
+
+def test_require_baseline_fails_without_one(tmp_path, monkeypatch):
+    from utils import benchmark
+    async def fake_suite(min_time, rounds):
+        return {"preprocess_input": {"median_ms": 0.05}}
+    monkeypatch.setattr(benchmark, "run_suite", fake_suite)
+    # main() sets these; restored after the test
+    for name in ("PREDICTION_CACHE_SIZE", "MODEL_WATCH_INTERVAL", "JOB_WORKERS"):
+        monkeypatch.setenv(name, os.environ.get(name, ""))
+    monkeypatch.setattr(sys, "argv", ["benchmark.py", "--baseline", str(tmp_path / "missing.json")])
+    benchmark.main()
+    monkeypatch.setattr(sys, "argv", ["benchmark.py", "--baseline", str(tmp_path / "missing.json"), "--require-baseline"])
+    with pytest.raises(SystemExit) as exited:
+        benchmark.main()
+    assert exited.value.code == 2
@@ -0,0 +1,39 @@
+import sys
+import os
+import time
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.cache import PredictionCache, canonical_key
+
+def test_lru_eviction_and_counters():
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+
+def test_entries_expire_after_ttl():
+    cache = PredictionCache(max_entries=10, ttl_seconds=0.01)
+    cache.put("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_canonical_key_ignores_field_order_but_not_namespace():
+    first = canonical_key({"Age": 30, "Gender": "Male"}, namespace="1")
+    assert first == canonical_key({"Gender": "Male", "Age": 30}, namespace="1")
+    assert first != canonical_key({"Gender": "Male", "Age": 30}, namespace="2")
+
+def test_disabled_cache_counts_nothing():
+    cache = PredictionCache(max_entries=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["enabled"] is False
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (0, 0, 0)
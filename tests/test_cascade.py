@@ -0,0 +1,85 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from api.evaluation import evaluate_file
+from tests.model_fixtures import use_models_dir, wait_until_ready, write_fake_models
+from utils.synthetic_cohort import generate_chunks, write_cohort
+
+@pytest.fixture
+def bundle(tmp_path):
+    models_dir = write_fake_models(tmp_path)
+    return main.build_model_bundle(1, models_dir, models_dir / "bundle")
+
+def cohort_matrix(bundle, n_rows=500):
+    frame = next(generate_chunks(n_rows, chunk_rows=n_rows, seed=4))
+    records = [main.SleepInput.model_validate(record) for record in frame.drop(columns="expected_disorder").to_dict("records")]
+    return main.preprocess_records(records, bundle)
+
+@pytest.mark.parametrize("member", ["rf", "xgb"])
+def test_cascade_only_replaces_confident_rows(bundle, monkeypatch, member):
+    monkeypatch.setattr(main, "CASCADE_MEMBER", member)
+    X = cohort_matrix(bundle)
+    rf_full, ens_full = main.predict_calibrated_probs(X, bundle)
+    gate = dict(zip(["rf", "xgb"], main.predict_member_probas(X, bundle, names=["rf", "xgb"])))[member]
+    gate_cal = main.apply_temperature_scaling_probs(gate, main.cascade_temperature(bundle))
+    threshold = float(np.median(gate_cal.max(axis=1)))
+    monkeypatch.setattr(main, "CASCADE_THRESHOLD", threshold)
+
+    rf_cal, ens_cal, early_exit = main.predict_cascade_probs(X, bundle)
+    assert 0 < early_exit.sum() < len(X)
+    np.testing.assert_allclose(ens_cal[early_exit], gate_cal[early_exit])
+    np.testing.assert_allclose(rf_cal[early_exit], gate_cal[early_exit])
+    np.testing.assert_allclose(ens_cal[~early_exit], ens_full[~early_exit])
+    np.testing.assert_allclose(rf_cal[~early_exit], rf_full[~early_exit])
+
+def test_predict_reports_early_exits(tmp_path, monkeypatch):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    monkeypatch.setattr(main, "PREDICTION_CACHE_SIZE", 0)
+    monkeypatch.setattr(main, "CASCADE_ENABLED", True)
+    monkeypatch.setattr(main, "CASCADE_THRESHOLD", 0.0)
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        before = client.get("/stats").json()["cascade"]
+        response = client.post("/predict", json=main.CANARY_INPUT)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["confidence_note"].startswith("Early exit")
+        assert body["ensemble_confidence"] == body["rf_confidence"]
+        after = client.get("/stats").json()["cascade"]
+        assert after["enabled"] and after["early_exit_rows"] == before["early_exit_rows"] + 1
+
+        monkeypatch.setattr(main, "CASCADE_THRESHOLD", 1.01)
+        body = client.post("/predict", json=main.CANARY_INPUT).json()
+        monkeypatch.setattr(main, "CASCADE_ENABLED", False)
+        assert body == client.post("/predict", json=main.CANARY_INPUT).json()
+
+def test_evaluation_reports_cascade_tradeoff(tmp_path):
+    models_dir = write_fake_models(tmp_path / "models")
+    path = tmp_path / "cohort.parquet"
+    write_cohort(path, 2000, chunk_rows=800, seed=5)
+    report = evaluate_file(path, models_dir=models_dir, cascade_thresholds=[0.0, 0.9, 1.01])
+    rows = {row["threshold"]: row for row in report["cascade"]["thresholds"]}
+    assert rows[0.0]["early_exit_rate"] == 1.0
+    assert rows[0.0]["accuracy"] == report["member_accuracy"]["rf"]
+    assert rows[1.01]["early_exit_rate"] == 0.0 and rows[1.01]["accuracy_delta"] == 0.0
+    assert rows[1.01]["agreement"] == 1.0
+    assert main.CASCADE_THRESHOLD in rows
+
+def test_cascade_stats_without_metrics(bundle, monkeypatch):
+    monkeypatch.setattr(main, "METRICS_ENABLED", False)
+    monkeypatch.setattr(main, "CASCADE_THRESHOLD", 0.0)
+    exported = main.cascade_rows.value("early_exit")
+    before = main.cascade_stats(bundle)["early_exit_rows"]
+    X = cohort_matrix(bundle, n_rows=20)
+    main.predict_cascade_probs(X, bundle)
+    assert main.cascade_stats(bundle)["early_exit_rows"] == before + len(X)
+    assert main.cascade_rows.value("early_exit") == exported
@@ -0,0 +1,64 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from api.evaluation import CalibrationStats, evaluate_file
+from tests.model_fixtures import write_fake_models
+from utils.synthetic_cohort import write_cohort
+
+def test_calibration_matches_direct_computation():
+    rng = np.random.default_rng(0)
+    proba = rng.dirichlet(np.ones(3), size=1000)
+    y = rng.integers(0, 3, size=1000)
+    stats = CalibrationStats(n_bins=10)
+    for start in range(0, 1000, 300):
+        stats.update(proba[start:start + 300], y[start:start + 300])
+    report = stats.report()
+
+    confidence = proba.max(axis=1)
+    correct = proba.argmax(axis=1) == y
+    bins = np.minimum((confidence * 10).astype(int), 9)
+    ece = sum(abs(confidence[bins == b].mean() - correct[bins == b].mean()) * (bins == b).mean() for b in np.unique(bins))
+    onehot = np.eye(3)[y]
+    assert np.isclose(report["ece"], ece, atol=1e-6)
+    assert np.isclose(report["brier"], np.square(proba - onehot).sum(axis=1).mean(), atol=1e-6)
+    assert np.isclose(report["log_loss"], -np.log(proba[np.arange(1000), y]).mean(), atol=1e-6)
+    assert sum(row["count"] for row in report["reliability"]) == 1000
+
+def test_evaluate_file_agrees_with_score_frame(tmp_path):
+    models_dir = write_fake_models(tmp_path / "models")
+    path = tmp_path / "cohort.csv"
+    write_cohort(path, 3000, chunk_rows=1000, seed=2)
+    # One row without a label and one invalid row
+    frame = pd.read_csv(path, dtype={"Age": object})
+    frame.loc[0, "expected_disorder"] = None
+    frame.loc[1, "Age"] = "old"
+    frame.to_csv(path, index=False)
+
+    report = evaluate_file(path, chunk_rows=700, models_dir=models_dir)
+    assert report["rows"] == 3000 and report["invalid_rows"] == 1 and report["unlabeled_rows"] == 1
+    assert report["evaluated"] == 2998
+    assert np.array(report["confusion_matrix"]).sum() == 2998
+
+    # Same predictions as the serving path
+    from api.tabular import resolve_columns
+    bundle = main.build_model_bundle(1, models_dir, models_dir / "bundle")
+    aliases = {attr: field.validation_alias for attr, field in main.SleepInput.model_fields.items()}
+    scored = main.score_frame(frame.iloc[2:], resolve_columns(frame.columns, aliases), bundle)
+    expected = pd.crosstab(
+        pd.Categorical(scored["expected_disorder"], categories=report["classes"]),
+        pd.Categorical(scored["predicted_class"], categories=report["classes"]),
+        dropna=False
+    ).to_numpy()
+    assert report["confusion_matrix"] == expected.tolist()
+    assert report["accuracy"] == round(float((scored["expected_disorder"] == scored["predicted_class"]).mean()), 6)
+    assert set(report["member_accuracy"]) == {"rf", "xgb", "gb", "hybrid", "ensemble"}
+    for name in ("rf", "ensemble"):
+        assert report["calibration"][name]["raw"]["ece"] >= 0
+        assert report["calibration"][name]["calibrated"]["accuracy"] == report["calibration"][name]["raw"]["accuracy"]
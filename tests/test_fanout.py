@@ -0,0 +1,48 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from tests.model_fixtures import write_fake_models
+from utils.benchmark import benchmark_records
+
+@pytest.fixture
+def bundle(tmp_path):
+    models_dir = write_fake_models(tmp_path)
+    return main.build_model_bundle(1, models_dir, models_dir / "bundle")
+
+@pytest.fixture
+def fanout(monkeypatch):
+    """Fan-out over a 4-thread member pool; the session's executors are restored afterwards"""
+    previous = main.inference_executor, main.member_executor
+    monkeypatch.setattr(main, "ENSEMBLE_FANOUT", True)
+    monkeypatch.setattr(main, "ENSEMBLE_THREADS", 4)
+    # Keep start_executors from shutting the session's pools down
+    main.inference_executor = main.member_executor = None
+    main.start_executors()
+    yield
+    for executor in (main.inference_executor, main.member_executor):
+        executor.shutdown(wait=True)
+    main.inference_executor, main.member_executor = previous
+
+def test_fanout_matches_sequential_members(bundle, fanout, monkeypatch):
+    X = main.preprocess_records(benchmark_records(64), bundle)
+    fanned_out = main.predict_member_probas(X, bundle)
+    monkeypatch.setattr(main, "ENSEMBLE_FANOUT", False)
+    sequential = main.predict_member_probas(X, bundle)
+    assert len(fanned_out) == len(sequential) == len(main.ENSEMBLE_MEMBERS)
+    for expected, actual in zip(sequential, fanned_out):
+        np.testing.assert_array_equal(actual, expected)
+
+def test_start_executors_shuts_down_the_previous_pools(fanout):
+    previous = main.inference_executor, main.member_executor
+    main.start_executors()
+    for executor in previous:
+        with pytest.raises(RuntimeError):
+            executor.submit(int)
+    assert main.inference_executor.submit(int).result() == 0
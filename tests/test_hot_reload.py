@@ -0,0 +1,83 @@
+import sys
+import os
+import time
+
+import joblib
+from fastapi.testclient import TestClient
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from tests.model_fixtures import use_models_dir, wait_until_ready, write_fake_models
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return
+        time.sleep(0.05)
+    raise AssertionError("Timed out")
+
+def test_admin_reload_swaps_bundle_and_keeps_it_on_failure(tmp_path, monkeypatch):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        first = client.get("/readyz").json()["version"]
+        old_bundle = main.registry.primary
+        assert client.post("/predict", json=main.CANARY_INPUT).status_code == 200
+
+        assert client.post("/admin/reload").status_code == 401
+        assert client.post("/admin/reload", headers={"X-Admin-Token": "secret"}).status_code == 202
+        wait_for(lambda: client.get("/readyz").json()["version"] != first)
+        assert old_bundle.member_predictors["rf"] is not main.registry.primary.member_predictors["rf"]
+
+        # A broken artifact fails the reload; the previous bundle keeps serving
+        joblib.dump("not a model", tmp_path / "rf_model.pkl")
+        serving = main.registry.primary
+        client.post("/admin/reload", headers={"X-Admin-Token": "secret"})
+        wait_for(lambda: client.get("/readyz").json()["error"] is not None)
+        assert main.registry.primary is serving
+        assert client.get("/readyz").status_code == 200
+        assert client.post("/predict", json=main.CANARY_INPUT).status_code == 200
+
+def test_watcher_retries_a_failed_reload(tmp_path, monkeypatch):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    monkeypatch.setattr(main, "MODEL_WATCH_INTERVAL", 0.1)
+    build_model_bundle = main.build_model_bundle
+    failures = []
+
+    def flaky_build(*args, **kwargs):
+        # The first reload fails, as on a half-copied file
+        if main.registry.primary is not None and not failures:
+            failures.append(1)
+            raise ValueError("truncated pickle")
+        return build_model_bundle(*args, **kwargs)
+
+    monkeypatch.setattr(main, "build_model_bundle", flaky_build)
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        first = client.get("/readyz").json()["version"]
+        stat = (tmp_path / "rf_model.pkl").stat()
+        os.utime(tmp_path / "rf_model.pkl", (stat.st_atime, stat.st_mtime + 10))
+        # Retried without any further change to the files
+        wait_for(lambda: client.get("/readyz").json()["version"] != first)
+        assert failures == [1]
+        assert client.get("/readyz").json()["error"] is None
+
+def test_micro_batch_scores_each_request_with_its_routed_bundle(tmp_path, monkeypatch):
+    import asyncio
+    first = main.build_model_bundle(1, write_fake_models(tmp_path / "a", seed=0), tmp_path / "a" / "bundle")
+    second = main.build_model_bundle(2, write_fake_models(tmp_path / "b", seed=1), tmp_path / "b" / "bundle")
+    records = [main.SleepInput.model_validate({**main.CANARY_INPUT, "Age": age}) for age in range(20, 26)]
+    items = [(record, first if i % 2 else second) for i, record in enumerate(records)]
+    use_models_dir(monkeypatch, main, tmp_path / "a")
+    # Inside an app lifecycle, which owns the inference threads
+    with TestClient(main.app):
+        results = asyncio.run(main.run_batched_inference(items))
+    for (record, bundle), result in zip(items, results):
+        assert result == main.predict_records([record], bundle)[0]
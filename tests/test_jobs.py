@@ -0,0 +1,97 @@
+import sys
+import os
+import io
+import time
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from api.jobs import JobStore
+from tests.model_fixtures import use_models_dir, wait_until_ready, write_fake_models
+
+def records(n_rows):
+    return [{**main.CANARY_INPUT, "Age": 20 + i % 50} for i in range(n_rows)]
+
+def wait_for_job(client, job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    monkeypatch.setattr(main, "JOB_POLL_INTERVAL", 0.1)
+    monkeypatch.setattr(main, "JOB_CHUNK_ROWS", 40)
+    return tmp_path
+
+def test_inline_job_matches_batch_endpoint(models_dir):
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        submitted = client.post("/jobs", json={"records": records(100)})
+        assert submitted.status_code == 202
+        job_id = submitted.json()["job_id"]
+        assert client.get(f"/jobs/{job_id}/result").status_code in (200, 409)
+        
+        job = wait_for_job(client, job_id)
+        assert job["status"] == "succeeded"
+        assert job["rows_done"] == job["rows_total"] == 100
+        assert job["progress"] == 1.0
+        
+        scored = pd.read_csv(io.StringIO(client.get(job["result_url"]).text))
+        batch = client.post("/predict/batch", json={"records": records(100)}).json()["results"]
+        assert list(scored["predicted_class"]) == [item["prediction"]["predicted_class"] for item in batch]
+        assert list(scored["ensemble_confidence"]) == [item["prediction"]["ensemble_confidence"] for item in batch]
+        
+        assert client.get("/jobs/unknown").status_code == 404
+        missing = client.post("/jobs", json={"records": [{"Age": 30}]})
+        assert missing.status_code == 400
+
+def test_queued_job_survives_restart(models_dir, monkeypatch):
+    # No job processes in the first server: the job stays queued when it stops
+    monkeypatch.setattr(main, "JOB_WORKERS", 0)
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        job_id = client.post(
+            "/jobs/upload?output_format=csv",
+            files={"file": ("cohort.csv", pd.DataFrame(records(50)).to_csv(index=False), "text/csv")}
+        ).json()["job_id"]
+        time.sleep(0.3)
+        assert client.get(f"/jobs/{job_id}").json()["status"] == "queued"
+    
+    monkeypatch.setattr(main, "JOB_WORKERS", 1)
+    monkeypatch.setattr(main.app.state, "ready", False)
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        job = wait_for_job(client, job_id)
+        assert job["status"] == "succeeded"
+        result = client.get(job["result_url"])
+        assert 'filename="cohort_scored.csv"' in result.headers["content-disposition"]
+        assert len(pd.read_csv(io.StringIO(result.text))) == 50
+
+def test_expired_lease_requeues_then_fails(tmp_path):
+    store = JobStore(tmp_path)
+    store.create("a", "inline", "csv", "csv")
+    for attempt in range(2):
+        assert store.claim("dead-server", lease_seconds=-1)["attempts"] == attempt + 1
+        assert store.requeue_expired(max_attempts=2) == ["a"]
+    job = store.get("a")
+    assert job["status"] == "failed"
+    assert "2 attempts" in job["error"]
+    
+    # A stale owner cannot overwrite the outcome
+    store.create("b", "inline", "csv", "csv")
+    store.claim("dead-server", lease_seconds=-1)
+    store.requeue_expired(max_attempts=3)
+    store.claim("live-server", lease_seconds=30)
+    assert not store.finish("b", "dead-server", "failed", error="late")
+    assert store.finish("b", "live-server", "succeeded", rows_done=1)
@@ -0,0 +1,45 @@
+import sys
+import os
+import asyncio
+
+import httpx
+import pytest
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from tests.model_fixtures import use_models_dir, write_fake_models
+from utils.load_test import percentile, run_load
+
+def test_percentile_nearest_rank():
+    samples = list(range(1, 1001))
+    assert percentile(samples, 50) == 500
+    assert percentile(samples, 99) == 990
+    assert percentile(samples, 99.9) == 999
+    assert percentile([7], 99.9) == 7
+    assert percentile([], 50) is None
+
+@pytest.mark.parametrize("mode", ["closed", "open"])
+def test_load_against_in_process_app(tmp_path, monkeypatch, mode):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    monkeypatch.setattr(main, "JOB_WORKERS", 0)
+
+    async def scenario():
+        await main.app.router.startup()
+        try:
+            while not main.app.state.ready:
+                await asyncio.sleep(0.05)
+            transport = httpx.ASGITransport(app=main.app)
+            ok = await run_load("http://test/predict", mode, concurrency=4, rate=40, duration=0.5, warmup=0.1, transport=transport)
+            missing = await run_load("http://test/missing", "closed", concurrency=1, duration=0.1, warmup=0, transport=transport)
+            return ok, missing
+        finally:
+            await main.app.router.shutdown()
+
+    ok, missing = asyncio.run(scenario())
+    assert ok["succeeded"] > 0 and ok["failed"] == 0
+    assert ok["throughput_rps"] > 0
+    assert ok["latency_ms"]["p50"] <= ok["latency_ms"]["p99"] <= ok["latency_ms"]["max"]
+    assert missing["error_rate"] == 1.0 and "HTTP 404" in missing["errors"]
@@ -0,0 +1,19 @@
+import sys
+import os
+
+import pytest
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.memory import process_memory
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/smaps_rollup"), reason="needs /proc/<pid>/smaps_rollup")
+def test_unique_and_shared_add_up_to_rss():
+    memory = process_memory(os.getpid())
+    assert memory["rss"] > 0
+    assert memory["unique"] + memory["shared"] == memory["rss"]
+    assert memory["unique"] <= memory["pss"] <= memory["rss"]
+
+def test_missing_process_returns_none():
+    assert process_memory("no-such-pid") is None
@@ -0,0 +1,73 @@
+import sys
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from api.metrics import MetricsRegistry
+from tests.model_fixtures import use_models_dir, wait_until_ready, write_fake_models
+
+def sample(text, line_prefix):
+    """Value of the first exposition line starting with line_prefix"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_histogram_exposition():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+    counter = registry.counter("requests_total", "Requests", ("path",))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "a")
+    counter.inc('say "hi"\n')
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="a",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{stage="a",le="+Inf"} 4' in text
+    assert 'latency_seconds_sum{stage="a"} 4.05' in text
+    assert 'latency_seconds_count{stage="a"} 4' in text
+    assert 'requests_total{path="say \\"hi\\"\\n"} 1' in text
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    monkeypatch.setattr(main, "PREDICTION_CACHE_SIZE", 0)
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        yield client
+
+def test_predict_is_instrumented(client, monkeypatch):
+    before = client.get("/metrics").text
+    assert client.post("/predict", json=main.CANARY_INPUT).status_code == 200
+    assert client.post("/predict", json={**main.CANARY_INPUT, "Age": "old"}).status_code == 422
+    
+    def broken(records, bundle=None):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(main, "predict_records", broken)
+    assert client.post("/predict", json={**main.CANARY_INPUT, "Age": 41}).status_code == 500
+    
+    text = client.get("/metrics").text
+    def delta(prefix):
+        return sample(text, prefix) - sample(before, prefix)
+    
+    assert delta('http_requests_total{handler="predict_sleep_disorder",status="200"}') == 1
+    assert delta('http_request_errors_total{handler="predict_sleep_disorder",type="4xx"}') == 1
+    assert delta('http_request_errors_total{handler="predict_sleep_disorder",type="5xx"}') == 1
+    assert delta('http_request_duration_seconds_count{handler="predict_sleep_disorder"}') == 3
+    for stage in (
+        "validation", "preprocess", "predict_proba_rf", "predict_proba_xgb", "predict_proba_gb",
+        "predict_proba_hybrid", "temperature_scaling", "serialization"
+    ):
+        assert delta(f'prediction_stage_duration_seconds_count{{stage="{stage}",rows="1"}}') >= 1, stage
+    assert sum(delta(f'predictions_total{{handler="predict_sleep_disorder",predicted_class="{c}"}}')
+               for c in ("Healthy", "Insomnia", "Sleep Apnea")) == 1
+    assert sample(text, "http_requests_in_flight ") == 1  # the /metrics request itself
+    assert sample(text, "inference_in_flight ") == 0
+    assert sample(text, "models_ready ") == 1
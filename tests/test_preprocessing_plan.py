@@ -0,0 +1,77 @@
+import sys
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.preprocessing import PreprocessingPlan, INPUT_COLUMNS
+
+MODELS_DIR = Path(__file__).resolve().parent.parent / "models"
+
+scaler = joblib.load(MODELS_DIR / "scaler.pkl")
+encoders = joblib.load(MODELS_DIR / "encoders.pkl")
+cat_cols = joblib.load(MODELS_DIR / "cat_cols.pkl")
+feature_order = joblib.load(MODELS_DIR / "feature_order.pkl")
+
+def reference_preprocess(data):
+    """Original pandas implementation of preprocess_input"""
+    input_dict = {column: getattr(data, attr) for attr, column in INPUT_COLUMNS.items()}
+    df = pd.DataFrame([input_dict])
+    pulse_pressure = df['Systolic_BP'] - df['Diastolic_BP']
+    mean_arterial_pressure = df['Diastolic_BP'] + pulse_pressure / 3
+    df['Cardio_Load_Index'] = df['Heart Rate'] * mean_arterial_pressure
+    df['Stress_Sleep_Index'] = df['Stress Level'] * (6 - df['Quality of Sleep'])
+    for col in cat_cols:
+        if col in df.columns:
+            try:
+                df[col] = encoders[col].transform(df[col].astype(str))
+            except ValueError:
+                df[col] = 0
+    all_feature_cols = list(scaler.feature_names_in_) + ['Stress_Sleep_Index']
+    df_complete = df[all_feature_cols]
+    original_features_scaled = scaler.transform(df_complete[list(scaler.feature_names_in_)])
+    df_scaled = pd.DataFrame(original_features_scaled, columns=list(scaler.feature_names_in_))
+    df_scaled['Stress_Sleep_Index'] = df_complete['Stress_Sleep_Index'].values
+    return df_scaled[all_feature_cols].values
+
+def random_records(n, seed=0):
+    """Random inputs covering every known category plus an unseen one"""
+    rng = np.random.default_rng(seed)
+    occupations = list(encoders['Occupation'].classes_) + ['Pilot']
+    return [
+        SimpleNamespace(
+            Age=int(rng.integers(18, 80)),
+            Gender=str(rng.choice(encoders['Gender'].classes_)),
+            Occupation=str(rng.choice(occupations)),
+            BMI_Category=str(rng.choice(encoders['BMI Category'].classes_)),
+            Sleep_Duration=round(float(rng.uniform(2, 10)), 1),
+            Quality_of_Sleep=int(rng.integers(1, 6)),
+            Stress_Level=int(rng.integers(1, 11)),
+            Physical_Activity_Level=int(rng.integers(1, 11)),
+            Heart_Rate=int(rng.integers(50, 110)),
+            Daily_Steps=int(rng.integers(1000, 15000)),
+            Systolic_BP=int(rng.integers(100, 170)),
+            Diastolic_BP=int(rng.integers(60, 110))
+        )
+        for _ in range(n)
+    ]
+
+def test_single_row_matches_pandas_pipeline():
+    plan = PreprocessingPlan.from_artifacts(scaler, encoders, cat_cols, feature_order)
+    for record in random_records(200):
+        assert np.array_equal(plan.transform([record]), reference_preprocess(record))
+
+def test_batch_matches_row_by_row():
+    plan = PreprocessingPlan.from_artifacts(scaler, encoders, cat_cols, feature_order)
+    records = random_records(500, seed=1)
+    expected = np.vstack([reference_preprocess(record) for record in records])
+    out = np.empty((len(records), plan.n_features))
+    result = plan.transform(records, out=out)
+    assert result is out
+    assert np.array_equal(result, expected)
@@ -0,0 +1,60 @@
+import sys
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from tests.model_fixtures import use_models_dir, wait_until_ready, write_fake_models
+
+STAGES = [
+    "validation", "queue", "preprocess", "predict_proba_rf", "predict_proba_xgb",
+    "predict_proba_gb", "predict_proba_hybrid", "temperature_scaling", "serialization", "total"
+]
+
+def server_timing(response):
+    return {
+        name: float(duration.split("=")[1])
+        for name, duration in (metric.strip().split(";") for metric in response.headers["server-timing"].split(","))
+    }
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    monkeypatch.setattr(main, "PREDICTION_CACHE_SIZE", 0)
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "s3cret")
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        yield client
+
+@pytest.mark.parametrize("fanout", [False, True])
+def test_server_timing_covers_every_stage(tmp_path, monkeypatch, fanout):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    monkeypatch.setattr(main, "ENSEMBLE_FANOUT", fanout)
+    monkeypatch.setattr(main, "ENSEMBLE_THREADS", 2)
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        response = client.post("/predict", json=main.CANARY_INPUT)
+    timings = server_timing(response)
+    assert sorted(timings) == sorted(STAGES)
+    # Members overlap with fan-out, so only each stage is bounded by the total
+    assert max(timings.values()) == timings["total"]
+
+def test_profiling_needs_the_admin_token(client, monkeypatch):
+    assert client.post("/predict?profile=1", json=main.CANARY_INPUT).status_code == 401
+    
+    response = client.post("/predict?profile=1", json=main.CANARY_INPUT, headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["predicted_class"] == client.post("/predict", json=main.CANARY_INPUT).json()["predicted_class"]
+    functions = [f["function"] for f in body["profile"]["functions"]]
+    assert len(functions) == main.PROFILE_TOP_FUNCTIONS
+    assert any(name.endswith("(predict_records)") for name in functions)
+    
+    monkeypatch.setattr(main, "PROFILE_REQUESTS", True)
+    assert client.post("/predict?profile=1", json=main.CANARY_INPUT).status_code == 200
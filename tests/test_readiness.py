@@ -0,0 +1,65 @@
+import sys
+import os
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from tests.model_fixtures import use_models_dir, wait_until_ready, write_fake_models
+
+def wait_until_loaded(client, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/readyz")
+        if not response.json()["loading"]:
+            return response
+        time.sleep(0.05)
+    raise AssertionError("Model loading did not finish")
+
+def test_not_ready_without_artifacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "MODELS_DIR", tmp_path)
+    monkeypatch.setattr(main, "MODEL_BUNDLE", tmp_path / "bundle")
+    with TestClient(main.app) as client:
+        assert client.get("/livez").json() == {"status": "alive"}
+        response = wait_until_loaded(client)
+        assert response.status_code == 503
+        assert response.json()["status"] == "not ready"
+        assert "Required file not found" in response.json()["error"]
+        health = client.get("/health").json()
+        assert health["status"] == "degraded" and not health["ready"]
+
+def test_probes_answer_while_inference_threads_are_busy(tmp_path, monkeypatch):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    release = threading.Event()
+    started = threading.Semaphore(0)
+    predict_records = main.predict_records
+
+    def slow_predict_records(*args, **kwargs):
+        started.release()
+        release.wait(10)
+        return predict_records(*args, **kwargs)
+
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        monkeypatch.setattr(main, "predict_records", slow_predict_records)
+        # One request per inference thread, plus one waiting in the pool's queue
+        payloads = [{**main.CANARY_INPUT, "Sleep_Duration": 6.0 + i / 10} for i in range(main.INFERENCE_THREADS + 1)]
+        requests = [threading.Thread(target=client.post, args=("/predict",), kwargs={"json": payload}) for payload in payloads]
+        try:
+            for request in requests:
+                request.start()
+            for _ in range(main.INFERENCE_THREADS):
+                assert started.acquire(timeout=10)
+            for path in ("/health", "/livez"):
+                before = time.monotonic()
+                assert client.get(path).status_code == 200
+                assert time.monotonic() - before < 0.5
+        finally:
+            release.set()
+            for request in requests:
+                request.join(10)
@@ -0,0 +1,78 @@
+import sys
+import os
+import random
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from api.registry import ModelRegistry
+from tests.model_fixtures import use_models_dir, write_fake_models
+
+def fake_bundle(version):
+    return SimpleNamespace(version=version, source=f"/models/{version}")
+
+def prediction(predicted_class, confidence):
+    return SimpleNamespace(predicted_class=predicted_class, ensemble_confidence=confidence)
+
+def test_canary_receives_configured_share():
+    registry = ModelRegistry(canary_percent=25, rng=random.Random(0))
+    registry.set("primary", fake_bundle(1))
+    registry.set("canary", fake_bundle(2))
+    roles = [registry.route()[0] for _ in range(10000)]
+    assert abs(roles.count("canary") / len(roles) - 0.25) < 0.02
+
+def test_promote_replaces_primary_with_canary():
+    registry = ModelRegistry(canary_percent=100)
+    registry.set("primary", fake_bundle(1))
+    canary = fake_bundle(2)
+    registry.set("canary", canary)
+    registry.promote()
+    assert registry.primary is canary
+    assert registry.route() == ("primary", canary)
+    with pytest.raises(ValueError):
+        registry.promote()
+
+def test_comparison_records_agreement_and_latency_delta():
+    registry = ModelRegistry()
+    primary, shadow = fake_bundle(1), fake_bundle(2)
+    registry.record_comparison(primary, shadow, prediction("Healthy", 90.0), prediction("Healthy", 80.0), 2.0, 3.0)
+    registry.record_comparison(primary, shadow, prediction("Healthy", 90.0), prediction("Insomnia", 60.0), 2.0, 5.0)
+    # Scored in a micro-batch: compared, but without a primary time
+    registry.record_comparison(primary, shadow, prediction("Healthy", 90.0), prediction("Healthy", 90.0), None, 9.0)
+    comparison = registry.stats()["comparisons"]["v2 vs v1"]
+    assert comparison["compared"] == 3
+    assert comparison["agreement"] == 2 / 3
+    assert comparison["latency_delta_ms"]["count"] == 2
+    assert comparison["latency_delta_ms"]["mean"] == 2.0
+
+def test_shadow_bundle_is_compared_off_the_request_path(tmp_path, monkeypatch):
+    write_fake_models(tmp_path / "primary", seed=0)
+    write_fake_models(tmp_path / "shadow", seed=1)
+    use_models_dir(monkeypatch, main, tmp_path / "primary")
+    monkeypatch.setattr(main, "SHADOW_MODELS_DIR", str(tmp_path / "shadow"))
+
+    with TestClient(main.app) as client:
+        deadline = time.monotonic() + 30
+        while main.registry.get("shadow") is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        for age in range(20, 40):
+            assert client.post("/predict", json={**main.CANARY_INPUT, "Age": age}).status_code == 200
+        while main.registry.shadow_pending and time.monotonic() < deadline:
+            time.sleep(0.05)
+        comparisons = client.get("/stats").json()["registry"]["comparisons"]
+        (comparison,) = comparisons.values()
+        assert comparison["compared"] == 20
+        assert comparison["latency_delta_ms"]["count"] == 20
+        # A cache hit is not compared again
+        assert client.post("/predict", json={**main.CANARY_INPUT, "Age": 20}).status_code == 200
+        time.sleep(0.2)
+        registry = client.get("/stats").json()["registry"]
+        assert registry["comparisons"][next(iter(comparisons))]["compared"] == 20
+        assert "response cache" in registry["shadow"]["scope"]
+        assert 0 <= comparison["agreement"] <= 1
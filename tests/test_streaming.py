@@ -0,0 +1,53 @@
+import sys
+import os
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from api.streaming import iter_ndjson
+from tests.model_fixtures import use_models_dir, wait_until_ready, write_fake_models
+
+def collect(chunks, max_line_bytes=65536):
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    async def run():
+        return [line async for line in iter_ndjson(source(), max_line_bytes)]
+
+    return asyncio.run(run())
+
+def test_lines_split_across_chunks():
+    assert collect([b'{"a": 1}\n{"a"', b': 2}\n\n', b'{"a": 3}']) == [({"a": 1}, None), ({"a": 2}, None), ({"a": 3}, None)]
+
+def test_invalid_and_oversized_lines_are_reported_and_skipped():
+    lines = collect([b'{"a": 1}\nnot json\n', b'{"a": "' + b'x' * 40, b'x' * 40 + b'"}\n{"a": 2}\n'], max_line_bytes=32)
+    assert lines[0] == ({"a": 1}, None)
+    assert lines[1][0] is None and lines[1][1].startswith("Invalid JSON")
+    assert lines[2] == (None, "Line longer than 32 bytes")
+    assert lines[3] == ({"a": 2}, None)
+    assert len(lines) == 4
+
+def test_stream_endpoint_scores_chunks_in_order(tmp_path, monkeypatch):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    monkeypatch.setattr(main, "STREAM_CHUNK_ROWS", 100)
+
+    def body():
+        for i in range(250):
+            line = "{broken" if i == 120 else json.dumps({**main.CANARY_INPUT, "Age": 20 + i % 50})
+            yield (line + "\n").encode()
+
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        response = client.post("/predict/stream", content=body())
+        assert response.status_code == 200
+        results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result["index"] for result in results] == list(range(250))
+    assert results[120]["prediction"] is None and results[120]["error"].startswith("Invalid JSON")
+    assert all(result["prediction"] is not None for i, result in enumerate(results) if i != 120)
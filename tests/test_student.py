@@ -0,0 +1,73 @@
+import sys
+import os
+import time
+
+import joblib
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from tests.model_fixtures import use_models_dir, wait_until_ready, write_fake_models
+from utils.distill_student import distill
+
+@pytest.fixture(scope="module")
+def distilled(tmp_path_factory):
+    models_dir = write_fake_models(tmp_path_factory.mktemp("models"))
+    student, report = distill(models_dir, rows=2000, kind="logistic")
+    joblib.dump(student, models_dir / "student_model.pkl")
+    return models_dir, student, report
+
+def test_distill_reports_fidelity(distilled):
+    _, student, report = distilled
+    assert student.n_features_in_ == 14
+    holdout = report["fidelity"]["holdout"]
+    assert holdout["rows"] == report["data"]["holdout_rows"]
+    assert holdout["agreement"] > 0.8
+    assert report["fidelity"]["holdout_profiles"]["labeled_rows"] > 0
+    assert report["fidelity"]["reference"]["rows"] == report["data"]["reference_rows"] > 0
+    assert set(report["latency_ms"]) == {"student", "ensemble"}
+
+def test_predict_student_mode(distilled, monkeypatch):
+    models_dir, student, _ = distilled
+    use_models_dir(monkeypatch, main, models_dir)
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        assert client.get("/stats").json()["models"]["student"] is not None
+        response = client.post("/predict?mode=student", json=main.CANARY_INPUT)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["confidence_note"] == main.STUDENT_NOTE
+        assert body["ensemble_confidence"] == body["rf_confidence"]
+        # Cached separately from the ensemble's answer
+        assert client.post("/predict", json=main.CANARY_INPUT).json()["confidence_note"] != main.STUDENT_NOTE
+        response = client.post("/predict/batch?mode=student", json={"records": [main.CANARY_INPUT] * 3})
+        assert response.status_code == 200
+        assert all(result["prediction"]["confidence_note"] == main.STUDENT_NOTE for result in response.json()["results"])
+        # Student latency is kept apart from the ensemble's per-version latency
+        requests = client.get("/stats").json()["registry"]["requests"]
+        assert any(label.endswith(":student") for label in requests)
+
+def test_student_mode_without_student(tmp_path, monkeypatch):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        assert client.get("/stats").json()["models"]["student"] is None
+        response = client.post("/predict?mode=student", json=main.CANARY_INPUT)
+        assert response.status_code == 400
+        assert client.post("/predict?mode=fast", json=main.CANARY_INPUT).status_code == 422
+
+def test_default_student_mode_without_student_is_not_ready(tmp_path, monkeypatch):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    monkeypatch.setattr(main, "PREDICTION_MODE", "student")
+    with TestClient(main.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/readyz").json()["error"] is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        assert "student_model.pkl" in response.json()["error"]
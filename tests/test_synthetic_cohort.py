@@ -0,0 +1,52 @@
+import sys
+import os
+import random
+
+import pandas as pd
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.synthetic_cohort import LABEL_COLUMN, PROFILES, generate_chunks, write_cohort
+
+def test_chunks_follow_the_profiles_and_are_seeded():
+    frame = pd.concat(generate_chunks(5000, chunk_rows=1500, seed=3))
+    assert len(frame) == 5000
+    for name, profile in PROFILES.items():
+        rows = frame[frame[LABEL_COLUMN] == name]
+        assert len(rows) > 0
+        for column, spec in profile.items():
+            if spec[0] == "choice":
+                assert set(rows[column].astype(object)) <= set(spec[1])
+            else:
+                assert rows[column].min() >= spec[1] and rows[column].max() <= spec[2]
+    again = pd.concat(generate_chunks(5000, chunk_rows=1500, seed=3))
+    assert frame.equals(again)
+
+def test_random_cases_follow_the_same_profiles():
+    from utils.random_test_cases import generate_random_case
+    random.seed(5)
+    for i in range(300):
+        case = generate_random_case(i)
+        for column, spec in PROFILES[case["expected_disorder"]].items():
+            value = case["data"][column]
+            if spec[0] == "choice":
+                assert value in spec[1]
+            else:
+                assert spec[1] <= value <= spec[2]
+
+def test_formats_hold_the_same_rows(tmp_path):
+    frames = {}
+    for fmt in ("ndjson", "csv", "parquet"):
+        path = tmp_path / f"cohort.{fmt}"
+        write_cohort(path, 2500, chunk_rows=1000, seed=1)
+        if fmt == "ndjson":
+            frames[fmt] = pd.read_json(path, lines=True)
+        elif fmt == "csv":
+            frames[fmt] = pd.read_csv(path)
+        else:
+            frames[fmt] = pd.read_parquet(path)
+    expected = frames["parquet"].astype(str)
+    assert len(expected) == 2500
+    assert frames["csv"].astype(str).equals(expected)
+    assert frames["ndjson"].astype(str).equals(expected)
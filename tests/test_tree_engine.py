@@ -0,0 +1,54 @@
+import sys
+import os
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, StackingClassifier
+from sklearn.linear_model import LogisticRegression
+from xgboost import XGBClassifier
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.tree_engine import compile_model, compile_for_serving
+
+rng = np.random.default_rng(0)
+X_train = rng.normal(size=(300, 6))
+y_train = (X_train[:, 0] + X_train[:, 1] > 0).astype(int) + (X_train[:, 2] > 1).astype(int)
+X_test = rng.normal(size=(500, 6))
+
+def assert_matches_stock(model, atol):
+    predictor = compile_model(model)
+    assert predictor is not None
+    np.testing.assert_allclose(predictor.predict_proba(X_test), model.predict_proba(X_test), atol=atol)
+
+def test_random_forest():
+    assert_matches_stock(RandomForestClassifier(n_estimators=20, random_state=0).fit(X_train, y_train), atol=1e-12)
+
+def test_gradient_boosting():
+    assert_matches_stock(GradientBoostingClassifier(n_estimators=30, random_state=0).fit(X_train, y_train), atol=1e-12)
+
+def test_xgboost():
+    model = XGBClassifier(n_estimators=30, max_depth=4, objective="multi:softprob").fit(X_train, y_train)
+    assert_matches_stock(model, atol=1e-5)
+
+def test_stacking():
+    model = StackingClassifier(
+        [("rf", RandomForestClassifier(n_estimators=10, random_state=0)),
+         ("gb", GradientBoostingClassifier(n_estimators=10, random_state=0))],
+        final_estimator=LogisticRegression()
+    ).fit(X_train, y_train)
+    assert_matches_stock(model, atol=1e-10)
+
+def test_missing_values_follow_default_direction():
+    model = XGBClassifier(n_estimators=10, max_depth=3).fit(X_train, y_train)
+    X_missing = X_test.copy()
+    X_missing[::3, 0] = np.nan
+    predictor = compile_model(model)
+    np.testing.assert_allclose(predictor.predict_proba(X_missing), model.predict_proba(X_missing), atol=1e-5)
+
+def test_size_routing_falls_back_to_stock_above_max_rows():
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X_train, y_train)
+    predictor = compile_for_serving(model, 6, max_rows=8)
+    assert predictor.max_rows == 8
+    np.testing.assert_allclose(predictor.predict_proba(X_test), model.predict_proba(X_test))
+    np.testing.assert_allclose(predictor.predict_proba(X_test[:4]), model.predict_proba(X_test[:4]))
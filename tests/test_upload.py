@@ -0,0 +1,144 @@
+import sys
+import os
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import main
+from api.preprocessing import INPUT_COLUMNS
+from tests.model_fixtures import use_models_dir, wait_until_ready, write_fake_models
+
+def cohort(n_rows):
+    record = main.SleepInput.model_validate(main.CANARY_INPUT)
+    frame = pd.DataFrame([{column: getattr(record, attr) for attr, column in INPUT_COLUMNS.items()}] * n_rows)
+    frame["Age"] = np.arange(n_rows) % 50 + 20
+    frame["patient_id"] = np.arange(n_rows)
+    return frame
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    write_fake_models(tmp_path)
+    use_models_dir(monkeypatch, main, tmp_path)
+    monkeypatch.setattr(main, "UPLOAD_CHUNK_ROWS", 40)
+    with TestClient(main.app) as client:
+        wait_until_ready(client)
+        yield client
+
+def test_csv_upload_matches_batch_endpoint(client):
+    frame = cohort(100)
+    frame["Sleep Duration"] = frame["Sleep Duration"].astype(object)
+    frame.loc[7, "Sleep Duration"] = "lots"
+    response = client.post("/predict/upload", files={"file": ("cohort.csv", frame.to_csv(index=False), "text/csv")})
+    assert response.status_code == 200
+    assert 'filename="cohort_scored.csv"' in response.headers["content-disposition"]
+    scored = pd.read_csv(io.StringIO(response.text))
+    assert list(scored["patient_id"]) == list(range(100))
+    assert scored.loc[7, "error"] == "Sleep Duration must be a number"
+    assert pd.isna(scored.loc[7, "predicted_class"])
+
+    records = [{**main.CANARY_INPUT, "Age": int(age)} for age in frame["Age"]]
+    batch = client.post("/predict/batch", json={"records": records}).json()["results"]
+    for i in range(100):
+        if i == 7:
+            continue
+        assert scored.loc[i, "predicted_class"] == batch[i]["prediction"]["predicted_class"]
+        assert scored.loc[i, "ensemble_confidence"] == batch[i]["prediction"]["ensemble_confidence"]
+        assert scored.loc[i, "rf_confidence"] == batch[i]["prediction"]["rf_confidence"]
+    assert [chunk["rows"] for chunk in client.get("/stats").json()["uploads"]["last"]["chunks"]] == [40, 40, 20]
+
+def test_infinite_values_are_row_errors(client):
+    frame = cohort(100)
+    frame.loc[3, "Sleep Duration"] = np.inf
+    frame.loc[60, "Heart Rate"] = -np.inf
+    response = client.post("/predict/upload", files={"file": ("cohort.csv", frame.to_csv(index=False), "text/csv")})
+    assert response.status_code == 200
+    scored = pd.read_csv(io.StringIO(response.text))
+    assert len(scored) == 100
+    assert scored.loc[3, "error"] == "Sleep Duration must be a number"
+    assert scored.loc[60, "error"] == "Heart Rate must be an integer"
+    assert scored["predicted_class"].notna().sum() == 98
+
+def test_row_that_fails_to_score_only_fails_itself(client, monkeypatch):
+    plan = main.registry.primary.preprocessing_plan
+    transform_columns = plan.transform_columns
+
+    def failing_transform_columns(columns, n_rows):
+        if (columns["Age"] == 33).any():
+            raise ValueError("cannot preprocess age 33")
+        return transform_columns(columns, n_rows=n_rows)
+
+    monkeypatch.setattr(plan, "transform_columns", failing_transform_columns)
+    frame = cohort(100)
+    response = client.post("/predict/upload", files={"file": ("cohort.csv", frame.to_csv(index=False), "text/csv")})
+    assert response.status_code == 200
+    scored = pd.read_csv(io.StringIO(response.text))
+    failed = scored["Age"] == 33
+    assert failed.sum() == 2
+    assert (scored.loc[failed, "error"] == "Prediction failed: cannot preprocess age 33").all()
+    assert scored.loc[~failed, "predicted_class"].notna().all()
+
+def test_missing_columns_are_rejected(client):
+    frame = cohort(5).drop(columns=["Systolic_BP"])
+    response = client.post("/predict/upload", files={"file": ("cohort.csv", frame.to_csv(index=False), "text/csv")})
+    assert response.status_code == 400
+    assert "Systolic_BP" in response.json()["detail"]
+
+def test_parquet_round_trip(client):
+    pytest.importorskip("pyarrow")
+    buffer = io.BytesIO()
+    cohort(100).to_parquet(buffer)
+    response = client.post("/predict/upload", files={"file": ("cohort.parquet", buffer.getvalue())})
+    assert response.status_code == 200
+    scored = pd.read_parquet(io.BytesIO(response.content))
+    assert len(scored) == 100
+    assert scored["error"].isna().all()
+    assert set(scored["predicted_class"]) <= {"Healthy", "Insomnia", "Sleep Apnea"}
+
+    # CSV in, Parquet out
+    response = client.post(
+        "/predict/upload?output_format=parquet",
+        files={"file": ("cohort.csv", cohort(100).to_csv(index=False), "text/csv")}
+    )
+    assert len(pd.read_parquet(io.BytesIO(response.content))) == 100
+
+def test_parquet_output_when_column_types_change_between_chunks(client):
+    pytest.importorskip("pyarrow")
+    frame = cohort(100)
+    # Numbers in the first chunks, text in the last one (chunks of 40 rows)
+    frame["Sleep Duration"] = frame["Sleep Duration"].astype(object)
+    frame.loc[70, "Sleep Duration"] = "lots"
+    frame["ward"] = frame["patient_id"].astype(object)
+    frame.loc[90, "ward"] = "icu"
+    response = client.post(
+        "/predict/upload?output_format=parquet",
+        files={"file": ("cohort.csv", frame.to_csv(index=False), "text/csv")}
+    )
+    assert response.status_code == 200
+    scored = pd.read_parquet(io.BytesIO(response.content))
+    assert len(scored) == 100
+    assert scored.loc[70, "error"] == "Sleep Duration must be a number"
+    assert pd.isna(scored.loc[70, "Sleep Duration"]) and scored.loc[69, "Sleep Duration"] == 7.0
+    assert scored.loc[90, "ward"] == "icu" and scored.loc[0, "ward"] == "0"
+    assert scored["error"].notna().sum() == 1
+
+def test_failed_chunk_aborts_the_response(client, monkeypatch):
+    score_frame = main.score_frame
+    calls = []
+
+    def failing_score_frame(frame, *args, **kwargs):
+        calls.append(len(frame))
+        if len(calls) == 2:
+            raise RuntimeError("model crashed")
+        return score_frame(frame, *args, **kwargs)
+
+    monkeypatch.setattr(main, "score_frame", failing_score_frame)
+    # Not a 200 with a truncated file: the error escapes the streamed response
+    with pytest.raises(Exception) as raised:
+        client.post("/predict/upload", files={"file": ("cohort.csv", cohort(100).to_csv(index=False), "text/csv")})
+    assert "model crashed" in str(raised.value) or raised.group_contains(RuntimeError, match="model crashed")
@@ -0,0 +1,26 @@
+import sys
+import os
+
+import numpy as np
+from xgboost import XGBClassifier
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.xgb_serving import XGBoostInplacePredictor
+
+rng = np.random.default_rng(0)
+X_train = rng.normal(size=(300, 5))
+y_train = (X_train[:, 0] > 0).astype(int) + (X_train[:, 1] > 0.5).astype(int)
+X_test = rng.normal(size=(200, 5))
+
+def test_softprob_matches_predict_proba_exactly():
+    model = XGBClassifier(n_estimators=20, objective="multi:softprob").fit(X_train, y_train)
+    predictor = XGBoostInplacePredictor(model)
+    assert np.array_equal(predictor.predict_proba(X_test), model.predict_proba(X_test))
+    assert predictor.predict_proba(X_test[:1]).shape == (1, 3)
+
+def test_binary_margins_are_converted_to_probabilities():
+    model = XGBClassifier(n_estimators=20).fit(X_train, (y_train > 0).astype(int))
+    predictor = XGBoostInplacePredictor(model)
+    np.testing.assert_allclose(predictor.predict_proba(X_test), model.predict_proba(X_test), atol=1e-6)
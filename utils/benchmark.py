@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Get the directory of this script
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+BATCH_SIZES = (1, 32, 1024)
+DEFAULT_BASELINE = BASE_DIR / "benchmarks" / "baseline.json"
+
+def time_call(fn, min_time=0.5, max_iterations=10000, warmup=3):
+    """Per-call timings of fn in milliseconds: at least 5 calls, until min_time seconds have passed"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_iterations and (len(samples) < 5 or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return summarize(samples)
+
+async def time_async_call(fn, min_time=0.5, max_iterations=10000, warmup=3):
+    """time_call for a coroutine function"""
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_iterations and (len(samples) < 5 or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return summarize(samples)
+
+def best_round(rounds, measure):
+    """Timings of the round with the lowest median: drift between rounds only ever adds time"""
+    return min((measure() for _ in range(rounds)), key=lambda timings: timings["median_ms"])
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "iterations": len(samples),
+        "median_ms": round(statistics.median(samples), 4),
+        "p90_ms": round(samples[int(len(samples) * 0.9)], 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "min_ms": round(samples[0], 4)
+    }
+
+def benchmark_records(n, seed=0):
+    """SleepInput records drawn from the random case generator (Healthy/Insomnia/Sleep Apnea profiles)"""
+    from api.main import SleepInput
+    from utils.random_test_cases import generate_random_case
+    random.seed(seed)
+    return [SleepInput.model_validate(generate_random_case(i)["data"]) for i in range(n)]
+
+async def run_suite(min_time=0.5, rounds=3):
+    """Run every benchmark case in-process and return {case: timings}"""
+    import httpx
+    from api import main
+    from api.artifacts import ENSEMBLE_MEMBERS
+    from utils.load_test import case_payloads
+
+    await main.app.router.startup()
+    try:
+        while not main.app.state.ready:
+            if main.app.state.load_error:
+                raise RuntimeError(f"Models failed to load: {main.app.state.load_error}")
+            await asyncio.sleep(0.05)
+        bundle = main.registry.primary
+        records = benchmark_records(max(BATCH_SIZES))
+        X = main.preprocess_records(records, bundle)
+        results = {}
+
+        def bench(fn):
+            return best_round(rounds, lambda: time_call(fn, min_time))
+
+        results["preprocess_input"] = bench(lambda: main.preprocess_input(records[0], bundle))
+        for name, _, n_features in ENSEMBLE_MEMBERS:
+            model = bundle.member_predictors[name]
+            for batch_size in BATCH_SIZES:
+                X_batch = X[:batch_size, :n_features]
+                results[f"predict_proba_{name}[{batch_size}]"] = bench(lambda: model.predict_proba(X_batch))
+        rf_proba = bundle.member_predictors["rf"].predict_proba(X[:, :13])
+        for batch_size in (1, max(BATCH_SIZES)):
+            probs = rf_proba[:batch_size]
+            results[f"apply_temperature_scaling_probs[{batch_size}]"] = bench(
+                lambda: main.apply_temperature_scaling_probs(probs, bundle.T_ens)
+            )
+
+        # Full route through the ASGI app with the load test's payloads: generated
+        # cases, made distinct by tiny offsets so the response cache never hits
+        payloads = case_payloads("random", seed=0, unique=True)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            async def predict():
+                response = await client.post("/predict", json=next(payloads))
+                response.raise_for_status()
+            rounds_timings = [await time_async_call(predict, min_time, max_iterations=len(records) * 30) for _ in range(rounds)]
+            results["POST /predict"] = min(rounds_timings, key=lambda timings: timings["median_ms"])
+        return results
+    finally:
+        await main.app.router.shutdown()
+
+def compare(results, baseline, threshold, min_delta_ms=0.01):
+    """Compare median timings with a baseline; returns (rows, regressions)
+
+    A case regresses when its median is more than threshold (a fraction)
+    above the baseline median and by more than min_delta_ms.
+    """
+    rows = []
+    regressions = []
+    for case, current in results.items():
+        reference = baseline.get(case)
+        if reference is None:
+            rows.append((case, None, current["median_ms"], None, "new"))
+            continue
+        change = current["median_ms"] / reference["median_ms"] - 1.0 if reference["median_ms"] > 0 else 0.0
+        regressed = change > threshold and current["median_ms"] - reference["median_ms"] > min_delta_ms
+        status = "REGRESSION" if regressed else "faster" if change < -threshold else "ok"
+        rows.append((case, reference["median_ms"], current["median_ms"], change, status))
+        if regressed:
+            regressions.append(case)
+    return rows, regressions
+
+def main():
+    """Benchmark the inference path in-process and check it against a stored baseline"""
+    parser = argparse.ArgumentParser(description="In-process benchmarks of preprocessing, each model, temperature scaling and /predict")
+    parser.add_argument("--models-dir", default=None, help="Directory with the artifact pickles (default: MODELS_DIR)")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline results to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--require-baseline", action="store_true", help="Exit non-zero when there is no baseline to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=float(os.getenv("BENCHMARK_REGRESSION_THRESHOLD", 0.25)),
+        help="Fail when a median is this fraction slower than the baseline (default 0.25)"
+    )
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds spent timing each case per round")
+    parser.add_argument("--rounds", type=int, default=3, help="Timing rounds per case; the fastest round is kept")
+    args = parser.parse_args()
+
+    # Measure the models, not the response cache or background work
+    os.environ["PREDICTION_CACHE_SIZE"] = "0"
+    os.environ["MODEL_WATCH_INTERVAL"] = "0"
+    os.environ["JOB_WORKERS"] = "0"
+    if args.models_dir:
+        os.environ["MODELS_DIR"] = args.models_dir
+
+    results = asyncio.run(run_suite(args.min_time, args.rounds))
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Baseline written to {baseline_path}")
+    if not baseline_path.exists():
+        for case, timings in results.items():
+            print(f"{case:45} {timings['median_ms']:10.4f} ms")
+        print(f"No baseline at {baseline_path} (create one with --update-baseline)")
+        if args.require_baseline:
+            sys.exit(2)
+        return
+
+    rows, regressions = compare(results, json.loads(baseline_path.read_text())["results"], args.threshold)
+    print(f"{'case':45} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for case, reference, current, change, status in rows:
+        reference = f"{reference:12.4f}" if reference is not None else f"{'-':>12}"
+        change = f"{change:+8.1%}" if change is not None else f"{'-':>8}"
+        print(f"{case:45} {reference} {current:12.4f} {change} {status}")
+    if regressions:
+        print(f"{len(regressions)} cases regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
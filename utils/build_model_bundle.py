@@ -0,0 +1,28 @@
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Get the directory of this script
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from api.artifacts import build_bundle
+
+def main():
+    """Build a memory-mappable model bundle from the individual pickles"""
+    parser = argparse.ArgumentParser(description="Build a consolidated model bundle from models/*.pkl")
+    parser.add_argument("--models-dir", default=str(BASE_DIR / "models"), help="Directory with the artifact pickles")
+    parser.add_argument("--output", default=str(BASE_DIR / "models" / "bundle"), help="Bundle directory to (re)create")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    manifest = build_bundle(args.models_dir, args.output)
+
+    print(f"Bundle written to {args.output}")
+    print(f"Artifacts: {len(manifest['artifacts'])}, arrays: {len(manifest['arrays'])}")
+    for name, spec in manifest["native"].items():
+        print(f"  {name}: {'native arrays' if spec is not None else 'estimator only'}")
+
+if __name__ == "__main__":
+    main()
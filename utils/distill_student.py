@@ -0,0 +1,212 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Get the directory of this script
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.benchmark import time_call
+from utils.synthetic_cohort import LABEL_COLUMN, generate_chunks
+
+STUDENTS = ("gbm", "logistic")
+
+def build_student(kind, seed=0):
+    """Unfitted student: a shallow gradient boosting model or a multinomial logistic model"""
+    if kind == "gbm":
+        from sklearn.ensemble import GradientBoostingClassifier
+        return GradientBoostingClassifier(n_estimators=60, max_depth=3, learning_rate=0.2, subsample=0.5, random_state=seed)
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(C=10.0, max_iter=2000)
+
+def synthetic_frame(rows, mix=0.5, seed=0):
+    """Profile cases, a mix fraction of them with every column shuffled independently
+
+    Shuffled rows combine values of different profiles, covering the space
+    between the clear-cut cases where the student must follow the ensemble.
+    Their labels are dropped.
+    """
+    frame = pd.concat(generate_chunks(rows, chunk_rows=max(rows, 1), seed=seed), ignore_index=True)
+    n_mixed = int(rows * mix)
+    rng = np.random.default_rng(seed + 1)
+    for column in frame.columns:
+        values = frame[column].to_numpy().copy()
+        values[:n_mixed] = rng.permutation(values[:n_mixed])
+        frame[column] = values
+    frame[LABEL_COLUMN] = frame[LABEL_COLUMN].astype(object)
+    frame.loc[:n_mixed - 1, LABEL_COLUMN] = None
+    frame["source"] = np.where(np.arange(rows) < n_mixed, "mixed", "profiles")
+    return frame
+
+def reference_frame(paths=()):
+    """The hand-written cases of utils/predict_cases.py plus any labeled or unlabeled CSV/Parquet files"""
+    from api.tabular import file_format, read_chunks
+    from utils.predict_cases import cases
+    frames = [pd.DataFrame([{**case["data"], LABEL_COLUMN: case["disorder"]} for case in cases])]
+    for path in paths:
+        with open(path, "rb") as source:
+            frames.extend(read_chunks(source, file_format(str(path)), 100000))
+    frame = pd.concat(frames, ignore_index=True)
+    frame["source"] = "reference"
+    return frame
+
+def teacher_outputs(frame, bundle):
+    """Preprocessed features, temperature-scaled ensemble probabilities and label indices (-1 if unknown) of the valid rows"""
+    from api import main
+    from api.evaluation import LABEL_COLUMNS, label_indices
+    from api.tabular import resolve_columns, validate_frame
+    aliases = {attr: field.validation_alias for attr, field in main.SleepInput.model_fields.items()}
+    columns, valid, _ = validate_frame(frame, resolve_columns(frame.columns, aliases))
+    X = bundle.preprocessing_plan.transform_columns(columns, n_rows=int(valid.sum()))
+    _, teacher = main.predict_calibrated_probs(X, bundle)
+    label_column = next((name for name in LABEL_COLUMNS if name in frame.columns), None)
+    if label_column is None:
+        y = np.full(len(X), -1)
+    else:
+        y = label_indices(frame[label_column], bundle.target_encoder.classes_)[valid]
+    return X, teacher, y, frame["source"].to_numpy()[valid]
+
+def fit_student(student, X, teacher):
+    """Fit on soft targets: each row once per class, weighted by the teacher's probability
+
+    Minimizes the cross-entropy with the teacher distribution for any
+    classifier that accepts sample weights.
+    """
+    k = teacher.shape[1]
+    student.fit(np.repeat(X, k, axis=0), np.tile(np.arange(k), len(X)), sample_weight=teacher.reshape(-1))
+    return student
+
+def fidelity(student_proba, teacher, y, classes):
+    """How closely the student follows the teacher (and the labels, where known)"""
+    if not len(teacher):
+        return None
+    teacher_class = teacher.argmax(axis=1)
+    student_class = student_proba.argmax(axis=1)
+    kl = (teacher * (np.log(np.clip(teacher, 1e-12, None)) - np.log(np.clip(student_proba, 1e-12, None)))).sum(axis=1)
+    labeled = y >= 0
+    report = {
+        "rows": int(len(teacher)),
+        "agreement": round(float((student_class == teacher_class).mean()), 6),
+        "agreement_by_class": {
+            name: round(float((student_class[teacher_class == i] == i).mean()), 6)
+            for i, name in enumerate(classes) if (teacher_class == i).any()
+        },
+        "mean_abs_confidence_diff": round(float(np.abs(student_proba.max(axis=1) - teacher.max(axis=1)).mean()), 6),
+        "p99_abs_probability_diff": round(float(np.quantile(np.abs(student_proba - teacher).max(axis=1), 0.99)), 6),
+        "mean_kl_divergence": round(float(kl.mean()), 6)
+    }
+    if labeled.any():
+        report["labeled_rows"] = int(labeled.sum())
+        report["student_accuracy"] = round(float((student_class[labeled] == y[labeled]).mean()), 6)
+        report["ensemble_accuracy"] = round(float((teacher_class[labeled] == y[labeled]).mean()), 6)
+    return report
+
+def distill(models_dir=None, bundle_dir=None, rows=50000, mix=0.5, references=(), kind="gbm", holdout=0.2, seed=0):
+    """Train a student on the ensemble's outputs; returns (student, fidelity report)"""
+    from api import main
+    if models_dir is None:
+        models_dir, bundle_dir = main.MODELS_DIR, bundle_dir or main.MODEL_BUNDLE
+    bundle_dir = bundle_dir or Path(models_dir) / "bundle"
+    bundle = main.build_model_bundle(1, Path(models_dir), Path(bundle_dir))
+    classes = list(bundle.target_encoder.classes_)
+
+    started = time.perf_counter()
+    X, teacher, y, source = teacher_outputs(synthetic_frame(rows, mix, seed), bundle)
+    X_ref, teacher_ref, y_ref, _ = teacher_outputs(reference_frame(references), bundle)
+    teacher_seconds = time.perf_counter() - started
+
+    # Synthetic holdout for the report; reference rows are all used for training
+    is_holdout = np.random.default_rng(seed).random(len(X)) < holdout
+    X_train = np.vstack([X[~is_holdout], X_ref])
+    teacher_train = np.vstack([teacher[~is_holdout], teacher_ref])
+    started = time.perf_counter()
+    student = fit_student(build_student(kind, seed), X_train, teacher_train)
+    fit_seconds = time.perf_counter() - started
+
+    predictor = main.build_student_predictor(student)
+    X_holdout, teacher_holdout, y_holdout, source_holdout = X[is_holdout], teacher[is_holdout], y[is_holdout], source[is_holdout]
+    student_holdout = predictor.predict_proba(X_holdout)
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "student": {"kind": kind, "type": type(student).__name__, "params": {k: v for k, v in student.get_params().items() if np.isscalar(v) or v is None}},
+        "teacher": {"source": str(models_dir), "T_ens": float(bundle.T_ens), "output": "temperature-scaled ensemble probabilities"},
+        "data": {
+            "synthetic_rows": int(len(X)),
+            "mixed_fraction": mix,
+            "reference_rows": int(len(X_ref)),
+            "train_rows": int(len(X_train)),
+            "holdout_rows": int(is_holdout.sum()),
+            "seed": seed
+        },
+        "fidelity": {
+            "holdout": fidelity(student_holdout, teacher_holdout, y_holdout, classes),
+            "holdout_profiles": fidelity(
+                student_holdout[source_holdout == "profiles"], teacher_holdout[source_holdout == "profiles"],
+                y_holdout[source_holdout == "profiles"], classes
+            ),
+            "holdout_mixed": fidelity(
+                student_holdout[source_holdout == "mixed"], teacher_holdout[source_holdout == "mixed"],
+                y_holdout[source_holdout == "mixed"], classes
+            ),
+            # Training rows: shows the student reproduces the hand-checked cases
+            "reference": fidelity(predictor.predict_proba(X_ref), teacher_ref, y_ref, classes)
+        },
+        "latency_ms": {
+            model: {
+                str(batch_size): time_call(lambda: predict(X_holdout[:batch_size]), min_time=0.3)["median_ms"]
+                for batch_size in (1, 1024)
+            }
+            for model, predict in (
+                ("student", predictor.predict_proba),
+                ("ensemble", lambda X_batch: main.predict_calibrated_probs(X_batch, bundle))
+            )
+        },
+        "seconds": {"teacher": round(teacher_seconds, 3), "fit": round(fit_seconds, 3)}
+    }
+    return student, report
+
+def main():
+    """Distill the temperature-scaled ensemble into a small student model"""
+    parser = argparse.ArgumentParser(description="Train a compact student model on the ensemble's temperature-scaled outputs")
+    parser.add_argument("--models-dir", default=None, help="Directory with the artifact pickles (default: MODELS_DIR)")
+    parser.add_argument("--bundle-dir", default=None, help="Model bundle directory (default: MODEL_BUNDLE)")
+    parser.add_argument("--student", choices=STUDENTS, default="gbm", help="gbm: 60 depth-3 trees; logistic: multinomial logistic regression")
+    parser.add_argument("--rows", type=int, default=50000, help="Synthetic rows (train and holdout)")
+    parser.add_argument("--mix", type=float, default=0.5, help="Fraction of synthetic rows with independently shuffled columns")
+    parser.add_argument("--reference", action="append", default=[], help="Extra CSV/Parquet rows to distill on (repeatable)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of synthetic rows kept for the fidelity report")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Student pickle (default: MODELS_DIR/student_model.pkl)")
+    parser.add_argument("--report", default=None, help="Fidelity report (default: next to the student, student_report.json)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from api import main as api_main
+    models_dir = Path(args.models_dir) if args.models_dir else api_main.MODELS_DIR
+    student, report = distill(
+        models_dir, args.bundle_dir, args.rows, args.mix, args.reference, args.student, args.holdout, args.seed
+    )
+    output = Path(args.output) if args.output else models_dir / "student_model.pkl"
+    joblib.dump(student, output)
+    report["student"]["bytes"] = output.stat().st_size
+    report_path = Path(args.report) if args.report else output.with_name("student_report.json")
+    report_path.write_text(json.dumps(report, indent=2))
+
+    holdout = report["fidelity"]["holdout"]
+    print(f"Student written to {output} ({report['student']['bytes'] / 1024:.0f} KB), report to {report_path}")
+    print(f"  holdout agreement with the ensemble: {holdout['agreement']:.2%}, mean |confidence diff| {holdout['mean_abs_confidence_diff']:.4f}")
+    if report["fidelity"]["reference"]:
+        print(f"  reference cases agreement: {report['fidelity']['reference']['agreement']:.2%}")
+    for model, latency in report["latency_ms"].items():
+        print(f"  {model}: {latency['1']} ms per row, {latency['1024']} ms per 1024 rows")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+# Get the directory of this script
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+DEFAULT_URL = "http://127.0.0.1:8000/predict"
+PERCENTILES = (50, 90, 99, 99.9)
+
+def case_payloads(source="random", seed=0, unique=False):
+    """Endless payloads from the existing case generators
+
+    source "random" draws from utils.random_test_cases.generate_random_case,
+    "fixed" cycles through the hand-written cases in utils.predict_cases.
+    With unique, Sleep_Duration gets a tiny per-request offset so the
+    response cache never answers.
+    """
+    if source == "fixed":
+        from utils.predict_cases import cases
+        cases = itertools.cycle(case["data"] for case in cases)
+    else:
+        from utils.random_test_cases import generate_random_case
+        random.seed(seed)
+        cases = (generate_random_case(i)["data"] for i in itertools.count(1))
+    for i, data in enumerate(cases):
+        if unique:
+            data = {**data, "Sleep_Duration": round(data["Sleep_Duration"] + (i % 10**6) * 1e-7, 7)}
+        yield data
+
+def percentile(samples, q):
+    """Nearest-rank percentile of sorted samples"""
+    if not samples:
+        return None
+    rank = max(math.ceil(len(samples) * q / 100.0), 1)
+    return samples[rank - 1]
+
+class LoadResults:
+    """Latencies and outcomes of the requests sent after the warmup"""
+
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.latencies = []
+        self.errors = Counter()
+        self.dropped = 0
+        self.first_sent = None
+        self.last_done = None
+
+    def record(self, scheduled, done, error=None):
+        if scheduled < self.measure_from:
+            return
+        if self.first_sent is None or scheduled < self.first_sent:
+            self.first_sent = scheduled
+        self.last_done = done if self.last_done is None else max(self.last_done, done)
+        if error is None:
+            self.latencies.append(done - scheduled)
+        else:
+            self.errors[error] += 1
+
+    def report(self):
+        latencies = sorted(self.latencies)
+        total = len(latencies) + sum(self.errors.values())
+        elapsed = (self.last_done - self.first_sent) if total else 0.0
+        ms = lambda seconds: round(seconds * 1000.0, 3) if seconds is not None else None
+        return {
+            "requests": total,
+            "succeeded": len(latencies),
+            "failed": sum(self.errors.values()),
+            "dropped": self.dropped,
+            "error_rate": round(sum(self.errors.values()) / total, 6) if total else 0.0,
+            "errors": dict(self.errors.most_common()),
+            "seconds": round(elapsed, 3),
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+            "latency_ms": {
+                **{f"p{q:g}": ms(percentile(latencies, q)) for q in PERCENTILES},
+                "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+                "max": ms(latencies[-1]) if latencies else None
+            }
+        }
+
+async def send(client, url, payload, results, scheduled):
+    """POST one payload; the latency counts from its scheduled send time"""
+    try:
+        response = await client.post(url, json=payload)
+        error = None if response.status_code < 400 else f"HTTP {response.status_code}"
+    except httpx.HTTPError as e:
+        error = type(e).__name__
+    results.record(scheduled, time.perf_counter(), error)
+
+async def closed_loop(client, url, payloads, concurrency, duration, warmup=0.0, think_time=0.0):
+    """concurrency users each sending a request as soon as their previous one completes"""
+    started = time.perf_counter()
+    results = LoadResults(started + warmup)
+    deadline = started + warmup + duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            await send(client, url, next(payloads), results, time.perf_counter())
+            if think_time:
+                await asyncio.sleep(think_time)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return results
+
+async def open_loop(client, url, payloads, rate, duration, warmup=0.0, max_in_flight=1000, poisson=False, seed=0):
+    """Requests arriving at a fixed rate, whether or not earlier ones have completed
+
+    Latencies are measured from each request's scheduled arrival, so a
+    server (or client) falling behind shows up in the percentiles instead
+    of silently lowering the offered load. Arrivals that would exceed
+    max_in_flight outstanding requests are dropped and counted.
+    """
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    results = LoadResults(started + warmup)
+    deadline = started + warmup + duration
+    pending = set()
+    scheduled = started
+    while scheduled < deadline:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(pending) >= max_in_flight:
+            if scheduled >= results.measure_from:
+                results.dropped += 1
+        else:
+            task = asyncio.create_task(send(client, url, next(payloads), results, scheduled))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        scheduled += rng.expovariate(rate) if poisson else 1.0 / rate
+    if pending:
+        await asyncio.gather(*pending)
+    return results
+
+async def run_load(url, mode="closed", concurrency=10, rate=50.0, duration=30.0, warmup=2.0,
+                   source="random", unique=False, seed=0, timeout=30.0, think_time=0.0,
+                   max_in_flight=1000, poisson=False, transport=None):
+    """Run one load test against url and return its report"""
+    payloads = case_payloads(source, seed, unique)
+    pool_size = concurrency if mode == "closed" else max_in_flight
+    limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, transport=transport) as client:
+        if mode == "closed":
+            results = await closed_loop(client, url, payloads, concurrency, duration, warmup, think_time)
+        else:
+            results = await open_loop(client, url, payloads, rate, duration, warmup, max_in_flight, poisson, seed)
+    report = results.report()
+    report["mode"] = mode
+    report["concurrency" if mode == "closed" else "offered_rps"] = concurrency if mode == "closed" else rate
+    return report
+
+def print_report(report):
+    latency = report["latency_ms"]
+    load = f"{report['concurrency']} users" if report["mode"] == "closed" else f"{report['offered_rps']} req/s offered"
+    print(f"Mode: {report['mode']} ({load})")
+    print(f"Requests: {report['requests']} in {report['seconds']}s, {report['throughput_rps']} req/s succeeded")
+    print(f"Errors: {report['failed']} ({report['error_rate']:.2%})" + (f" {report['errors']}" if report["errors"] else ""))
+    if report["dropped"]:
+        print(f"Dropped (client at max in-flight): {report['dropped']}")
+    print("Latency ms: " + ", ".join(f"{name} {value}" for name, value in latency.items()))
+
+def main():
+    """Drive concurrent traffic at the prediction endpoint and report latency percentiles"""
+    parser = argparse.ArgumentParser(description="Concurrent load test for the prediction API")
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"Endpoint to POST cases to (default {DEFAULT_URL})")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed",
+                        help="closed: N concurrent users; open: fixed arrival rate")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent users (closed loop)")
+    parser.add_argument("--rate", type=float, default=50.0, help="Arrivals per second (open loop)")
+    parser.add_argument("--poisson", action="store_true", help="Exponential inter-arrival times instead of a fixed interval (open loop)")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Outstanding request cap; later arrivals are dropped (open loop)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds of load before measuring")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pause between a user's requests (closed loop)")
+    parser.add_argument("--cases", choices=["random", "fixed"], default="random",
+                        help="random: random_test_cases generator; fixed: the predict_cases list")
+    parser.add_argument("--unique", action="store_true", help="Make every payload distinct so the response cache never hits")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--output", default=None, help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load(
+        args.url, args.mode, args.concurrency, args.rate, args.duration, args.warmup,
+        args.cases, args.unique, args.seed, args.timeout, args.think_time, args.max_in_flight, args.poisson
+    ))
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
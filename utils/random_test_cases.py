@@ -22,71 +22,79 @@ QUALITY_OF_SLEEP_MAP = {1: "Poor", 2: "Fair", 3: "Good", 4: "Very Good", 5: "Exc
 STRESS_LEVEL_MAP = {1: "Minimal", 2: "Low", 4: "Moderate", 9: "High", 10: "Very High"}
 PHYSICAL_ACTIVITY_MAP = {1: "Sedentary", 3: "Light", 5: "Moderate", 8: "Active", 10: "Very Active"}
 
+# Case types and how often generate_random_case draws each
+CASE_TYPES = ["Healthy", "Insomnia", "Sleep Apnea"]
+CASE_TYPE_WEIGHTS = [0.4, 0.4, 0.2]
+
+# Per-class field distributions, also used by utils/synthetic_cohort.py:
+# ("int", low, high) inclusive, ("uniform", low, high) rounded to one
+# decimal, ("choice", values, weights or None for uniform)
+PROFILES = {
+    "Healthy": {
+        "Age": ("int", 20, 50),
+        "Gender": ("choice", VALID_GENDERS, None),
+        "Occupation": ("choice", VALID_OCCUPATIONS, None),
+        "BMI_Category": ("choice", ["Normal"], None),
+        "Sleep_Duration": ("uniform", 7.0, 9.0),
+        "Quality_of_Sleep": ("choice", [3, 4, 5], [0.1, 0.4, 0.5]),  # Mostly good to excellent
+        "Stress_Level": ("choice", [1, 2, 4], [0.6, 0.3, 0.1]),  # Mostly low stress
+        "Physical_Activity_Level": ("choice", [5, 8, 10], [0.2, 0.4, 0.4]),  # Moderately to very active
+        "Heart_Rate": ("int", 55, 70),
+        "Daily_Steps": ("int", 7000, 12000),
+        "Systolic_BP": ("int", 110, 125),
+        "Diastolic_BP": ("int", 70, 80)
+    },
+    "Insomnia": {
+        "Age": ("int", 25, 55),
+        "Gender": ("choice", VALID_GENDERS, None),
+        "Occupation": ("choice", VALID_OCCUPATIONS, None),
+        "BMI_Category": ("choice", ["Normal", "Overweight"], None),
+        "Sleep_Duration": ("uniform", 2.0, 5.0),
+        "Quality_of_Sleep": ("choice", [1, 2], [0.7, 0.3]),  # Mostly poor to fair
+        "Stress_Level": ("choice", [9, 10], [0.4, 0.6]),  # Mostly high to very high stress
+        "Physical_Activity_Level": ("choice", [1, 3], [0.7, 0.3]),  # Mostly sedentary to light
+        "Heart_Rate": ("int", 80, 100),
+        "Daily_Steps": ("int", 2000, 5000),
+        "Systolic_BP": ("int", 120, 140),
+        "Diastolic_BP": ("int", 80, 95)
+    },
+    "Sleep Apnea": {
+        "Age": ("int", 45, 70),
+        "Gender": ("choice", VALID_GENDERS, None),
+        "Occupation": ("choice", VALID_OCCUPATIONS, None),
+        "BMI_Category": ("choice", ["Overweight", "Obese"], None),
+        "Sleep_Duration": ("uniform", 6.0, 8.5),
+        "Quality_of_Sleep": ("choice", [2, 3, 4], [0.3, 0.5, 0.2]),  # Fair to good mostly
+        "Stress_Level": ("choice", [2, 4, 9], [0.4, 0.4, 0.2]),  # Moderate stress levels
+        "Physical_Activity_Level": ("choice", [1, 3], [0.8, 0.2]),  # Mostly sedentary
+        "Heart_Rate": ("int", 90, 110),
+        "Daily_Steps": ("int", 1000, 3000),
+        "Systolic_BP": ("int", 140, 170),
+        "Diastolic_BP": ("int", 90, 110)
+    }
+}
+
+def sample_field(spec):
+    """Draw one value from a PROFILES field distribution"""
+    kind = spec[0]
+    if kind == "int":
+        return random.randint(spec[1], spec[2])
+    if kind == "uniform":
+        return round(random.uniform(spec[1], spec[2]), 1)
+    values, weights = spec[1], spec[2]
+    if weights is None:
+        return random.choice(values)
+    return random.choices(values, weights=weights)[0]
+
 def generate_random_case(case_id):
     """Generate a random test case"""
     # Randomly select if this should be a healthy, insomnia, or apnea case
-    case_type = random.choices(["Healthy", "Insomnia", "Sleep Apnea"], weights=[0.4, 0.4, 0.2])[0]
-    
-    if case_type == "Healthy":
-        # Healthy case characteristics
-        age = random.randint(20, 50)
-        gender = random.choice(VALID_GENDERS)
-        occupation = random.choice(VALID_OCCUPATIONS)
-        bmi_category = random.choice(["Normal"])
-        sleep_duration = round(random.uniform(7.0, 9.0), 1)
-        quality_of_sleep = random.choices([3, 4, 5], weights=[0.1, 0.4, 0.5])[0]  # Mostly good to excellent
-        stress_level = random.choices([1, 2, 4], weights=[0.6, 0.3, 0.1])[0]  # Mostly low stress
-        physical_activity = random.choices([5, 8, 10], weights=[0.2, 0.4, 0.4])[0]  # Moderately to very active
-        heart_rate = random.randint(55, 70)
-        daily_steps = random.randint(7000, 12000)
-        systolic_bp = random.randint(110, 125)
-        diastolic_bp = random.randint(70, 80)
-    elif case_type == "Insomnia":
-        # Insomnia case characteristics
-        age = random.randint(25, 55)
-        gender = random.choice(VALID_GENDERS)
-        occupation = random.choice(VALID_OCCUPATIONS)
-        bmi_category = random.choice(["Normal", "Overweight"])
-        sleep_duration = round(random.uniform(2.0, 5.0), 1)
-        quality_of_sleep = random.choices([1, 2], weights=[0.7, 0.3])[0]  # Mostly poor to fair
-        stress_level = random.choices([9, 10], weights=[0.4, 0.6])[0]  # Mostly high to very high stress
-        physical_activity = random.choices([1, 3], weights=[0.7, 0.3])[0]  # Mostly sedentary to light
-        heart_rate = random.randint(80, 100)
-        daily_steps = random.randint(2000, 5000)
-        systolic_bp = random.randint(120, 140)
-        diastolic_bp = random.randint(80, 95)
-    else:  # Sleep Apnea
-        # Sleep Apnea case characteristics
-        age = random.randint(45, 70)
-        gender = random.choice(VALID_GENDERS)
-        occupation = random.choice(VALID_OCCUPATIONS)
-        bmi_category = random.choice(["Overweight", "Obese"])
-        sleep_duration = round(random.uniform(6.0, 8.5), 1)
-        quality_of_sleep = random.choices([2, 3, 4], weights=[0.3, 0.5, 0.2])[0]  # Fair to good mostly
-        stress_level = random.choices([2, 4, 9], weights=[0.4, 0.4, 0.2])[0]  # Moderate stress levels
-        physical_activity = random.choices([1, 3], weights=[0.8, 0.2])[0]  # Mostly sedentary
-        heart_rate = random.randint(90, 110)
-        daily_steps = random.randint(1000, 3000)
-        systolic_bp = random.randint(140, 170)
-        diastolic_bp = random.randint(90, 110)
+    case_type = random.choices(CASE_TYPES, weights=CASE_TYPE_WEIGHTS)[0]
     
     return {
         "case_id": f"R{case_id}",
         "expected_disorder": case_type,
-        "data": {
-            "Age": age,
-            "Gender": gender,
-            "Occupation": occupation,
-            "BMI_Category": bmi_category,
-            "Sleep_Duration": sleep_duration,
-            "Quality_of_Sleep": quality_of_sleep,
-            "Stress_Level": stress_level,
-            "Physical_Activity_Level": physical_activity,
-            "Heart_Rate": heart_rate,
-            "Daily_Steps": daily_steps,
-            "Systolic_BP": systolic_bp,
-            "Diastolic_BP": diastolic_bp
-        }
+        "data": {column: sample_field(spec) for column, spec in PROFILES[case_type].items()}
     }
 
 def test_case(case):
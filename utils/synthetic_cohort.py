@@ -0,0 +1,166 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Get the directory of this script
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from api.tabular import ParquetChunkWriter, import_pyarrow
+from utils.random_test_cases import CASE_TYPE_WEIGHTS, CASE_TYPES, PROFILES, VALID_BMI_CATEGORIES, VALID_GENDERS, VALID_OCCUPATIONS
+
+# Field distributions per class: utils.random_test_cases.PROFILES, the table
+# generate_random_case draws from
+CLASSES = CASE_TYPES
+DEFAULT_WEIGHTS = tuple(CASE_TYPE_WEIGHTS)
+LABEL_COLUMN = "expected_disorder"
+
+COLUMNS = list(PROFILES["Healthy"])
+# Categories of the string columns, stored as pandas categoricals
+VOCABULARIES = {
+    "Gender": VALID_GENDERS,
+    "Occupation": VALID_OCCUPATIONS,
+    "BMI_Category": VALID_BMI_CATEGORIES
+}
+
+FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}
+
+def _sample(rng, spec, n, categories=None):
+    kind = spec[0]
+    if kind == "int":
+        return rng.integers(spec[1], spec[2] + 1, size=n)
+    if kind == "uniform":
+        return np.round(rng.uniform(spec[1], spec[2], size=n), 1)
+    values, weights = spec[1], spec[2]
+    picks = rng.choice(len(values), size=n, p=weights)
+    if categories is None:
+        return np.asarray(values)[picks]
+    # Category codes, so strings are only materialized by the writer
+    return np.asarray([categories.index(value) for value in values], dtype=np.int8)[picks]
+
+def generate_chunk(rng, n_rows, weights=DEFAULT_WEIGHTS, label=True):
+    """DataFrame of n_rows synthetic cases, with columns named like the /predict fields"""
+    classes = rng.choice(len(CLASSES), size=n_rows, p=weights)
+    data = {
+        column: np.empty(n_rows, dtype=np.int8 if column in VOCABULARIES else np.float64 if column == "Sleep_Duration" else np.int64)
+        for column in COLUMNS
+    }
+    for index, name in enumerate(CLASSES):
+        rows = np.flatnonzero(classes == index)
+        for column, spec in PROFILES[name].items():
+            data[column][rows] = _sample(rng, spec, len(rows), VOCABULARIES.get(column))
+    frame = {}
+    for column in COLUMNS:
+        if column in VOCABULARIES:
+            frame[column] = pd.Categorical.from_codes(data[column], VOCABULARIES[column])
+        else:
+            frame[column] = data[column]
+    if label:
+        frame[LABEL_COLUMN] = pd.Categorical.from_codes(classes, CLASSES)
+    return pd.DataFrame(frame)
+
+def generate_chunks(n_rows, chunk_rows=100000, seed=0, weights=DEFAULT_WEIGHTS, label=True):
+    """Iterate over DataFrames of at most chunk_rows rows, n_rows in total
+
+    The output depends only on seed, weights and chunk_rows.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_rows, chunk_rows):
+        yield generate_chunk(rng, min(chunk_rows, n_rows - start), weights, label)
+
+class ArrowCSVChunkWriter:
+    """Encode DataFrame chunks as one CSV stream with pyarrow's C++ writer
+
+    Several times faster than DataFrame.to_csv (api.tabular.CSVChunkWriter).
+    """
+
+    def __init__(self):
+        self._pyarrow, _ = import_pyarrow()
+        import pyarrow.csv
+        self._csv = pyarrow.csv
+        self._header = True
+
+    def write(self, frame):
+        sink = self._pyarrow.BufferOutputStream()
+        table = self._pyarrow.Table.from_pandas(frame, preserve_index=False)
+        self._csv.write_csv(table, sink, self._csv.WriteOptions(include_header=self._header))
+        self._header = False
+        return sink.getvalue().to_pybytes()
+
+    def close(self):
+        return b""
+
+class NDJSONChunkWriter:
+    """Encode DataFrame chunks as newline-delimited JSON records
+
+    Each line is assembled column-wise with pyarrow compute kernels: numbers
+    are cast to strings and categories JSON-encoded once per chunk.
+    """
+
+    def __init__(self):
+        self._pyarrow, _ = import_pyarrow()
+        import pyarrow.compute
+        self._compute = pyarrow.compute
+
+    def write(self, frame):
+        pa, pc = self._pyarrow, self._compute
+        pieces = []
+        for i, column in enumerate(frame.columns):
+            values = frame[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                encoded = pa.array([json.dumps(value) for value in values.cat.categories])
+                values = pc.take(encoded, pa.array(values.cat.codes.to_numpy()))
+            else:
+                values = pc.cast(pa.array(values.to_numpy()), pa.string())
+            pieces += [pa.scalar(("{" if i == 0 else ",") + json.dumps(column) + ":"), values]
+        lines = pc.binary_join_element_wise(*pieces, pa.scalar("}\n"), "")
+        # Lines are contiguous in the values buffer; the last offset is the end
+        end = np.frombuffer(lines.buffers()[1], dtype=np.int32)[len(lines)]
+        return memoryview(lines.buffers()[2])[:end].tobytes()
+
+    def close(self):
+        return b""
+
+def output_format(path):
+    suffix = Path(path).suffix.lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Unsupported output type: {path!r} (expected .ndjson, .csv or .parquet)")
+    return FORMATS[suffix]
+
+def write_cohort(path, n_rows, chunk_rows=100000, seed=0, weights=DEFAULT_WEIGHTS, label=True, fmt=None):
+    """Write n_rows synthetic cases to path chunk by chunk; returns the number of bytes written"""
+    fmt = fmt or output_format(path)
+    writer = {"ndjson": NDJSONChunkWriter, "csv": ArrowCSVChunkWriter, "parquet": ParquetChunkWriter}[fmt]()
+    written = 0
+    with open(path, "wb") as out:
+        for frame in generate_chunks(n_rows, chunk_rows, seed, weights, label):
+            written += out.write(writer.write(frame))
+        written += out.write(writer.close())
+    return written
+
+def main():
+    """Generate a large synthetic cohort for batch scoring and load tests"""
+    parser = argparse.ArgumentParser(description="Vectorized synthetic cohort generator (Healthy/Insomnia/Sleep Apnea profiles)")
+    parser.add_argument("output", help="Output file: .ndjson/.jsonl, .csv or .parquet")
+    parser.add_argument("--rows", type=int, default=1000000, help="Number of cases (default 1,000,000)")
+    parser.add_argument("--chunk-rows", type=int, default=100000, help="Rows generated and written at a time (bounds memory)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--weights", type=float, nargs=3, default=DEFAULT_WEIGHTS, metavar=("HEALTHY", "INSOMNIA", "APNEA"),
+                        help="Class mix (default 0.4 0.4 0.2, as generate_random_case)")
+    parser.add_argument("--no-label", action="store_true", help=f"Leave out the {LABEL_COLUMN} column")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    written = write_cohort(args.output, args.rows, args.chunk_rows, args.seed, args.weights, not args.no_label)
+    seconds = time.perf_counter() - started
+    print(f"Wrote {args.rows} rows ({written / 1e6:.1f} MB) to {args.output} in {seconds:.2f}s ({args.rows / seconds:,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()